@@ -31,6 +31,14 @@ def create_app(config_class=Config):
     bcrypt.init_app(app)
     CORS(app)
 
+    # JSON encoder for responses (orjson when installed)
+    from app.utils.encoder import init_json
+    init_json(app)
+
+    # Response cache backend for the savings summary and statistics
+    from app.utils.cache import init_cache
+    init_cache(app)
+
     # Register blueprints
     from app.routes.auth import bp as auth_bp
     from app.routes.wallet import bp as wallet_bp
@@ -44,6 +52,25 @@ def create_app(config_class=Config):
     app.register_blueprint(group_bp, url_prefix='/groups')
     app.register_blueprint(savings_bp, url_prefix='/savings')
 
+    # Register JWT callbacks (token revocation and error responses)
+    from app.utils import auth  # noqa: F401
+
+    # Register CLI commands
+    from app.commands import rollups_cli, idempotency_cli, ledger_cli, snapshots_cli, users_cli, deletions_cli, groups_cli
+
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(idempotency_cli)
+    app.cli.add_command(ledger_cli)
+    app.cli.add_command(snapshots_cli)
+    app.cli.add_command(users_cli)
+    app.cli.add_command(deletions_cli)
+    app.cli.add_command(groups_cli)
+
+    # Report request-scoped entity loader hits and misses
+    if app.config.get('ENTITY_CACHE_STATS_HEADER'):
+        from app.utils.loader import add_stats_header
+        app.after_request(add_stats_header)
+
     # Register error handlers
     @app.errorhandler(404)
     def not_found(error):
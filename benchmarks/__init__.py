@@ -0,0 +1,177 @@
+"""
+Benchmark helpers for the savings app.
+
+Each benchmark is a runnable module, e.g.:
+
+    python -m app.benchmarks.savings_summary
+
+Benchmarks run against BENCH_DATABASE_URI when it is set (point it at a
+scratch PostgreSQL database for production-like numbers) and otherwise
+against a throwaway SQLite file.
+"""
+from app import create_app, db
+from app.config import Config
+from contextlib import contextmanager
+from sqlalchemy import event
+import os
+import resource
+import tempfile
+import threading
+import time
+
+class BenchmarkConfig(Config):
+    TESTING = True
+    EMAIL_VERIFICATION_ENABLED = False
+    ENTITY_CACHE_STATS_HEADER = True
+    # Benchmarks time the database work; summary_cache installs its own backends
+    SUMMARY_CACHE_BACKEND = None
+    SQLALCHEMY_DATABASE_URI = os.environ.get('BENCH_DATABASE_URI') or \
+        'sqlite:///' + os.path.join(tempfile.gettempdir(), 'savings_app_bench.db')
+    # Concurrent benchmarks share one SQLite file; wait on its write lock
+    # instead of failing with 'database is locked'
+    if SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+        SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': 60}}
+
+def create_bench_app():
+    """Create an app bound to the benchmark database with a fresh schema."""
+    app = create_app(BenchmarkConfig)
+    
+    with app.app_context():
+        from app import models  # noqa: F401 - register models with the metadata
+        db.drop_all()
+        db.create_all()
+    
+    return app
+
+class QueryCounter:
+    """Counts statements sent to the database (i.e. round trips)."""
+    def __init__(self):
+        self.count = 0
+    
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+@contextmanager
+def count_queries():
+    """
+    Count the statements executed on db.engine inside the block.
+    
+    Usage:
+        with count_queries() as counter:
+            service.do_something()
+        print(counter.count)
+    """
+    counter = QueryCounter()
+    event.listen(db.engine, 'before_cursor_execute', counter)
+    try:
+        yield counter
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', counter)
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+def time_calls(fn, repeat):
+    """
+    Call fn repeatedly and collect wall-clock latencies.
+    
+    Returns:
+        list: Latency of each call in milliseconds
+    """
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+def report(label, samples):
+    """Print p50/p99 for a list of millisecond samples."""
+    print(f"{label:<40} p50={percentile(samples, 50):8.2f}ms  p99={percentile(samples, 99):8.2f}ms")
+
+def rss_mib():
+    """Current resident set size in MiB (peak so far where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def seed_user(email='bench@example.com', name='Bench User'):
+    """Create a user and a wallet to hang benchmark data off."""
+    from app.models.user import User
+    from app.models.wallet import Wallet
+    
+    user = User(email=email, name=name, password='Bench-passw0rd!')
+    db.session.add(user)
+    db.session.flush()
+    
+    wallet = Wallet(user_id=user.id, amount=0, name='Bench wallet')
+    db.session.add(wallet)
+    db.session.commit()
+    
+    return user, wallet
+
+def run_threads(app, worker, threads):
+    """
+    Run worker(index) on `threads` threads, each inside its own app context
+    (and so with its own database session).
+    
+    Returns:
+        tuple: (list of worker results, elapsed seconds)
+    """
+    results = [None] * threads
+    
+    def target(index):
+        with app.app_context():
+            results[index] = worker(index)
+    
+    pool = [threading.Thread(target=target, args=(index,)) for index in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    
+    return results, time.perf_counter() - started
+
+def seed_users(count, prefix='member'):
+    """
+    Bulk-insert `count` users sharing one password hash.
+    
+    Returns:
+        list: The new user ids
+    """
+    from app.models.user import User
+    
+    password_hash = User(email='hash@example.com', name='hash', password='Bench-passw0rd!').password_hash
+    start = db.session.query(db.func.count(User.id)).scalar()
+    db.session.bulk_insert_mappings(User, [
+        {
+            'email': f'{prefix}{start + i}@example.com',
+            'name': f'{prefix.title()} {start + i}',
+            'password_hash': password_hash,
+            'verified': True
+        }
+        for i in range(count)
+    ])
+    db.session.commit()
+    
+    return [
+        row[0] for row in db.session.query(User.id)
+        .filter(User.email.like(f'{prefix}%@example.com'))
+        .order_by(User.id.desc()).limit(count).all()
+    ]
+
+def auth_headers(user_id):
+    """Authorization header for a request made as user_id."""
+    from app.models.user import User
+    from app.services.auth_service import AuthService
+    
+    tokens = AuthService().create_tokens(db.session.get(User, user_id))
+    return {'Authorization': f"Bearer {tokens['access_token']}"}
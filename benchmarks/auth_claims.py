@@ -0,0 +1,96 @@
+"""
+Benchmark: admin/verified checks from token claims against a user lookup
+per request.
+
+A probe endpoint is mounted behind the old-style decorator (load the user
+to read one boolean) and behind admin_required/verified_required, which
+read the token's claims. Counts queries per request and checks that
+revocation still works: a role change rejects old tokens at once, and an
+epoch bumped behind the cache's back is honoured once its TTL runs out.
+
+    python -m app.benchmarks.auth_claims [requests]
+"""
+from app import db
+from app.benchmarks import auth_headers, count_queries, create_bench_app, report, seed_user, time_calls
+from app.models.user import User
+from app.services.auth_service import AuthService
+from app.utils.auth import admin_required, auth_epochs, verified_required
+from flask import jsonify
+from flask_jwt_extended import get_jwt_identity, jwt_required
+from functools import wraps
+import sys
+import time
+
+def lookup_admin_required(fn):
+    """The previous admin_required: one user lookup per request"""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        user = db.session.get(User, int(get_jwt_identity()))
+        if not user or not user.is_admin:
+            return jsonify({"error": "Admin privileges required"}), 403
+        return fn(*args, **kwargs)
+    return wrapper
+
+def probe():
+    return jsonify({"ok": True})
+
+def mount(app):
+    app.add_url_rule('/bench/lookup', 'bench_lookup', jwt_required()(lookup_admin_required(probe)))
+    app.add_url_rule('/bench/claims', 'bench_claims', jwt_required()(admin_required(verified_required(probe))))
+
+def measure(client, url, headers, requests):
+    with count_queries() as counter:
+        samples = time_calls(lambda: client.get(url, headers=headers), requests)
+    return samples, counter.count
+
+def main(requests=1000):
+    app = create_bench_app()
+    mount(app)
+    client = app.test_client()
+    service = AuthService()
+    failures = []
+    
+    with app.app_context():
+        user, _ = seed_user()
+        user.verified = True
+        db.session.commit()
+        service.set_admin(user.id)
+        headers = auth_headers(user.id)
+    
+    # Each test request pushes its own app context and so gets a fresh session
+    for label, url in [('user lookup per request', '/bench/lookup'), ('token claims', '/bench/claims')]:
+        client.get(url, headers=headers)
+        with app.app_context():
+            auth_epochs.clear()
+            samples, queries = measure(client, url, headers, requests)
+        report(f"{label} ({queries / requests:.3f} q/req)", samples)
+        if url == '/bench/claims' and queries > 1:
+            failures.append(f"claims check ran {queries} queries for {requests} requests")
+    
+    with app.app_context():
+        # A role change in this process revokes old tokens immediately
+        service.set_admin(user.id, False)
+        response = client.get('/bench/claims', headers=headers)
+        if response.status_code != 401 or response.get_json().get('code') != 'token_revoked':
+            failures.append(f"token survived a role change: {response.status_code}")
+        
+        headers = auth_headers(user.id)
+        if client.get('/bench/claims', headers=headers).status_code != 403:
+            failures.append("non-admin token passed admin_required")
+        
+        # A bump from another process is seen once the cached epoch expires
+        app.config['AUTH_EPOCH_CACHE_TTL'] = 0.2
+        auth_epochs.clear()
+        client.get('/bench/claims', headers=headers)
+        db.session.query(User).filter_by(id=user.id).update({User.auth_epoch: User.auth_epoch + 1})
+        db.session.commit()
+        time.sleep(0.25)
+        if client.get('/bench/claims', headers=headers).status_code != 401:
+            failures.append("token survived an epoch bump past the cache TTL")
+    
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:])))
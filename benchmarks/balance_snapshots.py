@@ -0,0 +1,80 @@
+"""
+Point-in-time balances: nearest snapshot plus ledger tail vs summing the
+whole history.
+
+Seeds wallets with growing histories, backfills their snapshots, then
+times balance_at() for random instants and running balances for random
+history pages with both approaches. Fails if they ever disagree.
+
+    python -m app.benchmarks.balance_snapshots [samples]
+"""
+from app import db
+from app.benchmarks import create_bench_app, percentile, seed_user, time_calls
+from app.benchmarks.savings_summary import seed_history
+from app.models.savings import SavingsUpdate
+from app.services.ledger_service import LedgerService
+from app.services.snapshot_service import SnapshotService
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import func, tuple_
+import random
+import sys
+
+def full_scan_balance(wallet_id, *criteria):
+    """The O(history) way: sum every ledger entry up to the point."""
+    total = db.session.query(func.coalesce(func.sum(LedgerService().signed_amount()), 0))\
+        .filter(SavingsUpdate.wallet_id == wallet_id, *criteria).scalar()
+    return Decimal(str(total))
+
+def close(a, b):
+    return abs(a - b) <= LedgerService.TOLERANCE
+
+def run(size, samples, rng):
+    user, wallet = seed_user(email=f'snapshots{size}@example.com')
+    wallet_id = wallet.id
+    seed_history(user.id, wallet_id, size)
+    written = sum(count for backfilled_id, count in SnapshotService().backfill() if backfilled_id == wallet_id)
+    
+    service = SnapshotService()
+    now = datetime.utcnow()
+    instants = [now - timedelta(seconds=rng.randint(0, 730 * 86400)) for _ in range(samples)]
+    entries = db.session.query(SavingsUpdate).filter_by(wallet_id=wallet_id)\
+        .order_by(SavingsUpdate.created_at.desc(), SavingsUpdate.id.desc()).all()
+    pages = [entries[start:start + 20] for start in (rng.randrange(0, len(entries) - 20) for _ in range(samples))]
+    
+    ok = all(close(service.balance_at(wallet_id, at), full_scan_balance(wallet_id, SavingsUpdate.created_at <= at))
+             for at in instants)
+    for page in pages:
+        balances = service.running_balances(wallet_id, page)
+        for entry in (page[0], page[-1]):
+            expected = full_scan_balance(
+                wallet_id,
+                tuple_(SavingsUpdate.created_at, SavingsUpdate.id) <= tuple_(entry.created_at, entry.id)
+            )
+            ok = ok and close(balances[entry.id], expected)
+    
+    instant = iter(instants * 2)
+    snapshot_ms = time_calls(lambda: service.balance_at(wallet_id, next(instant)), samples)
+    full_ms = time_calls(lambda: full_scan_balance(wallet_id, SavingsUpdate.created_at <= next(instant)), samples)
+    page = iter(pages)
+    running_ms = time_calls(lambda: service.running_balances(wallet_id, next(page)), samples)
+    
+    print(
+        f"{size:>7} entries, {written:>5} snapshots: balance_at p50={percentile(snapshot_ms, 50):7.2f}ms  "
+        f"full scan p50={percentile(full_ms, 50):7.2f}ms  running balances/page p50={percentile(running_ms, 50):6.2f}ms"
+        f"{'' if ok else '  MISMATCH'}"
+    )
+    return ok
+
+def main(samples=50):
+    app = create_bench_app()
+    rng = random.Random(0)
+    
+    with app.app_context():
+        ok = all([run(size, samples, rng) for size in (1000, 10000, 100000)])
+    
+    print("snapshot balances match full scans" if ok else "FAILED: snapshot balances disagree with the ledger")
+    return ok
+
+if __name__ == '__main__':
+    sys.exit(0 if main(*[int(arg) for arg in sys.argv[1:2]]) else 1)
@@ -0,0 +1,88 @@
+"""
+Multi-threaded criss-cross transfer stress test for WalletService.transfer.
+
+Threads move money back and forth between a small ring of wallets in
+opposing directions, the pattern that deadlocks when locks are taken in
+request order. Fails if money is created or destroyed, a wallet is
+overdrawn, a balance disagrees with its ledger or any transfer hits a
+database error; reports transfers per second.
+
+    python -m app.benchmarks.concurrent_transfers [threads] [transfers_per_thread] [wallets]
+"""
+from app import db
+from app.benchmarks import create_bench_app, run_threads, seed_user
+from app.models.savings import SavingsUpdate
+from app.models.wallet import Wallet
+from app.services.wallet_service import WalletService
+from decimal import Decimal
+from sqlalchemy import case, func
+from sqlalchemy.exc import SQLAlchemyError
+import random
+import sys
+
+def main(threads=16, transfers=50, wallet_count=4, amount=Decimal('10.00')):
+    app = create_bench_app()
+    
+    with app.app_context():
+        user, first_wallet = seed_user()
+        user_id = user.id
+        service = WalletService()
+        wallet_ids = [first_wallet.id] + [
+            service.create_wallet(user_id, name=f'Bench wallet {i}').id for i in range(1, wallet_count)
+        ]
+        for wallet_id in wallet_ids:
+            service.deposit(wallet_id, user_id, amount * transfers)
+        starting_total = amount * transfers * wallet_count
+    
+    def worker(index):
+        service = WalletService()
+        rng = random.Random(index)
+        succeeded = rejected = failed = 0
+        for _ in range(transfers):
+            source, destination = rng.sample(wallet_ids, 2)
+            # Half the threads run every pair in the opposite direction
+            if index % 2:
+                source, destination = destination, source
+            try:
+                service.transfer(user_id, source, destination, amount)
+                succeeded += 1
+            except ValueError:
+                db.session.rollback()
+                rejected += 1
+            except SQLAlchemyError:
+                db.session.rollback()
+                failed += 1
+        return succeeded, rejected, failed
+    
+    results, elapsed = run_threads(app, worker, threads)
+    succeeded, rejected, failed = (sum(result[i] for result in results) for i in range(3))
+    
+    with app.app_context():
+        balances = dict(db.session.query(Wallet.id, Wallet.amount).filter(Wallet.id.in_(wallet_ids)).all())
+        signed = case(
+            (SavingsUpdate.type.in_(['deposit', 'transfer_in']), SavingsUpdate.amount),
+            else_=-SavingsUpdate.amount
+        )
+        ledger = dict(
+            db.session.query(SavingsUpdate.wallet_id, func.sum(signed))
+            .filter(SavingsUpdate.wallet_id.in_(wallet_ids))
+            .group_by(SavingsUpdate.wallet_id).all()
+        )
+        transfer_rows = db.session.query(func.count(SavingsUpdate.id))\
+            .filter(SavingsUpdate.type.in_(['transfer_out', 'transfer_in'])).scalar()
+    
+    total = sum(balances.values())
+    conserved = total == starting_total
+    ledger_matches = all(Decimal(str(ledger[wallet_id])) == balances[wallet_id] for wallet_id in wallet_ids)
+    no_overdraft = all(balance >= 0 for balance in balances.values())
+    ok = conserved and ledger_matches and no_overdraft and not failed and transfer_rows == 2 * succeeded
+    
+    print(f"{threads} threads x {transfers} criss-cross transfers of {amount} across {wallet_count} wallets")
+    print(f"succeeded={succeeded} rejected={rejected} database errors={failed}")
+    print(f"total before={starting_total} after={total} balances={sorted(balances.values())}")
+    print(f"throughput: {succeeded / elapsed:,.0f} transfers/s")
+    print("money conserved, balances match ledger" if ok else "INCONSISTENT: money lost, overdraft or deadlock")
+    return ok
+
+if __name__ == '__main__':
+    sys.exit(0 if main(*[int(arg) for arg in sys.argv[1:4]]) else 1)
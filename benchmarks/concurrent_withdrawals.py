@@ -0,0 +1,60 @@
+"""
+Multi-threaded withdrawal stress test for WalletService.
+
+Many threads withdraw from one wallet at once, asking for more money in
+total than it holds. Fails if the wallet is ever overdrawn or if the
+balance and the ledger disagree; reports withdrawals per second.
+
+    python -m app.benchmarks.concurrent_withdrawals [threads] [attempts_per_thread]
+"""
+from app import db
+from app.benchmarks import create_bench_app, run_threads, seed_user
+from app.models.savings import SavingsUpdate
+from app.models.wallet import Wallet
+from app.services.wallet_service import WalletService
+from decimal import Decimal
+from sqlalchemy import func
+import sys
+
+def main(threads=16, attempts=50, amount=Decimal('10.00')):
+    app = create_bench_app()
+    
+    with app.app_context():
+        user, wallet = seed_user()
+        user_id, wallet_id = user.id, wallet.id
+        # Enough for half of the attempted withdrawals
+        starting_balance = amount * threads * attempts / 2
+        WalletService().deposit(wallet_id, user_id, starting_balance)
+    
+    def worker(index):
+        service = WalletService()
+        succeeded = rejected = 0
+        for _ in range(attempts):
+            try:
+                service.withdraw(wallet_id, user_id, amount)
+                succeeded += 1
+            except ValueError:
+                db.session.rollback()
+                rejected += 1
+        return succeeded, rejected
+    
+    results, elapsed = run_threads(app, worker, threads)
+    succeeded = sum(result[0] for result in results)
+    rejected = sum(result[1] for result in results)
+    
+    with app.app_context():
+        balance = db.session.get(Wallet, wallet_id).amount
+        ledger_total = db.session.query(func.count(SavingsUpdate.id))\
+            .filter_by(wallet_id=wallet_id, type='withdrawal').scalar()
+    
+    expected_balance = starting_balance - amount * succeeded
+    ok = balance >= 0 and balance == expected_balance and ledger_total == succeeded
+    
+    print(f"{threads} threads x {attempts} withdrawals of {amount} from a balance of {starting_balance}")
+    print(f"succeeded={succeeded} rejected={rejected} final balance={balance} ledger rows={ledger_total}")
+    print(f"throughput: {(succeeded + rejected) / elapsed:,.0f} withdrawal attempts/s")
+    print("no overdraft, balance matches ledger" if ok else "INCONSISTENT: overdraft or lost update")
+    return ok
+
+if __name__ == '__main__':
+    sys.exit(0 if main(*[int(arg) for arg in sys.argv[1:3]]) else 1)
@@ -0,0 +1,107 @@
+"""
+Benchmark: conditional GETs (ETag / If-None-Match) on the listings.
+
+For /wallets, /goals, /groups and the wallet/goal history endpoints,
+compares a full 200 with a revalidation that comes back 304, and checks
+that a 304 costs at most one query, that a write changes the ETag, and
+that another user's ETag never validates. Also checks that /goals is
+answered in full once the clock alone changes a goal's days_remaining or
+is_expired.
+
+    python -m app.benchmarks.conditional_get [items] [repeat]
+"""
+from app import db
+from app.benchmarks import auth_headers, count_queries, create_bench_app, report, seed_user, time_calls
+from app.benchmarks.savings_summary import seed_history
+from app.models.goal import Goal
+from app.models.group import Group, GroupMember
+from app.models.wallet import Wallet
+from sqlalchemy import update
+from datetime import timedelta
+import sys
+
+def seed(user_id, wallet_id, items):
+    db.session.add_all([Wallet(user_id=user_id, amount=100, name=f'Wallet {i}') for i in range(items)])
+    goals = [Goal(user_id=user_id, target_amount=1000, time_period=timedelta(days=30), name=f'Goal {i}') for i in range(items)]
+    groups = [Group(name=f'Group {i}', description=None, created_by=user_id) for i in range(items)]
+    db.session.add_all(goals + groups)
+    db.session.flush()
+    db.session.add_all([GroupMember(group_id=group.id, user_id=user_id, is_admin=True) for group in groups])
+    db.session.commit()
+    seed_history(user_id, wallet_id, items)
+    return goals[0].id, groups[0].id
+
+def main(items=500, repeat=50):
+    app = create_bench_app()
+    client = app.test_client()
+    failures = []
+    
+    with app.app_context():
+        user, wallet = seed_user()
+        other, _ = seed_user(email='other@example.com')
+        goal_id, group_id = seed(user.id, wallet.id, items)
+        headers, other_headers = auth_headers(user.id), auth_headers(other.id)
+        wallet_id, user_id = wallet.id, user.id
+    
+    endpoints = [
+        ('/wallets', lambda: client.post(f'/wallets/{wallet_id}/deposit', json={'amount': 5}, headers=headers)),
+        ('/goals', lambda: client.put(f'/goals/{goal_id}', json={'name': 'Renamed'}, headers=headers)),
+        ('/groups', lambda: client.put(f'/groups/{group_id}', json={'name': 'Renamed'}, headers=headers)),
+        (f'/wallets/{wallet_id}/history?limit=100', lambda: client.post(f'/wallets/{wallet_id}/withdraw', json={'amount': 1}, headers=headers)),
+        (f'/goals/{goal_id}/history', lambda: client.post(f'/goals/{goal_id}/progress', json={'amount': 1, 'wallet_id': wallet_id}, headers=headers)),
+    ]
+    
+    print(f"{items} wallets/goals/groups, {items} ledger rows, {repeat} calls each")
+    for url, write in endpoints:
+        full = client.get(url, headers=headers)
+        etag = full.headers.get('ETag')
+        if full.status_code != 200 or not etag:
+            failures.append(f"{url}: no ETag on {full.status_code}")
+            continue
+        
+        revalidate = {**headers, 'If-None-Match': etag}
+        with app.app_context():
+            with count_queries() as counter:
+                not_modified = client.get(url, headers=revalidate)
+        if not_modified.status_code != 304:
+            failures.append(f"{url}: unchanged listing answered {not_modified.status_code}")
+        if counter.count > 1:
+            failures.append(f"{url}: 304 took {counter.count} queries")
+        
+        report(f"{url[:28]} 200 ({len(full.data):>7,} B)", time_calls(lambda: client.get(url, headers=headers), repeat))
+        report(f"{url[:28]} 304 ({counter.count} query)", time_calls(lambda: client.get(url, headers=revalidate), repeat))
+        
+        if client.get(url, headers={**other_headers, 'If-None-Match': etag}).status_code == 304:
+            failures.append(f"{url}: another user's request validated the ETag")
+        
+        if write().status_code >= 400:
+            failures.append(f"{url}: write failed")
+        changed = client.get(url, headers=revalidate)
+        if changed.status_code != 200 or changed.headers.get('ETag') == etag:
+            failures.append(f"{url}: listing changed but answered {changed.status_code} with the same ETag")
+    
+    # days_remaining and is_expired count down with the clock, without a write:
+    # moving every goal's dates back stands in for moving the clock forward
+    for days in (1, 31):
+        full = client.get('/goals', headers=headers)
+        with app.app_context():
+            for goal in Goal.query.filter_by(user_id=user_id).all():
+                db.session.execute(
+                    update(Goal).where(Goal.id == goal.id)
+                    .values(start_date=goal.start_date - timedelta(days=days),
+                            end_date=goal.end_date - timedelta(days=days), updated_at=goal.updated_at)
+                )
+            db.session.commit()
+        
+        later = client.get('/goals', headers={**headers, 'If-None-Match': full.headers['ETag']})
+        countdown = [(goal['days_remaining'], goal['is_expired']) for goal in full.get_json()]
+        if later.status_code != 200 or \
+                [(goal['days_remaining'], goal['is_expired']) for goal in later.get_json()] == countdown:
+            failures.append(f"/goals: {days} days later answered {later.status_code} with the old countdowns")
+    
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:])))
@@ -0,0 +1,82 @@
+"""
+Benchmark: streaming GET /savings/export of a 1M-row history.
+
+Streams a 100k-row and a 1M-row export in both formats through the test
+client, reading the response chunk by chunk like a slow client would,
+and reports throughput and the process's peak RSS growth during each
+export. Fails if an export is missing rows, or if the 1M-row export
+needs noticeably more memory than the 100k-row one (it should stay flat).
+
+    python -m app.benchmarks.export_stream [rows]
+"""
+from app.benchmarks import auth_headers, create_bench_app, rss_mib, seed_user
+from app.benchmarks.savings_summary import seed_history
+import gc
+import json
+import sys
+import time
+
+# Allowed RSS growth beyond what the small export needed
+RSS_SLACK_MIB = 16
+
+def stream(client, headers, export_format):
+    """Read one export chunk by chunk; returns (rows, bytes, seconds, peak RSS growth in MiB, first row)"""
+    gc.collect()
+    baseline = peak = rss_mib()
+    size = lines = 0
+    first = None
+    
+    started = time.perf_counter()
+    response = client.get(f'/savings/export?format={export_format}', headers=headers, buffered=False)
+    try:
+        for chunk in response.iter_encoded():
+            size += len(chunk)
+            lines += chunk.count(b'\n')
+            if first is None:
+                first = chunk.split(b'\n', 2)[:2]
+            peak = max(peak, rss_mib())
+    finally:
+        response.close()
+    elapsed = time.perf_counter() - started
+    
+    rows = lines - 1 if export_format == 'csv' else lines
+    return rows, size, elapsed, peak - baseline, first
+
+def main(rows=1000000):
+    app = create_bench_app()
+    client = app.test_client()
+    failures = []
+    
+    with app.app_context():
+        small, small_wallet = seed_user(email='small@example.com')
+        large, large_wallet = seed_user(email='large@example.com')
+        seed_history(small.id, small_wallet.id, rows // 10)
+        seed_history(large.id, large_wallet.id, rows)
+        exports = [(rows // 10, auth_headers(small.id)), (rows, auth_headers(large.id))]
+    
+    for export_format in ('csv', 'ndjson'):
+        growth = {}
+        for expected, headers in exports:
+            count, size, elapsed, growth[expected], first = stream(client, headers, export_format)
+            print(f"{export_format:<6} {expected:>9,} rows: {size / 2 ** 20:7.1f} MiB in {elapsed:6.2f}s "
+                  f"({count / elapsed:9,.0f} rows/s, {size / 2 ** 20 / elapsed:5.1f} MiB/s)  "
+                  f"peak RSS growth {growth[expected]:6.1f} MiB")
+            
+            if count != expected:
+                failures.append(f"{export_format}: exported {count} of {expected} rows")
+            if export_format == 'csv' and not first[0].startswith(b'id,user_id,wallet_id'):
+                failures.append(f"csv: unexpected header {first[0][:60]!r}")
+            if export_format == 'ndjson' and 'amount' not in json.loads(first[0]):
+                failures.append(f"ndjson: unexpected first line {first[0][:60]!r}")
+        
+        small_growth, large_growth = growth[rows // 10], growth[rows]
+        if large_growth > small_growth + RSS_SLACK_MIB:
+            failures.append(f"{export_format}: RSS grew {large_growth:.1f} MiB for {rows} rows "
+                            f"vs {small_growth:.1f} MiB for {rows // 10}; memory is not constant")
+    
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:])))
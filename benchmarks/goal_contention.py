@@ -0,0 +1,103 @@
+"""
+Contention benchmark: optimistic version checks with retry_on_conflict
+against pessimistic SELECT ... FOR UPDATE for read-modify-write edits of
+goals.
+
+Threads repeatedly read a goal, think briefly and write it back. The
+conflict rate is varied by how many goals the threads share. Fails if an
+optimistic edit is ever lost.
+
+SQLite ignores FOR UPDATE, so the pessimistic numbers are only meaningful
+against PostgreSQL (set BENCH_DATABASE_URI).
+
+    python -m app.benchmarks.goal_contention [threads] [edits_per_thread] [think_ms]
+"""
+from app import db
+from app.benchmarks import create_bench_app, run_threads, seed_user
+from app.models.goal import Goal
+from app.utils.db import ConflictError, retry_on_conflict
+from datetime import timedelta
+from sqlalchemy import func
+from sqlalchemy.orm.exc import StaleDataError
+import logging
+import random
+import sys
+import time
+
+def seed_goals(user_id, count):
+    goals = [Goal(user_id=user_id, target_amount=1000, time_period=timedelta(days=30)) for _ in range(count)]
+    db.session.add_all(goals)
+    db.session.commit()
+    return [goal.id for goal in goals]
+
+def total_target(goal_ids):
+    return db.session.query(func.sum(Goal.target_amount)).filter(Goal.id.in_(goal_ids)).scalar()
+
+def run(app, user_id, strategy, pool_size, threads, edits, think):
+    with app.app_context():
+        goal_ids = seed_goals(user_id, pool_size)
+        before = total_target(goal_ids)
+    
+    def worker(index):
+        rng = random.Random(index)
+        attempts = succeeded = conflicts = 0
+        
+        def edit(goal_id):
+            nonlocal attempts
+            attempts += 1
+            query = Goal.query.filter_by(id=goal_id).populate_existing()
+            if strategy == 'for update':
+                query = query.with_for_update()
+            goal = query.one()
+            time.sleep(think)
+            goal.target_amount += 1
+            db.session.commit()
+        
+        if strategy == 'optimistic':
+            edit = retry_on_conflict(retries=5)(edit)
+        
+        for _ in range(edits):
+            try:
+                edit(rng.choice(goal_ids))
+                succeeded += 1
+            except (ConflictError, StaleDataError):
+                db.session.rollback()
+                conflicts += 1
+        return attempts, succeeded, conflicts
+    
+    results, elapsed = run_threads(app, worker, threads)
+    attempts, succeeded, conflicts = (sum(result[i] for result in results) for i in range(3))
+    
+    with app.app_context():
+        applied = total_target(goal_ids) - before
+    
+    lost = int(succeeded - applied)
+    print(
+        f"{strategy:<11} {pool_size:>4} goals: {succeeded / elapsed:8,.0f} edits/s  "
+        f"conflict rate={(attempts - succeeded) / attempts:6.1%}  "
+        f"retries/edit={(attempts - succeeded - conflicts) / (threads * edits):5.2f}  "
+        f"gave up={conflicts:<4} lost updates={lost}"
+    )
+    return lost == 0 or strategy != 'optimistic'
+
+def main(threads=8, edits=50, think_ms=1):
+    app = create_bench_app()
+    # Giving up is expected at high contention; don't log every occurrence
+    logging.getLogger('app.utils.db').setLevel(logging.ERROR)
+    
+    with app.app_context():
+        user, _ = seed_user()
+        user_id = user.id
+        if db.engine.dialect.name == 'sqlite':
+            print("note: SQLite ignores FOR UPDATE; its edits are protected only by the version check")
+    
+    ok = True
+    # Fewer shared goals -> more threads editing the same row at once
+    for pool_size in (1, 4, 16, 64):
+        for strategy in ('optimistic', 'for update'):
+            ok = run(app, user_id, strategy, pool_size, threads, edits, think_ms / 1000) and ok
+    
+    return ok
+
+if __name__ == '__main__':
+    sys.exit(0 if main(*[int(arg) for arg in sys.argv[1:4]]) else 1)
@@ -0,0 +1,94 @@
+"""
+Benchmark of POST and DELETE /groups/<id>/members:batch against the same
+members added and removed one request at a time.
+
+For each size, one group is filled through the single-member route and
+another through the batch route, then both are emptied again the same
+two ways. Reports wall time and database round trips. Fails if the two
+groups end up with different members, or if the batch routes' query
+counts grow with the number of members.
+
+    python -m app.benchmarks.group_batch [size ...]
+"""
+from app import db
+from app.benchmarks import auth_headers, count_queries, create_bench_app, seed_user, seed_users
+from app.models.group import GroupMember
+from app.services.group_service import GroupService
+import sys
+import time
+
+def members_of(group_id):
+    return {row[0] for row in db.session.query(GroupMember.user_id).filter_by(group_id=group_id)}
+
+def timed(app, fn):
+    """(milliseconds, queries) of fn"""
+    with app.app_context(), count_queries() as counter:
+        started = time.perf_counter()
+        fn()
+        return (time.perf_counter() - started) * 1000, counter.count
+
+def run(app, client, owner_id, headers, size):
+    with app.app_context():
+        member_ids = seed_users(size, prefix=f'batch{size}_')
+        single_id = GroupService().create_group(f'Single {size}', created_by=owner_id).id
+        batch_id = GroupService().create_group(f'Batch {size}', created_by=owner_id).id
+    
+    def add_singly():
+        for member_id in member_ids:
+            response = client.post(f'/groups/{single_id}/members', json={'user_id': member_id}, headers=headers)
+            assert response.status_code == 201, response.get_json()
+    
+    def add_batch():
+        response = client.post(f'/groups/{batch_id}/members:batch',
+                               json={'members': [{'user_id': member_id} for member_id in member_ids]},
+                               headers=headers)
+        assert response.status_code == 200 and response.get_json()['added'] == size, response.get_json()
+    
+    def remove_singly():
+        for member_id in member_ids:
+            response = client.delete(f'/groups/{single_id}/members/{member_id}', headers=headers)
+            assert response.status_code == 200, response.get_json()
+    
+    def remove_batch():
+        response = client.delete(f'/groups/{batch_id}/members:batch', json={'user_ids': member_ids}, headers=headers)
+        assert response.status_code == 200 and response.get_json()['removed'] == size, response.get_json()
+    
+    queries = {}
+    for label, single, batch in [('add', add_singly, add_batch), ('remove', remove_singly, remove_batch)]:
+        single_ms, single_queries = timed(app, single)
+        batch_ms, batch_queries = timed(app, batch)
+        queries[label] = batch_queries
+        print(f"{label:<6} {size:>5} members: single-member {single_ms:9.1f}ms ({single_queries:>5} queries)  "
+              f"batch {batch_ms:7.1f}ms ({batch_queries:>2} queries)  speedup {single_ms / batch_ms:6.1f}x")
+        
+        with app.app_context():
+            if members_of(single_id) != members_of(batch_id):
+                print(f"MISMATCH after {label}: the two groups have different members")
+                return None
+    
+    return queries
+
+def main(sizes=(10, 100, 1000)):
+    app = create_bench_app()
+    client = app.test_client()
+    
+    with app.app_context():
+        owner, _ = seed_user()
+        owner_id = owner.id
+        headers = auth_headers(owner_id)
+    
+    # The first request caches the token's auth epoch check; count steady-state requests
+    client.get('/groups', headers=headers)
+    
+    counts = [run(app, client, owner_id, headers, size) for size in sizes]
+    if None in counts:
+        return False
+    
+    if len({tuple(sorted(queries.items())) for queries in counts}) != 1:
+        print(f"FAIL: batch query counts grow with the number of members: {counts}")
+        return False
+    return True
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or (10, 100, 1000)
+    sys.exit(0 if main(sizes) else 1)
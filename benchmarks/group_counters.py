@@ -0,0 +1,232 @@
+"""
+Benchmark of the groups' member_count/admin_count counters.
+
+For each size, fills a group with that many members and times GET /groups
+and removing members from it (the route's last-admin check), next to the
+COUNT(*) queries they used to run. Then runs a random mix of membership
+writes through every path (single and batch adds and removals, leaving,
+promoting and demoting, deleting a user) and checks that no counter drifted
+from group_members, that deleting a group's last admin promotes another
+member and deleting its last member deletes it, that `flask groups repair-counts` fixes counters broken
+on purpose, and that the last admin still cannot be removed. Fails if any
+check fails, or if removing a member gets slower with the group's size.
+
+    python -m app.benchmarks.group_counters [size ...]
+"""
+from app import db
+from app.benchmarks import auth_headers, create_bench_app, percentile, report, seed_user, seed_users, time_calls
+from app.models.group import Group, GroupMember
+from app.services.deletion_service import DeletionService
+from app.services.group_service import GroupService
+from sqlalchemy import func, insert, update
+from datetime import datetime
+import random
+import sys
+
+# Removing a member from the largest group may cost this much more than from the smallest
+GROWTH_SLACK = 3.0
+REPEAT = 50
+
+def fill_group(group_id, user_ids):
+    joined_at = datetime.utcnow()
+    db.session.execute(insert(GroupMember), [
+        {'group_id': group_id, 'user_id': user_id, 'is_admin': False, 'joined_at': joined_at}
+        for user_id in user_ids
+    ])
+    db.session.commit()
+
+def drifted():
+    """Groups whose counters disagree with group_members"""
+    return [
+        (group.id, group.member_count, group.admin_count)
+        for group in Group.query.all()
+        if (group.member_count, group.admin_count) != (
+            GroupMember.query.filter_by(group_id=group.id).count(),
+            GroupMember.query.filter_by(group_id=group.id, is_admin=True).count()
+        )
+    ]
+
+_headers = {}
+
+def auth_headers_for(app, user_id):
+    """Cached auth headers of a member acting for themselves"""
+    if user_id not in _headers:
+        with app.app_context():
+            _headers[user_id] = auth_headers(user_id)
+    return _headers[user_id]
+
+def repaired_count():
+    repaired = 0
+    for _, repaired, _ in GroupService().repair_counts():
+        pass
+    return repaired
+
+def measure(app, client, owner_id, headers, size):
+    """p50 milliseconds of removing a member from a group of `size`"""
+    with app.app_context():
+        group_id = GroupService().create_group(f'Counters {size}', created_by=owner_id).id
+        member_ids = seed_users(size, prefix=f'counters{size}_')
+        fill_group(group_id, member_ids)
+        for _ in GroupService().repair_counts():
+            pass
+        
+        legacy = time_calls(lambda: (
+            GroupMember.query.filter_by(group_id=group_id, is_admin=True).count(),
+            db.session.query(GroupMember.group_id, func.count(GroupMember.id))
+            .filter(GroupMember.group_id == group_id).group_by(GroupMember.group_id).all()
+        ), REPEAT)
+    
+    removals = iter(member_ids)
+    
+    def remove():
+        response = client.delete(f'/groups/{group_id}/members/{next(removals)}', headers=headers)
+        assert response.status_code == 200, response.get_json()
+    
+    def listing():
+        response = client.get('/groups', headers=headers)
+        assert response.status_code == 200, response.get_json()
+    
+    removal = time_calls(remove, REPEAT)
+    listings = time_calls(listing, REPEAT)
+    print(f"group of {size:>7,} members:")
+    report("  COUNT(*) admins + members (before)", legacy)
+    report("  DELETE /groups/<id>/members/<id>", removal)
+    report("  GET /groups", listings)
+    
+    with app.app_context():
+        group = db.session.get(Group, group_id)
+        expected = size + 1 - REPEAT
+        if group.member_count != expected:
+            print(f"FAIL: group of {size} has member_count {group.member_count}, expected {expected}")
+            return None
+    
+    return percentile(removal, 50)
+
+def mixed_writes(app, client, owner_id, headers, rounds=300, seed=7):
+    """Random membership writes through every path; returns failures"""
+    rng = random.Random(seed)
+    service = GroupService()
+    
+    with app.app_context():
+        user_ids = seed_users(60, prefix='mixed_')
+        group_ids = [service.create_group(f'Mixed {i}', created_by=owner_id).id for i in range(5)]
+    
+    errors = []
+    for _ in range(rounds):
+        group_id = rng.choice(group_ids)
+        picked = rng.sample(user_ids, rng.randint(1, 8))
+        action = rng.choice(['add', 'batch_add', 'remove', 'batch_remove', 'leave', 'promote'])
+        
+        response = None
+        if action == 'add':
+            response = client.post(f'/groups/{group_id}/members',
+                                   json={'user_id': picked[0], 'is_admin': rng.random() < 0.3}, headers=headers)
+        elif action == 'batch_add':
+            response = client.post(f'/groups/{group_id}/members:batch',
+                                   json={'members': [{'user_id': user_id, 'is_admin': rng.random() < 0.3}
+                                                     for user_id in picked]},
+                                   headers=headers)
+        elif action == 'remove':
+            response = client.delete(f'/groups/{group_id}/members/{picked[0]}', headers=headers)
+        elif action == 'batch_remove':
+            response = client.delete(f'/groups/{group_id}/members:batch', json={'user_ids': picked}, headers=headers)
+        elif action == 'leave':
+            response = client.post(f'/groups/{group_id}/leave', headers=auth_headers_for(app, picked[0]))
+        else:
+            with app.app_context():
+                try:
+                    service.update_member(group_id, owner_id, picked[0], rng.random() < 0.5)
+                except ValueError:
+                    pass
+        
+        if response is not None and response.status_code >= 500:
+            errors.append(f"{action} in group {group_id} failed: {response.status_code} {response.get_json()}")
+    
+    with app.app_context():
+        # Deleting a user takes them out of their groups
+        member = GroupMember.query.filter(GroupMember.group_id.in_(group_ids), GroupMember.user_id != owner_id).first()
+        delete_user(member.user_id)
+        failures = errors[:5] + deleted_last_members(owner_id)
+        failures += [f"group {group_id} counters ({members}, {admins}) drifted from group_members"
+                     for group_id, members, admins in drifted()]
+        
+        # Break the counters and let the repair command put them back
+        db.session.execute(update(Group).where(Group.id.in_(group_ids)).values(member_count=0, admin_count=7))
+        db.session.commit()
+        repaired = repaired_count()
+        print(f"repair-counts after breaking {len(group_ids)} groups' counters: {repaired} repaired")
+        if repaired != len(group_ids) or drifted():
+            failures.append(f"repair-counts repaired {repaired} of {len(group_ids)} broken groups")
+        
+        solo_id = service.create_group('Solo admin', created_by=owner_id).id
+    
+    response = client.delete(f'/groups/{solo_id}/members/{owner_id}', headers=headers)
+    if response.status_code != 400:
+        failures.append(f"removing the last admin returned {response.status_code}, expected 400")
+    
+    return failures
+
+def delete_user(user_id):
+    deletions = DeletionService()
+    job = deletions.schedule('user', user_id, user_id)
+    db.session.commit()
+    for _ in deletions.run(job.id):
+        pass
+
+def deleted_last_members(owner_id):
+    """Delete a group's last admin, and another group's last member; returns failures"""
+    service = GroupService()
+    admin_id, member_id, last_id = seed_users(3, prefix='orphans_')
+    
+    # The owner hands the group to an admin and leaves; then the admin is deleted
+    group_id = service.create_group('Orphaned admins', created_by=owner_id).id
+    service.add_member(group_id, owner_id, admin_id, is_admin=True)
+    service.add_member(group_id, owner_id, member_id)
+    service.leave_group(group_id, owner_id)
+    delete_user(admin_id)
+    
+    failures = []
+    members = [(member.user_id, member.is_admin) for member in GroupMember.query.filter_by(group_id=group_id)]
+    group = db.session.get(Group, group_id)
+    if members != [(member_id, True)] or (group.member_count, group.admin_count) != (1, 1):
+        failures.append(f"deleting the last admin left members {members}, "
+                        f"counters ({group.member_count}, {group.admin_count})")
+    
+    # The owner leaves a member alone in the group; then that member is deleted
+    group_id = service.create_group('Orphaned members', created_by=owner_id).id
+    service.add_member(group_id, owner_id, last_id, is_admin=True)
+    service.leave_group(group_id, owner_id)
+    delete_user(last_id)
+    
+    if db.session.get(Group, group_id):
+        failures.append("deleting the last member left an empty group behind")
+    return failures
+
+def main(sizes=(1000, 100000)):
+    app = create_bench_app()
+    client = app.test_client()
+    
+    with app.app_context():
+        owner, _ = seed_user()
+        owner_id = owner.id
+        headers = auth_headers(owner_id)
+    
+    # The first request caches the token's auth epoch check; time steady-state requests
+    client.get('/groups', headers=headers)
+    
+    medians = [measure(app, client, owner_id, headers, size) for size in sizes]
+    if None in medians:
+        return False
+    
+    failures = mixed_writes(app, client, owner_id, headers)
+    if medians[-1] > medians[0] * GROWTH_SLACK:
+        failures.append(f"removing a member took {medians[-1]:.2f}ms at {sizes[-1]} members "
+                        f"vs {medians[0]:.2f}ms at {sizes[0]}")
+    
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return not failures
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or (1000, 100000)
+    sys.exit(0 if main(sizes) else 1)
@@ -0,0 +1,171 @@
+"""
+Benchmark of GET /groups/<id>/leaderboard for a group of 10k members.
+
+Seeds a ledger for every member, then times the leaderboard's grouped
+rollup query (a cache miss) and cached reads, next to the naive scan of
+every member's savings_updates. Checks the rankings and totals of each
+metric and period against that scan, and that a member's deposit and a
+membership change both show up on the next read. Fails on any mismatch or
+if a cached or uncached read goes over its budget.
+
+    python -m app.benchmarks.group_leaderboard [members] [updates per member]
+"""
+from app import db
+from app.benchmarks import auth_headers, create_bench_app, percentile, report, seed_user, seed_users, time_calls
+from app.benchmarks.group_counters import auth_headers_for, fill_group
+from app.models.group import GroupMember
+from app.models.savings import SavingsUpdate
+from app.models.wallet import Wallet
+from app.services.group_service import GroupService
+from app.services.rollup_service import RollupService
+from app.utils.cache import MemoryCache
+from sqlalchemy import func, insert, select
+from datetime import datetime, timedelta
+import random
+import sys
+
+# p50 of a leaderboard read, in milliseconds
+MISS_BUDGET_MS = 1000
+HIT_BUDGET_MS = 50
+REPEAT = 20
+
+def seed_ledgers(member_ids, updates, days=730, seed=11):
+    """One wallet per member and `updates` deposits/goal contributions each; returns {member: wallet}"""
+    rng = random.Random(seed)
+    db.session.execute(insert(Wallet), [
+        {'user_id': member_id, 'amount': 0, 'name': 'Bench wallet', 'version_id': 1, 'is_deleted': False}
+        for member_id in member_ids
+    ])
+    wallets = dict(db.session.execute(
+        select(Wallet.user_id, Wallet.id).where(Wallet.user_id.in_(member_ids))
+    ).all())
+    
+    now = datetime.utcnow()
+    batch = []
+    for member_id in member_ids:
+        for i in range(updates):
+            batch.append({
+                'user_id': member_id,
+                'wallet_id': wallets[member_id],
+                'amount': rng.randint(1, 50000) / 100,
+                'type': 'deposit' if i % 3 else 'goal_contribution',
+                'created_at': now - timedelta(seconds=rng.randint(0, days * 86400))
+            })
+        if len(batch) >= 10000:
+            db.session.bulk_insert_mappings(SavingsUpdate, batch)
+            batch = []
+    if batch:
+        db.session.bulk_insert_mappings(SavingsUpdate, batch)
+    db.session.commit()
+    
+    for _ in RollupService().backfill():
+        pass
+    return wallets
+
+def ledger_scan(group_id, savings_type, since):
+    """The naive leaderboard: every member's savings_updates, summed per member"""
+    query = db.session.query(SavingsUpdate.user_id, func.sum(SavingsUpdate.amount), func.count(SavingsUpdate.id))\
+        .join(GroupMember, GroupMember.user_id == SavingsUpdate.user_id)\
+        .filter(GroupMember.group_id == group_id, SavingsUpdate.type == savings_type)
+    if since:
+        query = query.filter(SavingsUpdate.created_at >= datetime.strptime(since, '%Y-%m'))
+    rows = query.group_by(SavingsUpdate.user_id)
+    return {user_id: (round(float(amount), 2), count) for user_id, amount, count in rows}
+
+def check(leaderboard, expected, limit):
+    """Mismatches between a leaderboard and the ledger scan's totals per member"""
+    ranked = sorted(expected.items(), key=lambda item: (-item[1][0], item[0]))[:limit]
+    leaders = [(leader['user_id'], (round(leader['amount'], 2), leader['count'])) for leader in leaderboard['leaders']]
+    totals = leaderboard['totals']
+    
+    problems = []
+    if leaders != ranked:
+        problems.append(f"leaders {leaders[:3]}... differ from the ledger's {ranked[:3]}...")
+    if totals['contributors'] != len(expected) or totals['count'] != sum(count for _, count in expected.values()):
+        problems.append(f"totals {totals} differ from the ledger's {len(expected)} contributors")
+    if round(totals['amount'], 2) != round(sum(amount for amount, _ in expected.values()), 2):
+        problems.append(f"total amount {totals['amount']} differs from the ledger's")
+    return problems
+
+def main(members=10000, updates=20):
+    app = create_bench_app()
+    app.extensions['summary_cache'] = MemoryCache(max_entries=1000, ttl=300)
+    client = app.test_client()
+    failures = []
+    
+    with app.app_context():
+        owner, _ = seed_user()
+        owner_id = owner.id
+        headers = auth_headers(owner_id)
+        member_ids = seed_users(members, prefix='leader_')
+        group_id = GroupService().create_group('Leaderboard', created_by=owner_id).id
+        fill_group(group_id, member_ids)
+        for _ in GroupService().repair_counts():
+            pass
+        wallets = seed_ledgers(member_ids, updates)
+    
+    # The first request caches the token's auth epoch check; time steady-state requests
+    client.get('/groups', headers=headers)
+    url = f'/groups/{group_id}/leaderboard'
+    
+    for metric, savings_type in GroupService.LEADERBOARD_METRICS.items():
+        for period in GroupService.LEADERBOARD_PERIODS:
+            response = client.get(url, query_string={'metric': metric, 'period': period, 'limit': 100}, headers=headers)
+            leaderboard = response.get_json()
+            if response.status_code != 200:
+                failures.append(f"{metric}/{period}: {response.status_code} {leaderboard}")
+                continue
+            with app.app_context():
+                expected = ledger_scan(group_id, savings_type, leaderboard['since'])
+            failures += [f"{metric}/{period}: {problem}" for problem in check(leaderboard, expected, 100)]
+    
+    with app.app_context():
+        naive = time_calls(lambda: ledger_scan(group_id, 'deposit', None), REPEAT)
+    
+    # A write by any member invalidates the cached leaderboard, so every read after one is a miss
+    writer = member_ids[0]
+    writer_headers = auth_headers_for(app, writer)
+    
+    def miss():
+        client.post(f'/wallets/{wallets[writer]}/deposit', json={'amount': 1}, headers=writer_headers)
+        assert client.get(url, headers=headers).status_code == 200
+    
+    def hit():
+        assert client.get(url, headers=headers).status_code == 200
+    
+    misses = time_calls(miss, REPEAT)
+    hits = time_calls(hit, REPEAT * 5)
+    print(f"group of {members:,} members, {members * updates:,} ledger rows:")
+    report("  ledger scan, all time (naive)", naive)
+    report("  deposit + leaderboard (miss)", misses)
+    report("  leaderboard (cached)", hits)
+    
+    miss_p50 = percentile(misses, 50)
+    hit_p50 = percentile(hits, 50)
+    if miss_p50 > MISS_BUDGET_MS:
+        failures.append(f"uncached leaderboard p50 {miss_p50:.1f}ms (budget {MISS_BUDGET_MS}ms)")
+    if hit_p50 > HIT_BUDGET_MS:
+        failures.append(f"cached leaderboard p50 {hit_p50:.1f}ms (budget {HIT_BUDGET_MS}ms)")
+    
+    # A big deposit tops the board on the next read; leaving the group takes the member off it
+    challenger = member_ids[-1]
+    client.post(f'/wallets/{wallets[challenger]}/deposit', json={'amount': 1000000},
+                headers=auth_headers_for(app, challenger))
+    leaders = client.get(url, headers=headers).get_json()['leaders']
+    if leaders[0]['user_id'] != challenger:
+        failures.append(f"a member's deposit did not show up: leader is {leaders[0]}")
+    
+    client.post(f'/groups/{group_id}/leave', headers=auth_headers_for(app, challenger))
+    leaderboard = client.get(url, headers=headers).get_json()
+    if leaderboard['leaders'][0]['user_id'] == challenger or leaderboard['totals']['members'] != members:
+        failures.append(f"a member leaving did not show up: leader is {leaderboard['leaders'][0]}")
+    
+    if client.get(url, headers=auth_headers_for(app, challenger)).status_code != 404:
+        failures.append("a former member can still read the leaderboard")
+    
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:])))
@@ -0,0 +1,55 @@
+"""
+Query counts of the group listing and detail routes as groups grow.
+
+Fails unless GET /groups and GET /groups/<id> issue the same number of
+queries for every group size.
+
+    python -m app.benchmarks.group_queries
+"""
+from app import db
+from app.benchmarks import create_bench_app, count_queries, seed_user, seed_users, auth_headers
+from app.models.group import GroupMember
+from app.services.group_service import GroupService
+import sys
+
+def main(sizes=(10, 100, 1000), groups_per_user=5):
+    app = create_bench_app()
+    
+    with app.app_context():
+        owner, _ = seed_user()
+        owner_id = owner.id
+        client = app.test_client()
+        headers = auth_headers(owner_id)
+        service = GroupService()
+        counts = {}
+        
+        # The first request caches the token's auth epoch check; count steady-state requests
+        client.get('/groups', headers=headers)
+        
+        for size in sizes:
+            member_ids = seed_users(size - 1, prefix=f'size{size}_')
+            for n in range(groups_per_user):
+                group_id = service.create_group(f'Circle {size}/{n}', created_by=owner_id).id
+                db.session.bulk_insert_mappings(GroupMember, [
+                    {'group_id': group_id, 'user_id': member_id, 'is_admin': False}
+                    for member_id in member_ids
+                ])
+                db.session.commit()
+            
+            db.session.expunge_all()
+            with count_queries() as listing:
+                assert client.get('/groups', headers=headers).status_code == 200
+            with count_queries() as detail:
+                response = client.get(f'/groups/{group_id}', headers=headers)
+                assert len(response.get_json()['members']) == size
+            
+            counts[size] = (listing.count, detail.count)
+            print(f"group size {size:>5}: GET /groups={listing.count} queries, "
+                  f"GET /groups/<id>={detail.count} queries")
+        
+        constant = len(set(counts.values())) == 1
+        print("query count is constant" if constant else "query count grows with group size")
+        return constant
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,53 @@
+"""
+Latency of deep wallet-history pages: keyset cursors vs OFFSET pagination.
+
+Walks a wallet's history page by page and times the first and the last page
+with both strategies.
+
+    python -m app.benchmarks.history_pagination [rows] [pages]
+"""
+from app import db
+from app.benchmarks import create_bench_app, percentile, seed_user
+from app.benchmarks.savings_summary import seed_history
+from app.models.savings import SavingsUpdate
+from app.services.wallet_service import WalletService
+from app.utils.db import paginate_query
+import sys
+import time
+
+def main(rows=1000000, pages=1000, per_page=20):
+    app = create_bench_app()
+    
+    with app.app_context():
+        user, wallet = seed_user()
+        seed_history(user.id, wallet.id, rows)
+        service = WalletService()
+        # Bulk-seeded rows bypass the write path, so snapshot them as a backfill would
+        service.snapshots.rebuild(wallet.id)
+        db.session.commit()
+        
+        keyset_samples = []
+        cursor = None
+        for _ in range(pages):
+            started = time.perf_counter()
+            page = service.get_wallet_history(wallet.id, user.id, cursor=cursor, limit=per_page)
+            keyset_samples.append((time.perf_counter() - started) * 1000)
+            cursor = page['pagination']['next_cursor']
+            db.session.expunge_all()
+        
+        offset_query = SavingsUpdate.query.filter_by(wallet_id=wallet.id)\
+            .order_by(SavingsUpdate.created_at.desc(), SavingsUpdate.id.desc())
+        offset_samples = []
+        for page_number in (1, pages):
+            started = time.perf_counter()
+            paginate_query(offset_query, page=page_number, per_page=per_page)
+            offset_samples.append((time.perf_counter() - started) * 1000)
+            db.session.expunge_all()
+        
+        print(f"wallet history, {rows} rows, {per_page} per page")
+        print(f"keyset  page 1: {keyset_samples[0]:8.2f}ms  page {pages}: {keyset_samples[-1]:8.2f}ms  "
+              f"p99 over all pages: {percentile(keyset_samples, 99):8.2f}ms")
+        print(f"offset  page 1: {offset_samples[0]:8.2f}ms  page {pages}: {offset_samples[-1]:8.2f}ms")
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,129 @@
+"""
+Benchmark of Idempotency-Key retries of POST /wallets/<id>/deposit.
+
+Sends a deposit and then retries it with the same key, timing the original
+against the replays, and checks the crash windows around the stored
+response:
+
+- the process dies after the deposit commits but before its response is
+  stored: once the claim looks abandoned, a retry must get a 409, not a
+  second deposit
+- a retry takes the key over while the original is still running: the
+  original's deposit must not commit
+
+Fails if any of these writes the deposit twice.
+
+    python -m app.benchmarks.idempotency [retries]
+"""
+from app import db
+from app.benchmarks import auth_headers, create_bench_app, report, seed_user, time_calls
+from app.models.idempotency import IdempotencyKey
+from app.models.savings import SavingsUpdate
+from app.routes.wallet import wallet_service
+from app.utils import idempotency
+from sqlalchemy import update
+from datetime import datetime, timedelta
+import sys
+
+class ProcessDied(Exception):
+    """Stands in for the process dying between the deposit's commit and storing its response"""
+    pass
+
+def ledger_rows(app, wallet_id):
+    with app.app_context():
+        return SavingsUpdate.query.filter_by(wallet_id=wallet_id).count()
+
+def key_status(app, key):
+    with app.app_context():
+        return db.session.query(IdempotencyKey.status).filter_by(key=key).scalar()
+
+def age_claim(app, key):
+    """Make the key's claim look abandoned (older than IDEMPOTENCY_LOCK_TIMEOUT)"""
+    with app.app_context():
+        db.session.execute(
+            update(IdempotencyKey).where(IdempotencyKey.key == key)
+            .values(locked_at=datetime.utcnow() - app.config['IDEMPOTENCY_LOCK_TIMEOUT'] - timedelta(seconds=1))
+        )
+        db.session.commit()
+
+def main(retries=50):
+    app = create_bench_app()
+    app.config['IDEMPOTENCY_WAIT_SECONDS'] = 0.2
+    client = app.test_client()
+    failures = []
+    
+    with app.app_context():
+        user, wallet = seed_user()
+        wallet_id = wallet.id
+        headers = auth_headers(user.id)
+    
+    url = f'/wallets/{wallet_id}/deposit'
+    
+    def deposit(key, amount=10):
+        return client.post(url, json={'amount': amount}, headers={**headers, 'Idempotency-Key': key})
+    
+    # The first request caches the token's auth epoch check; time steady-state requests
+    client.get('/wallets', headers=headers)
+    
+    # Retries replay the stored response
+    keys = iter(range(retries))
+    originals = time_calls(lambda: deposit(f'original-{next(keys)}'), retries)
+    replays = time_calls(lambda: deposit('original-0'), retries)
+    report("deposit (new key)", originals)
+    report("deposit (replayed)", replays)
+    if ledger_rows(app, wallet_id) != retries:
+        failures.append(f"{retries} keys and {retries} replays wrote {ledger_rows(app, wallet_id)} deposits")
+    
+    # The process dies after the deposit commits, before its response is stored
+    before = ledger_rows(app, wallet_id)
+    complete = idempotency.idempotency_service.complete
+    
+    def die(*args, **kwargs):
+        raise ProcessDied()
+    
+    idempotency.idempotency_service.complete = die
+    try:
+        deposit('crash-after-commit')
+    except ProcessDied:
+        pass
+    finally:
+        idempotency.idempotency_service.complete = complete
+    
+    status = key_status(app, 'crash-after-commit')
+    age_claim(app, 'crash-after-commit')
+    response = deposit('crash-after-commit')
+    written = ledger_rows(app, wallet_id) - before
+    print(f"crash after commit: key {status}, retry after the lock timeout got {response.status_code}, "
+          f"{written} deposit(s) written")
+    if status != 'committed' or response.status_code != 409 or written != 1:
+        failures.append(f"a retry after a crash between commit and response: key {status}, "
+                        f"{response.status_code}, {written} deposits")
+    
+    # A retry takes the key over while the original is still running
+    before = ledger_rows(app, wallet_id)
+    original_deposit = wallet_service.deposit
+    
+    def taken_over(*args, **kwargs):
+        with db.engine.begin() as connection:
+            connection.execute(
+                update(IdempotencyKey).where(IdempotencyKey.key == 'taken-over').values(locked_at=datetime.utcnow())
+            )
+        return original_deposit(*args, **kwargs)
+    
+    wallet_service.deposit = taken_over
+    try:
+        response = deposit('taken-over')
+    finally:
+        del wallet_service.deposit
+    
+    written = ledger_rows(app, wallet_id) - before
+    print(f"key taken over mid-request: original got {response.status_code}, {written} deposit(s) written")
+    if written != 0:
+        failures.append(f"a request whose key was taken over still committed {written} deposits")
+    
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:])))
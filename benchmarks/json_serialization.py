@@ -0,0 +1,82 @@
+"""
+Benchmark: serializing 10k SavingsUpdate rows into a JSON response.
+
+Compares the old path (to_dict() per row through Flask's stdlib provider)
+with the per-model serializer on the stdlib fallback and on orjson, and
+checks that every path produces the same document. Also checks that
+GoalSerializer matches Goal.to_dict for the same `now`.
+
+    python -m app.benchmarks.json_serialization [rows] [repeat]
+"""
+from app import db
+from app.benchmarks import create_bench_app, report, seed_user, time_calls
+from app.benchmarks.savings_summary import seed_history
+from app.models.goal import Goal
+from app.models.savings import SavingsUpdate
+from app.utils.encoder import OrjsonProvider, StdlibProvider, orjson
+from app.utils.serializers import GoalSerializer, SavingsUpdateSerializer
+from datetime import datetime, timedelta
+from flask.json.provider import DefaultJSONProvider
+import json
+import sys
+
+def check_goals(app, user_id, failures):
+    goals = [
+        Goal(user_id=user_id, target_amount=1000 + i, time_period=timedelta(days=i % 60), name=f'Goal {i}')
+        for i in range(500)
+    ]
+    db.session.add_all(goals)
+    db.session.commit()
+    
+    now = datetime.utcnow() + timedelta(days=30)
+    expected = [goal.to_dict(now=now) for goal in goals]
+    encode = lambda rows: json.loads(app.json.dumps(rows))
+    if encode(GoalSerializer(now=now).dump_many(goals)) != encode(expected):
+        failures.append("GoalSerializer output differs from Goal.to_dict")
+
+def main(rows=10000, repeat=30):
+    app = create_bench_app()
+    failures = []
+    
+    with app.app_context():
+        user, wallet = seed_user()
+        seed_history(user.id, wallet.id, rows)
+        updates = SavingsUpdate.query.filter_by(user_id=user.id).all()
+        
+        flask_default, stdlib = DefaultJSONProvider(app), StdlibProvider(app)
+        cases = [
+            ('to_dict + flask stdlib', lambda: flask_default.response([update.to_dict() for update in updates])),
+            ('serializer + stdlib fallback', lambda: stdlib.response(SavingsUpdateSerializer().dump_many(updates))),
+        ]
+        if orjson is not None:
+            fast = OrjsonProvider(app)
+            cases += [
+                ('to_dict + orjson', lambda: fast.response([update.to_dict() for update in updates])),
+                ('serializer + orjson', lambda: fast.response(SavingsUpdateSerializer().dump_many(updates))),
+            ]
+        else:
+            print("orjson is not installed; timing the stdlib fallback only")
+        
+        print(f"{len(updates)} savings_updates per response, {repeat} responses each")
+        expected = json.loads(cases[0][1]().get_data())
+        timings = {}
+        for label, respond in cases:
+            if json.loads(respond().get_data()) != expected:
+                failures.append(f"{label}: output differs from to_dict + jsonify")
+            timings[label] = time_calls(respond, repeat)
+            report(label, timings[label])
+        
+        baseline = sorted(timings['to_dict + flask stdlib'])[repeat // 2]
+        best = sorted(timings[cases[-1][0]])[repeat // 2]
+        print(f"speedup (p50): {baseline / best:.1f}x")
+        if orjson is not None and best >= baseline:
+            failures.append("serializer + orjson is not faster than to_dict + jsonify")
+        
+        check_goals(app, user.id, failures)
+    
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:])))
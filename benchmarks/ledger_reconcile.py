@@ -0,0 +1,123 @@
+"""
+Benchmark of LedgerService reconciliation.
+
+Seeds wallets and goals whose balances match a generated ledger, corrupts
+a known sample of them, then checks that reconcile finds exactly those,
+reports rows/s with one process and with a pool, and that rebuild brings
+every balance back in line.
+
+    python -m app.benchmarks.ledger_reconcile [wallets] [rows_per_wallet] [workers]
+"""
+from app import db
+from app.benchmarks import create_bench_app, seed_user
+from app.models.goal import Goal
+from app.models.savings import SavingsUpdate
+from app.models.wallet import Wallet
+from app.services.ledger_service import LedgerService
+from datetime import timedelta
+from decimal import Decimal
+import random
+import sys
+import time
+
+def seed_ledger(user_id, wallets, rows_per_wallet):
+    """Create wallets, one goal per wallet and a consistent ledger for them."""
+    rng = random.Random(0)
+    db.session.bulk_insert_mappings(Wallet, [
+        {'user_id': user_id, 'amount': 0, 'name': f'Wallet {i}'} for i in range(wallets)
+    ])
+    db.session.bulk_insert_mappings(Goal, [
+        {'user_id': user_id, 'target_amount': 1000, 'current_amount': 0, 'time_period': timedelta(days=30)}
+        for _ in range(wallets)
+    ])
+    wallet_ids = [row[0] for row in db.session.query(Wallet.id).filter_by(user_id=user_id).order_by(Wallet.id)]
+    goal_ids = [row[0] for row in db.session.query(Goal.id).filter_by(user_id=user_id).order_by(Goal.id)]
+    
+    balances = {}
+    progress = {}
+    batch = []
+    for wallet_id, goal_id in zip(wallet_ids, goal_ids):
+        balance = contributed = Decimal('0')
+        for i in range(rows_per_wallet):
+            amount = Decimal(rng.randint(1, 5000)) / 100
+            # Deposit twice as often as spending, so balances stay positive
+            savings_type = 'deposit' if i % 3 != 2 or balance < amount else rng.choice(['withdrawal', 'goal_contribution'])
+            balance += amount if savings_type == 'deposit' else -amount
+            if savings_type == 'goal_contribution':
+                contributed += amount
+            batch.append({
+                'user_id': user_id,
+                'wallet_id': wallet_id,
+                'goal_id': goal_id if savings_type == 'goal_contribution' else None,
+                'amount': amount,
+                'type': savings_type
+            })
+            if len(batch) == 10000:
+                db.session.bulk_insert_mappings(SavingsUpdate, batch)
+                batch = []
+        balances[wallet_id] = balance
+        progress[goal_id] = contributed
+    
+    if batch:
+        db.session.bulk_insert_mappings(SavingsUpdate, batch)
+    db.session.bulk_update_mappings(Wallet, [{'id': k, 'amount': v, 'version_id': 1} for k, v in balances.items()])
+    db.session.bulk_update_mappings(Goal, [{'id': k, 'current_amount': v, 'version_id': 1} for k, v in progress.items()])
+    db.session.commit()
+    
+    return wallet_ids, goal_ids
+
+def corrupt(model, column, ids, count):
+    """Add a cent to `count` random balances; returns their ids."""
+    picked = sorted(random.Random(1).sample(ids, count))
+    db.session.query(model).filter(model.id.in_(picked))\
+        .update({column: column + Decimal('0.01')}, synchronize_session=False)
+    db.session.commit()
+    return picked
+
+def run(service, kind, workers, rebuild=False):
+    started = time.perf_counter()
+    checked = 0
+    drifted = []
+    rebuilt = 0
+    for result, _ in service.reconcile(kind, chunk_size=2000, workers=workers, rebuild=rebuild):
+        checked += result['checked']
+        drifted += [row[0] for row in result['drifted']]
+        rebuilt += result['rebuilt']
+    return checked, sorted(drifted), rebuilt, time.perf_counter() - started
+
+def main(wallets=5000, rows_per_wallet=20, workers=4):
+    app = create_bench_app()
+    ok = True
+    
+    with app.app_context():
+        user, empty_wallet = seed_user()
+        wallet_ids, goal_ids = seed_ledger(user.id, wallets, rows_per_wallet)
+        corrupted = {
+            'wallet': corrupt(Wallet, Wallet.amount, wallet_ids, 25),
+            'goal': corrupt(Goal, Goal.current_amount, goal_ids, 25)
+        }
+        ledger_rows = db.session.query(db.func.count(SavingsUpdate.id)).scalar()
+        service = LedgerService()
+        
+        print(f"{len(wallet_ids)} wallets, {len(goal_ids)} goals, {ledger_rows} ledger rows, 25 corrupted of each")
+        for kind in ('wallet', 'goal'):
+            for pool_size in (1, workers):
+                checked, drifted, _, elapsed = run(service, kind, pool_size)
+                found = drifted == corrupted[kind]
+                ok = ok and found
+                print(
+                    f"{kind:<6} workers={pool_size}: {checked} checked, {len(drifted)} drifted "
+                    f"in {elapsed:6.2f}s ({ledger_rows / elapsed:10,.0f} ledger rows/s)"
+                    f"{'' if found else '  MISMATCH: wrong drift reported'}"
+                )
+            
+            _, _, rebuilt, _ = run(service, kind, workers, rebuild=True)
+            _, remaining, _, _ = run(service, kind, 1)
+            ok = ok and rebuilt == len(corrupted[kind]) and not remaining
+            print(f"{kind:<6} rebuild: {rebuilt} rebuilt, {len(remaining)} still drifted")
+    
+    print("reconcile found every corrupted balance and rebuild fixed them" if ok else "FAILED")
+    return ok
+
+if __name__ == '__main__':
+    sys.exit(0 if main(*[int(arg) for arg in sys.argv[1:4]]) else 1)
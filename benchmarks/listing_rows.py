@@ -0,0 +1,94 @@
+"""
+Benchmark: listings through read-only rows vs full ORM instances.
+
+Loads and serializes a 100k-row wallet history both ways, reporting
+latency and peak memory (tracemalloc), then walks it page by page through
+keyset_paginate both ways. Fails if the row path is slower, uses more
+memory, or serializes to anything other than the ORM path's output.
+
+    python -m app.benchmarks.listing_rows [rows] [repeat]
+"""
+from app import db
+from app.benchmarks import create_bench_app, report, seed_user, time_calls
+from app.benchmarks.savings_summary import seed_history
+from app.models.rows import SavingsUpdateRow
+from app.models.savings import SavingsUpdate
+from app.utils.db import keyset_paginate
+from app.utils.serializers import SavingsUpdateSerializer
+import sys
+import tracemalloc
+
+ORDER = [SavingsUpdate.created_at, SavingsUpdate.id]
+
+def orm_history(wallet_id):
+    return SavingsUpdate.query.filter_by(wallet_id=wallet_id)\
+        .order_by(*[column.desc() for column in ORDER]).all()
+
+def row_history(wallet_id):
+    return SavingsUpdateRow.fetch(
+        SavingsUpdateRow.select().where(SavingsUpdate.wallet_id == wallet_id)
+        .order_by(*[column.desc() for column in ORDER])
+    )
+
+def serialize(load, wallet_id):
+    """One listing response body: load, then serialize (the identity map is emptied first)"""
+    db.session.expunge_all()
+    return SavingsUpdateSerializer().dump_many(load(wallet_id))
+
+def peak_memory(fn):
+    """Peak traced allocation in MiB while fn runs"""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+def walk(wallet_id, per_page, pages, row=None):
+    query = SavingsUpdateRow.select() if row else SavingsUpdate.query
+    query = query.filter(SavingsUpdate.wallet_id == wallet_id)
+    cursor = None
+    
+    for _ in range(pages):
+        db.session.expunge_all()
+        page = keyset_paginate(query, ORDER, cursor=cursor, limit=per_page, row=row)
+        cursor = page['pagination']['next_cursor']
+        if not cursor:
+            break
+
+def main(rows=100000, repeat=5, per_page=100, pages=200):
+    app = create_bench_app()
+    failures = []
+    
+    with app.app_context():
+        user, wallet = seed_user()
+        seed_history(user.id, wallet.id, rows)
+        
+        print(f"wallet history of {rows} rows, {repeat} loads each")
+        if serialize(orm_history, wallet.id) != serialize(row_history, wallet.id):
+            failures.append("row path serializes differently from the ORM path")
+        
+        results = {}
+        for label, load in [('ORM instances', orm_history), ('read-only rows', row_history)]:
+            samples = time_calls(lambda: serialize(load, wallet.id), repeat)
+            memory = peak_memory(lambda: serialize(load, wallet.id))
+            report(f"full history, {label} ({memory:.0f} MiB)", samples)
+            results[label] = (sorted(samples)[len(samples) // 2], memory)
+        
+        (orm_time, orm_memory), (row_time, row_memory) = results['ORM instances'], results['read-only rows']
+        print(f"rows vs ORM: {orm_time / row_time:.1f}x faster, {orm_memory / row_memory:.1f}x less peak memory")
+        if row_time >= orm_time:
+            failures.append("read-only rows are not faster than ORM instances")
+        if row_memory >= orm_memory:
+            failures.append("read-only rows do not use less memory than ORM instances")
+        
+        orm_walk = time_calls(lambda: walk(wallet.id, per_page, pages), 1)[0]
+        row_walk = time_calls(lambda: walk(wallet.id, per_page, pages, row=SavingsUpdateRow), 1)[0]
+        print(f"{pages} pages of {per_page}: ORM {orm_walk / pages:.2f}ms/page, rows {row_walk / pages:.2f}ms/page")
+    
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:])))
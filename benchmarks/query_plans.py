@@ -0,0 +1,102 @@
+"""
+Query-plan check for the SavingsService and WalletService read paths.
+
+Runs every read method against seeded data, captures the SELECTs they send,
+EXPLAINs each one and fails if any of them falls back to a full table scan.
+
+    python -m app.benchmarks.query_plans
+"""
+from app import db
+from app.benchmarks import create_bench_app, seed_user
+from app.benchmarks.savings_summary import seed_history
+from app.services.rollup_service import RollupService
+from app.services.savings_service import SavingsService
+from app.services.wallet_service import WalletService
+from sqlalchemy import event, text
+import sys
+
+def capture_selects(fn):
+    """Run fn and return the (statement, parameters) of every SELECT it issued."""
+    captured = []
+    
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            captured.append((statement, parameters))
+    
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    
+    return captured
+
+def explain(statement, parameters):
+    """Return (plan lines, full scan found) for one statement."""
+    connection = db.session.connection()
+    
+    if connection.dialect.name == 'sqlite':
+        rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+        lines = [row[-1] for row in rows]
+        full_scan = any(
+            line.startswith('SCAN ') and 'USING' not in line and 'SUBQUERY' not in line
+            for line in lines
+        )
+    else:
+        rows = connection.exec_driver_sql('EXPLAIN ' + statement, parameters).fetchall()
+        lines = [row[0] for row in rows]
+        full_scan = any('Seq Scan' in line for line in lines)
+    
+    return lines, full_scan
+
+def main():
+    app = create_bench_app()
+    
+    with app.app_context():
+        users = [seed_user(email=f'plans{i}@example.com') for i in range(5)]
+        for user, wallet in users:
+            seed_history(user.id, wallet.id, 5000)
+        for _ in RollupService().backfill():
+            pass
+        if db.session.get_bind().dialect.name == 'postgresql':
+            db.session.execute(text('ANALYZE'))
+        
+        user, wallet = users[0]
+        savings = SavingsService()
+        wallets = WalletService()
+        first_page = wallets.get_wallet_history(wallet.id, user.id)
+        cursor = first_page['pagination']['next_cursor']
+        some_update = first_page['items'][0]
+        
+        reads = {
+            'SavingsService.get_user_savings_updates': lambda: savings.get_user_savings_updates(user.id),
+            'SavingsService.get_user_savings_updates(wallet)': lambda: savings.get_user_savings_updates(user.id, wallet_id=wallet.id),
+            'SavingsService.get_user_savings_updates(goal)': lambda: savings.get_user_savings_updates(user.id, goal_id=1),
+            'SavingsService.get_user_savings_updates(type)': lambda: savings.get_user_savings_updates(user.id, savings_type='deposit'),
+            'SavingsService.get_savings_update': lambda: savings.get_savings_update(some_update.id, user.id),
+            'SavingsService.get_user_savings_summary': lambda: savings.get_user_savings_summary(user.id),
+            'SavingsService.get_savings_statistics': lambda: savings.get_savings_statistics(user.id),
+            'SavingsService.get_savings_statistics(week)': lambda: savings.get_savings_statistics(user.id, 'week'),
+            'SavingsService.iter_export': lambda: list(savings.iter_export(user.id)),
+            'SavingsService.iter_export(range)': lambda: list(savings.iter_export(user.id, start=some_update.created_at)),
+            'WalletService.get_user_wallets': lambda: wallets.get_user_wallets(user.id),
+            'WalletService.get_wallet': lambda: wallets.get_wallet(wallet.id, user.id),
+            'WalletService.get_wallet_history': lambda: wallets.get_wallet_history(wallet.id, user.id),
+            'WalletService.get_wallet_history(cursor)': lambda: wallets.get_wallet_history(wallet.id, user.id, cursor=cursor),
+        }
+        
+        failures = 0
+        for label, fn in reads.items():
+            db.session.expunge_all()
+            for statement, parameters in capture_selects(fn):
+                lines, full_scan = explain(statement, parameters)
+                failures += full_scan
+                print(f"[{'FULL SCAN' if full_scan else 'ok'}] {label}")
+                for line in lines:
+                    print(f"    {line}")
+        
+        print(f"{failures} statement(s) with full table scans")
+        return failures
+
+if __name__ == '__main__':
+    sys.exit(1 if main() else 0)
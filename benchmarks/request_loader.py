@@ -0,0 +1,112 @@
+"""
+Benchmark: entity lookups per request with the request-scoped loader.
+
+Sends the requests that check ownership or membership in more than one
+place (goal progress, goal-linked savings updates, group admin actions),
+reports queries and loader hits/misses per request and fails if any
+request repeats an identical wallet/goal/group/membership/user SELECT
+within one transaction (commits expire instances, so reloading them to
+serialize the response afterwards is expected).
+
+    python -m app.benchmarks.request_loader [repeat]
+"""
+from app import db
+from app.benchmarks import auth_headers, create_bench_app, seed_user, seed_users
+from app.models.goal import Goal
+from app.models.group import Group, GroupMember
+from collections import Counter
+from datetime import timedelta
+from sqlalchemy import event
+import sys
+
+ENTITY_TABLES = ('wallets', 'goals', 'groups', 'group_members', 'users')
+
+class SelectRecorder:
+    """Records (transaction, statement, parameters) of entity SELECTs"""
+    def __init__(self):
+        self.selects = []
+        self.count = 0
+        self.transaction = 0
+    
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        head = statement.lstrip().upper()
+        if head.startswith('SELECT') and any(f'FROM {table}'.upper() in head for table in ENTITY_TABLES):
+            self.selects.append((self.transaction, statement, repr(parameters)))
+    
+    def commit(self, conn):
+        self.transaction += 1
+
+def seed(user_id, members):
+    goal = Goal(user_id=user_id, target_amount=10 ** 6, time_period=timedelta(days=30), name='Bench goal')
+    group = Group(name='Bench group', description=None, created_by=user_id)
+    db.session.add_all([goal, group])
+    db.session.flush()
+    db.session.add(GroupMember(group_id=group.id, user_id=user_id, is_admin=True))
+    db.session.add_all([GroupMember(group_id=group.id, user_id=member_id) for member_id in members])
+    db.session.commit()
+    return goal.id, group.id
+
+def main(repeat=20):
+    app = create_bench_app()
+    client = app.test_client()
+    failures = []
+    
+    with app.app_context():
+        user, wallet = seed_user()
+        wallet.amount = 10 ** 6
+        db.session.commit()
+        members = seed_users(2)
+        outsider = seed_users(1, prefix='outsider')[0]
+        goal_id, group_id = seed(user.id, members)
+        headers = auth_headers(user.id)
+        wallet_id = wallet.id
+        engine = db.engine
+    
+    requests = [
+        ('goal progress', 'post', f'/goals/{goal_id}/progress', {'amount': 1, 'wallet_id': wallet_id}),
+        ('goal-linked savings update', 'post', '/savings', {'wallet_id': wallet_id, 'amount': 1, 'type': 'transfer', 'goal_id': goal_id}),
+        ('group detail', 'get', f'/groups/{group_id}', None),
+        ('group rename', 'put', f'/groups/{group_id}', {'name': 'Renamed'}),
+        ('add member', 'post', f'/groups/{group_id}/members', {'user_id': outsider}),
+        ('remove member', 'delete', f'/groups/{group_id}/members/{outsider}', None),
+    ]
+    
+    # Adding then removing the outsider leaves the data as it was, so the
+    # whole sequence can be repeated
+    totals = {label: Counter() for label, *_ in requests}
+    for _ in range(repeat):
+        for label, method, url, body in requests:
+            recorder = SelectRecorder()
+            event.listen(engine, 'before_cursor_execute', recorder)
+            event.listen(engine, 'commit', recorder.commit)
+            try:
+                response = getattr(client, method)(url, json=body, headers=headers)
+            finally:
+                event.remove(engine, 'before_cursor_execute', recorder)
+                event.remove(engine, 'commit', recorder.commit)
+            
+            if response.status_code >= 400:
+                failures.append(f"{label}: HTTP {response.status_code} {response.get_json()}")
+                break
+            
+            stats = dict(part.split('=') for part in response.headers.get('X-Entity-Cache', 'hits=0; misses=0').split('; '))
+            totals[label].update(queries=recorder.count, hits=int(stats['hits']), misses=int(stats['misses']))
+            
+            repeated = [select for select, count in Counter(recorder.selects).items() if count > 1]
+            if repeated:
+                failures.append(f"{label}: repeated entity SELECT {repeated[0][1]!r}")
+                break
+        if failures:
+            break
+    
+    for label, total in totals.items():
+        print(f"{label:<30} per request: queries={total['queries'] / repeat:5.1f}  "
+              f"loader hits={total['hits'] / repeat:4.1f} misses={total['misses'] / repeat:4.1f}")
+    
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:])))
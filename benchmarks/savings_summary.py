@@ -0,0 +1,100 @@
+"""
+Round trips and latency of SavingsService.get_user_savings_summary.
+
+Compares the previous per-month implementation (reproduced below) with the
+rollup-backed summary for a user with 100k savings_updates.
+
+    python -m app.benchmarks.savings_summary [rows] [repeat]
+"""
+from app import db
+from app.benchmarks import create_bench_app, count_queries, time_calls, report, seed_user
+from app.models.savings import SavingsUpdate
+from app.models.wallet import Wallet
+from app.services.rollup_service import RollupService
+from app.services.savings_service import SavingsService
+from datetime import datetime, timedelta
+from sqlalchemy import func
+import random
+import sys
+
+def seed_history(user_id, wallet_id, rows, days=730):
+    """Insert `rows` savings updates spread over the last `days` days."""
+    types = ['deposit', 'deposit', 'withdrawal', 'goal_contribution']
+    now = datetime.utcnow()
+    batch = []
+    
+    for i in range(rows):
+        batch.append({
+            'user_id': user_id,
+            'wallet_id': wallet_id,
+            'amount': random.randint(1, 50000) / 100,
+            'type': types[i % len(types)],
+            'created_at': now - timedelta(seconds=random.randint(0, days * 86400))
+        })
+        if len(batch) == 10000:
+            db.session.bulk_insert_mappings(SavingsUpdate, batch)
+            batch = []
+    
+    if batch:
+        db.session.bulk_insert_mappings(SavingsUpdate, batch)
+    db.session.commit()
+
+def legacy_summary(user_id):
+    """The per-month implementation the grouped query replaced."""
+    def total(*criteria):
+        return db.session.query(func.sum(SavingsUpdate.amount))\
+            .filter(SavingsUpdate.user_id == user_id, *criteria).scalar() or 0
+    
+    result = {
+        'total_deposits': total(SavingsUpdate.type == 'deposit'),
+        'total_withdrawals': total(SavingsUpdate.type == 'withdrawal'),
+        'total_goal_contributions': total(SavingsUpdate.type == 'goal_contribution'),
+        'current_balance': db.session.query(func.sum(Wallet.amount))
+            .filter(Wallet.user_id == user_id).scalar() or 0,
+        'recent_transactions': SavingsUpdate.query.filter(SavingsUpdate.user_id == user_id)
+            .order_by(SavingsUpdate.created_at.desc()).limit(5).all(),
+        'monthly_data': []
+    }
+    
+    today = datetime.now()
+    current_date = today - timedelta(days=180)
+    while current_date <= today:
+        month_start = datetime(current_date.year, current_date.month, 1)
+        if current_date.month == 12:
+            month_end = datetime(current_date.year + 1, 1, 1)
+        else:
+            month_end = datetime(current_date.year, current_date.month + 1, 1)
+        
+        in_month = (SavingsUpdate.created_at >= month_start, SavingsUpdate.created_at < month_end)
+        result['monthly_data'].append({
+            'month': month_start.strftime('%Y-%m'),
+            'deposits': total(SavingsUpdate.type == 'deposit', *in_month),
+            'withdrawals': total(SavingsUpdate.type == 'withdrawal', *in_month)
+        })
+        current_date = month_end
+    
+    return result
+
+def main(rows=100000, repeat=50):
+    app = create_bench_app()
+    
+    with app.app_context():
+        user, wallet = seed_user()
+        seed_history(user.id, wallet.id, rows)
+        for _ in RollupService().backfill():
+            pass
+        service = SavingsService()
+        
+        print(f"savings summary, {rows} savings_updates, {repeat} calls each")
+        for label, fn in [
+            ('before: per-month SUM queries', lambda: legacy_summary(user.id)),
+            ('after: savings_rollups', lambda: service.get_user_savings_summary(user.id))
+        ]:
+            with count_queries() as counter:
+                fn()
+            samples = time_calls(fn, repeat)
+            print(f"{label:<40} round trips={counter.count}")
+            report(label, samples)
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,137 @@
+"""
+Benchmark: 50 concurrent identical requests with single-flight coalescing.
+
+Fires the savings summary, statistics and a goal forecast from N threads
+at once (the response cache is off, so every request would otherwise
+compute) and compares computations and wall time with running them all
+uncoalesced. Also checks that an error reaches every waiting caller and
+that a follower's wait times out without disturbing the leader.
+
+    python -m app.benchmarks.single_flight [threads] [rows]
+"""
+from app import db
+from app.benchmarks import create_bench_app, run_threads, seed_user
+from app.benchmarks.savings_summary import seed_history
+from app.models.goal import Goal
+from app.services.goal_service import GoalService
+from app.services.rollup_service import RollupService
+from app.services.savings_service import SavingsService
+from app.utils.singleflight import SingleFlight, SingleFlightTimeout
+from datetime import timedelta
+import sys
+import threading
+import time
+
+def counting(fn):
+    """Wrap fn to count how often it actually runs"""
+    def wrapper(*args, **kwargs):
+        with wrapper.lock:
+            wrapper.calls += 1
+        return fn(*args, **kwargs)
+    wrapper.calls = 0
+    wrapper.lock = threading.Lock()
+    return wrapper
+
+def concurrent(app, threads, fn):
+    """Call fn from `threads` threads released together"""
+    barrier = threading.Barrier(threads)
+    
+    def worker(index):
+        barrier.wait()
+        return fn()
+    
+    return run_threads(app, worker, threads)
+
+def check_errors_and_timeouts(failures):
+    flight = SingleFlight()
+    release = threading.Event()
+    errors = []
+    
+    def failing():
+        release.wait()
+        raise ValueError("leader failed")
+    
+    def call():
+        try:
+            flight.do('key', failing, timeout=5)
+        except ValueError as e:
+            errors.append(e)
+    
+    callers = [threading.Thread(target=call) for _ in range(10)]
+    for caller in callers:
+        caller.start()
+    time.sleep(0.1)
+    release.set()
+    for caller in callers:
+        caller.join()
+    if len(errors) != 10:
+        failures.append(f"error reached {len(errors)} of 10 callers")
+    
+    leader_result = []
+    leader = threading.Thread(target=lambda: leader_result.append(flight.do('slow', lambda: time.sleep(0.3) or 'done')))
+    leader.start()
+    time.sleep(0.05)
+    try:
+        flight.do('slow', lambda: 'follower ran', timeout=0.05)
+        failures.append("follower did not time out")
+    except SingleFlightTimeout:
+        pass
+    leader.join()
+    if leader_result != ['done']:
+        failures.append(f"leader result after a follower timeout: {leader_result}")
+
+def main(threads=50, rows=50000):
+    app = create_bench_app()
+    failures = []
+    
+    with app.app_context():
+        user, wallet = seed_user()
+        seed_history(user.id, wallet.id, rows)
+        for _ in RollupService().backfill():
+            pass
+        goal = Goal(user_id=user.id, target_amount=10 ** 6, time_period=timedelta(days=90), name='Bench goal')
+        db.session.add(goal)
+        db.session.commit()
+        user_id, goal_id = user.id, goal.id
+    
+    savings, goals = SavingsService(), GoalService()
+    savings._build_savings_summary = counting(savings._build_savings_summary)
+    savings._build_savings_statistics = counting(savings._build_savings_statistics)
+    
+    cases = [
+        ('savings summary', savings._build_savings_summary, lambda: savings._build_savings_summary(user_id),
+         lambda: savings.get_user_savings_summary(user_id)),
+        ('statistics (month)', savings._build_savings_statistics, lambda: savings._build_savings_statistics(user_id, 'month'),
+         lambda: savings.get_savings_statistics(user_id, 'month')),
+    ]
+    
+    print(f"{threads} concurrent identical requests, {rows} savings_updates")
+    for label, counter, direct, coalesced in cases:
+        counter.calls = 0
+        results, uncoalesced_elapsed = concurrent(app, threads, direct)
+        uncoalesced_calls = counter.calls
+        
+        counter.calls = 0
+        results, elapsed = concurrent(app, threads, coalesced)
+        print(f"{label:<20} uncoalesced: {uncoalesced_calls:3d} computations {uncoalesced_elapsed * 1000:8.1f}ms   "
+              f"single-flight: {counter.calls:3d} computations {elapsed * 1000:8.1f}ms")
+        
+        if counter.calls >= threads:
+            failures.append(f"{label}: no requests were coalesced")
+        if any(result != results[0] for result in results):
+            failures.append(f"{label}: callers got different results")
+    
+    forecast = lambda: goals.calculate_daily_savings_needed(goal_id, user_id)
+    results, elapsed = concurrent(app, threads, forecast)
+    print(f"{'goal forecast':<20} single-flight: {elapsed * 1000:8.1f}ms")
+    if any(result != results[0] for result in results):
+        failures.append("goal forecast: callers got different results")
+    
+    check_errors_and_timeouts(failures)
+    
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:])))
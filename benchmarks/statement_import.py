@@ -0,0 +1,141 @@
+"""
+Benchmark: POST /wallets/<id>/import of a 500k-line bank statement.
+
+Writes a 50k-line and a 500k-line statement to temporary files and posts
+each as a streamed text/csv body, sampling the process's RSS meanwhile.
+Then re-imports the large one (every line must be skipped as a duplicate)
+and checks the wallet balance, the ledger and the monthly rollups. Fails
+on wrong counts or balances, or if memory grows with the statement size.
+
+    python -m app.benchmarks.statement_import [lines]
+"""
+from app import db
+from app.benchmarks import auth_headers, create_bench_app, rss_mib, seed_user
+from app.models.rollup import SavingsRollup
+from app.models.savings import SavingsUpdate
+from app.models.wallet import Wallet
+from app.services.ledger_service import LedgerService
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import func
+import gc
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+# Allowed RSS growth beyond what the small statement needed
+RSS_SLACK_MIB = 32
+
+def write_statement(path, lines, seed):
+    """A statement of `lines` lines over ~3 years, oldest first; returns its net amount"""
+    rng = random.Random(seed)
+    descriptions = ['Groceries', 'Coffee', 'Rent', 'Fuel', 'Transfer from savings', 'Restaurant']
+    day = datetime.utcnow() - timedelta(days=3 * 365)
+    step = timedelta(days=3 * 365) / lines
+    net = Decimal('0')
+    
+    with open(path, 'w') as statement:
+        statement.write('date,amount,description\n')
+        for index in range(lines):
+            if index % 500 == 0:
+                # Salary keeps the balance positive throughout
+                amount = Decimal('20000.00')
+            else:
+                amount = -Decimal(rng.randint(100, 5000)) / 100
+            net += amount
+            statement.write(f"{(day + step * index).date().isoformat()},{amount},{rng.choice(descriptions)}\n")
+    
+    return net
+
+def post_statement(client, url, headers, path):
+    """Stream a statement file as the request body; returns (response, seconds, peak RSS growth)"""
+    gc.collect()
+    baseline = rss_mib()
+    peak = [baseline]
+    done = threading.Event()
+    
+    def sample():
+        while not done.wait(0.01):
+            peak[0] = max(peak[0], rss_mib())
+    
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    started = time.perf_counter()
+    with open(path, 'rb') as body:
+        response = client.post(url, input_stream=body, content_length=os.path.getsize(path),
+                               content_type='text/csv', headers=headers)
+    elapsed = time.perf_counter() - started
+    done.set()
+    sampler.join()
+    
+    return response, elapsed, peak[0] - baseline
+
+def check_books(user_id, wallet_id, expected_balance, failures):
+    # SQLite does Numeric arithmetic in floats, so balances and sums are compared to the cent
+    wallet = db.session.get(Wallet, wallet_id)
+    if round(wallet.amount, 2) != expected_balance:
+        failures.append(f"wallet {wallet_id} balance {wallet.amount}, expected {expected_balance}")
+    
+    drift = LedgerService().reconcile_range('wallet', wallet_id, wallet_id + 1)
+    if drift['drifted']:
+        failures.append(f"wallet {wallet_id} drifted from its ledger: {drift['drifted']}")
+    
+    ledger = db.session.query(func.count(SavingsUpdate.id), func.sum(SavingsUpdate.amount))\
+        .filter(SavingsUpdate.wallet_id == wallet_id).one()
+    rollup = db.session.query(func.sum(SavingsRollup.count), func.sum(SavingsRollup.total))\
+        .filter(SavingsRollup.wallet_id == wallet_id).one()
+    if ledger[0] != rollup[0] or round(ledger[1] or 0, 2) != round(rollup[1] or 0, 2):
+        failures.append(f"wallet {wallet_id} rollups {tuple(rollup)} do not match the ledger {tuple(ledger)}")
+
+def main(lines=500000):
+    app = create_bench_app()
+    client = app.test_client()
+    failures = []
+    
+    with app.app_context():
+        user, _ = seed_user()
+        wallets = [Wallet(user_id=user.id, amount=0, name=f'Imported {i}') for i in range(2)]
+        db.session.add_all(wallets)
+        db.session.commit()
+        user_id, wallet_ids, headers = user.id, [wallet.id for wallet in wallets], auth_headers(user.id)
+    
+    growth = {}
+    statements = []
+    for size, wallet_id in zip([lines // 10, lines], wallet_ids):
+        path = os.path.join(tempfile.gettempdir(), f'savings_app_statement_{size}.csv')
+        net = write_statement(path, size, seed=size)
+        statements.append((size, wallet_id, path, net))
+        
+        response, elapsed, growth[size] = post_statement(client, f'/wallets/{wallet_id}/import', headers, path)
+        result = response.get_json()
+        print(f"import {size:>9,} lines: {elapsed:6.2f}s ({size / elapsed:9,.0f} rows/s, "
+              f"server reports {result.get('rows_per_second')}), peak RSS growth {growth[size]:6.1f} MiB")
+        
+        if response.status_code != 200 or result['imported'] != size:
+            failures.append(f"{size} lines: {response.status_code} {str(result)[:200]}")
+    
+    if growth[lines] > growth[lines // 10] + RSS_SLACK_MIB:
+        failures.append(f"RSS grew {growth[lines]:.1f} MiB for {lines} lines vs "
+                        f"{growth[lines // 10]:.1f} MiB for {lines // 10}; memory is not flat")
+    
+    size, wallet_id, path, net = statements[-1]
+    response, elapsed, _ = post_statement(client, f'/wallets/{wallet_id}/import', headers, path)
+    result = response.get_json()
+    print(f"re-import {size:>6,} lines: {elapsed:6.2f}s, {result.get('duplicates')} duplicates skipped")
+    if response.status_code != 200 or result['imported'] != 0 or result['duplicates'] != size:
+        failures.append(f"re-import: {response.status_code} {str(result)[:200]}")
+    
+    with app.app_context():
+        for size, wallet_id, path, net in statements:
+            check_books(user_id, wallet_id, net, failures)
+            os.remove(path)
+    
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:])))
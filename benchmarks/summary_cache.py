@@ -0,0 +1,90 @@
+"""
+Benchmark: savings summary/statistics cache with write-driven invalidation.
+
+For each backend (in-process LRU and the shared SQLite file) a dashboard
+polls the summary and statistics while deposits and withdrawals keep
+arriving. Every read is compared with a freshly computed report, so the
+run fails if a read ever returns data from before a committed write.
+Also checks that two SQLiteCache instances on one file (two workers)
+share entries. Reports hit rate and cached/uncached latency.
+
+    python -m app.benchmarks.summary_cache [rows] [reads] [write_every]
+"""
+from app import db
+from app.benchmarks import create_bench_app, report, seed_user, time_calls
+from app.benchmarks.savings_summary import seed_history
+from app.services.rollup_service import RollupService
+from app.services.savings_service import SavingsService
+from app.services.wallet_service import WalletService
+from app.utils.cache import MemoryCache, SQLiteCache
+from flask import current_app
+import os
+import random
+import sys
+import tempfile
+
+def backends():
+    path = os.path.join(tempfile.gettempdir(), 'savings_app_bench_cache.db')
+    if os.path.exists(path):
+        os.remove(path)
+    return [MemoryCache(max_entries=1000, ttl=300), SQLiteCache(path, max_entries=1000, ttl=300)]
+
+def poll(savings, wallets, user_id, wallet_id, reads, write_every, failures):
+    """Dashboard reads interleaved with writes; every read is checked against a fresh report"""
+    rng = random.Random(7)
+    
+    for index in range(reads):
+        if index % write_every == 0:
+            if rng.random() < 0.7:
+                wallets.deposit(wallet_id, user_id, rng.randint(1, 500))
+            else:
+                wallets.withdraw(wallet_id, user_id, rng.randint(1, 50))
+        
+        period = rng.choice([None, 'week', 'month'])
+        checks = [
+            (savings.get_user_savings_summary(user_id), savings._build_savings_summary(user_id)),
+            (savings.get_savings_statistics(user_id, period), savings._build_savings_statistics(user_id, period))
+        ]
+        for cached, fresh in checks:
+            if cached != fresh:
+                failures.append(f"read {index} returned a stale report")
+                return
+
+def main(rows=20000, reads=500, write_every=10):
+    app = create_bench_app()
+    failures = []
+    
+    with app.app_context():
+        user, wallet = seed_user()
+        wallet.amount = 10 ** 6
+        db.session.commit()
+        seed_history(user.id, wallet.id, rows)
+        for _ in RollupService().backfill():
+            pass
+        
+        savings, wallets = SavingsService(), WalletService()
+        summary = lambda: savings.get_user_savings_summary(user.id)
+        
+        report('uncached summary', time_calls(lambda: savings._build_savings_summary(user.id), 50))
+        
+        for backend in backends():
+            current_app.extensions['summary_cache'] = backend
+            poll(savings, wallets, user.id, wallet.id, reads, write_every, failures)
+            stats = savings.cache.stats()
+            print(f"{backend.name}: {reads} polls, a write every {write_every}: "
+                  f"hit rate {stats['hit_rate']:.1%} ({stats['hits']} hits, {stats['misses']} misses)")
+            summary()
+            report(f'cached summary ({backend.name})', time_calls(summary, 200))
+        
+        # A second worker process opening the same file sees the first one's entries
+        first, second = SQLiteCache(backend.path), SQLiteCache(backend.path)
+        first.set('shared-check', {'value': 1})
+        if second.get('shared-check') != {'value': 1}:
+            failures.append("SQLite cache entries are not shared between instances")
+    
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:])))
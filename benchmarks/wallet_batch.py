@@ -0,0 +1,79 @@
+"""
+Benchmark of POST /wallets/<id>/transactions:batch against the same
+transactions sent one at a time to the deposit/withdraw routes.
+
+Every third transaction is a withdrawal. Fails if the two approaches end
+on different balances or ledger row counts.
+
+    python -m app.benchmarks.wallet_batch [batch_size ...]
+"""
+from app import db
+from app.benchmarks import auth_headers, create_bench_app, seed_user
+from app.models.savings import SavingsUpdate
+from app.models.wallet import Wallet
+from sqlalchemy import func
+import sys
+import time
+
+def make_transactions(count):
+    return [
+        {'type': 'withdrawal' if i % 3 == 2 else 'deposit', 'amount': 5 if i % 3 == 2 else 10}
+        for i in range(count)
+    ]
+
+def wallet_state(wallet_id):
+    db.session.expire_all()
+    balance = db.session.get(Wallet, wallet_id).amount
+    rows = db.session.query(func.count(SavingsUpdate.id)).filter_by(wallet_id=wallet_id).scalar()
+    return balance, rows
+
+def run(app, size):
+    with app.app_context():
+        user, single_wallet = seed_user(email=f'single{size}@example.com')
+        batch_wallet = Wallet(user_id=user.id, amount=0, name='Batch wallet')
+        db.session.add(batch_wallet)
+        db.session.commit()
+        single_id, batch_id = single_wallet.id, batch_wallet.id
+        headers = auth_headers(user.id)
+    
+    client = app.test_client()
+    transactions = make_transactions(size)
+    
+    started = time.perf_counter()
+    for item in transactions:
+        route = 'deposit' if item['type'] == 'deposit' else 'withdraw'
+        response = client.post(f'/wallets/{single_id}/{route}', json={'amount': item['amount']}, headers=headers)
+        assert response.status_code == 200, response.get_json()
+    single_elapsed = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    response = client.post(
+        f'/wallets/{batch_id}/transactions:batch',
+        json={'transactions': transactions},
+        headers=headers
+    )
+    batch_elapsed = time.perf_counter() - started
+    assert response.status_code == 200, response.get_json()
+    
+    with app.app_context():
+        single_state = wallet_state(single_id)
+        batch_state = wallet_state(batch_id)
+    
+    print(
+        f"batch of {size:>5}: single-item {single_elapsed * 1000:9.1f}ms ({size / single_elapsed:8,.0f} tx/s)  "
+        f"batch {batch_elapsed * 1000:8.1f}ms ({size / batch_elapsed:9,.0f} tx/s)  "
+        f"speedup {single_elapsed / batch_elapsed:6.1f}x"
+    )
+    
+    if single_state != batch_state:
+        print(f"MISMATCH: single-item {single_state} vs batch {batch_state}")
+        return False
+    return True
+
+def main(sizes=(10, 100, 1000)):
+    app = create_bench_app()
+    return all([run(app, size) for size in sizes])
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or (10, 100, 1000)
+    sys.exit(0 if main(sizes) else 1)
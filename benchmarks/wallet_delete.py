@@ -0,0 +1,136 @@
+"""
+Benchmark: deleting a wallet with a 1M-row ledger.
+
+First compares, on a smaller ledger, the old ORM cascade (every child row
+loaded into the session, then deleted one by one) with the database
+cascade the models now use (one DELETE of the wallet row). Then deletes a
+wallet with a 1M-row ledger through DELETE /wallets/<id>, which hands it
+to a background deletion job, and polls the job's progress until it is
+done. Fails if the database cascade is not faster and leaner, if the
+request does not return promptly, if the wallet or its ledger can still
+be read while it is being deleted, if the job leaves rows behind or
+touches another wallet's, or if memory grows with the ledger.
+
+    python -m app.benchmarks.wallet_delete [rows]
+"""
+from app import db
+from app.benchmarks import auth_headers, create_bench_app, rss_mib, seed_user
+from app.benchmarks.savings_summary import seed_history
+from app.models.savings import SavingsUpdate
+from app.models.wallet import Wallet
+import sys
+import time
+import tracemalloc
+
+# DELETE /wallets/<id> only counts the ledger and schedules the job
+REQUEST_BUDGET_MS = 2000
+# Allowed RSS growth while the background job runs
+RSS_SLACK_MIB = 64
+JOB_TIMEOUT_SECONDS = 1800
+
+def legacy_delete(wallet_id):
+    """What cascade='all, delete-orphan' without passive_deletes did: load every child, then delete"""
+    wallet = db.session.get(Wallet, wallet_id)
+    for child in wallet.savings_updates + wallet.rollups + wallet.balance_snapshots:
+        db.session.delete(child)
+    db.session.delete(wallet)
+    db.session.commit()
+
+def cascade_delete(wallet_id):
+    db.session.delete(db.session.get(Wallet, wallet_id))
+    db.session.commit()
+
+def measure(fn, wallet_id):
+    """(milliseconds, peak traced MiB) of one delete"""
+    db.session.expunge_all()
+    tracemalloc.start()
+    try:
+        started = time.perf_counter()
+        fn(wallet_id)
+        return (time.perf_counter() - started) * 1000, tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+def main(rows=1000000):
+    app = create_bench_app()
+    client = app.test_client()
+    failures = []
+    
+    with app.app_context():
+        user, wallet = seed_user()
+        wallets = [Wallet(user_id=user.id, amount=0, name=f'Bench wallet {i}') for i in range(3)]
+        db.session.add_all(wallets)
+        db.session.commit()
+        small = rows // 20
+        seed_history(user.id, wallets[0].id, small)
+        seed_history(user.id, wallets[1].id, small)
+        seed_history(user.id, wallets[2].id, small)
+        seed_history(user.id, wallet.id, rows)
+        user_id, wallet_id, bystander_id = user.id, wallet.id, wallets[2].id
+        hidden_update_id = SavingsUpdate.query.filter_by(wallet_id=wallet_id).first().id
+        headers = auth_headers(user_id)
+        
+        results = {}
+        for label, fn, target in [('ORM cascade (legacy)', legacy_delete, wallets[0].id),
+                                  ('database cascade', cascade_delete, wallets[1].id)]:
+            results[label] = measure(fn, target)
+            print(f"delete wallet with {small:,} rows, {label:<22} {results[label][0]:9.1f}ms  "
+                  f"peak {results[label][1]:7.1f} MiB")
+        
+        (legacy_ms, legacy_mib), (cascade_ms, cascade_mib) = results.values()
+        print(f"database cascade vs ORM cascade: {legacy_ms / cascade_ms:.1f}x faster, "
+              f"{legacy_mib / max(cascade_mib, 0.01):.0f}x less peak memory")
+        if cascade_ms >= legacy_ms or cascade_mib >= legacy_mib:
+            failures.append("the database cascade is not faster and leaner than the ORM cascade")
+        if SavingsUpdate.query.filter(SavingsUpdate.wallet_id.in_([wallets[0].id, wallets[1].id])).count():
+            failures.append("a cascaded delete left ledger rows behind")
+    
+    baseline = peak = rss_mib()
+    started = time.perf_counter()
+    response = client.delete(f'/wallets/{wallet_id}', headers=headers)
+    request_ms = (time.perf_counter() - started) * 1000
+    print(f"DELETE /wallets/<id> with {rows:,} rows: {response.status_code} in {request_ms:.1f}ms")
+    
+    if response.status_code != 202:
+        failures.append(f"expected 202 for a {rows}-row wallet, got {response.status_code} {response.get_json()}")
+    else:
+        if request_ms > REQUEST_BUDGET_MS:
+            failures.append(f"DELETE took {request_ms:.0f}ms (budget {REQUEST_BUDGET_MS}ms)")
+        if any(item['id'] == wallet_id for item in client.get('/wallets', headers=headers).get_json()):
+            failures.append("the wallet is still listed while it is being deleted")
+        if client.get('/savings', query_string={'wallet_id': wallet_id}, headers=headers).get_json()['items'] or \
+                client.get(f'/savings/{hidden_update_id}', headers=headers).status_code != 404:
+            failures.append("the wallet's ledger is still readable while it is being deleted")
+        
+        location = response.headers['Location']
+        job = response.get_json()['job']
+        reported = -1
+        while job['status'] not in ('completed', 'failed') and time.perf_counter() - started < JOB_TIMEOUT_SECONDS:
+            time.sleep(0.05)
+            peak = max(peak, rss_mib())
+            job = client.get(location, headers=headers).get_json()
+            if job['deleted'] >= reported + rows // 10:
+                reported = job['deleted']
+                print(f"  {job['status']:<9} {job['deleted']:>9,}/{job['total']:,} ({job['progress_percentage']:5.1f}%) "
+                      f"after {time.perf_counter() - started:6.1f}s")
+        
+        elapsed = time.perf_counter() - started
+        print(f"deletion job {job['status']} in {elapsed:.1f}s ({job['deleted'] / elapsed:,.0f} rows/s), "
+              f"peak RSS growth {peak - baseline:.1f} MiB")
+        if job['status'] != 'completed' or job['deleted'] != rows:
+            failures.append(f"job ended {job['status']} with {job['deleted']}/{rows} rows deleted: {job['error']}")
+        if peak - baseline > RSS_SLACK_MIB:
+            failures.append(f"RSS grew {peak - baseline:.1f} MiB while deleting {rows} rows")
+    
+    with app.app_context():
+        if db.session.get(Wallet, wallet_id) or SavingsUpdate.query.filter_by(wallet_id=wallet_id).count():
+            failures.append("the deleted wallet or some of its ledger is still there")
+        if SavingsUpdate.query.filter_by(wallet_id=bystander_id).count() != rows // 20:
+            failures.append("deleting one wallet removed another wallet's ledger rows")
+    
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:])))
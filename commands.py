@@ -0,0 +1,202 @@
+"""
+Flask CLI commands for the savings app.
+
+Usage:
+    flask rollups backfill --chunk-size 500
+    flask idempotency sweep --batch-size 1000 [--interval 300]
+    flask ledger reconcile [--rebuild] [--workers 4] [--chunk-size 10000]
+    flask snapshots backfill
+    flask users set-admin EMAIL [--revoke]
+    flask users delete EMAIL [--chunk-size 5000]
+    flask deletions resume [--chunk-size 5000] [--interval 300]
+    flask groups repair-counts [--chunk-size 1000]
+"""
+import click
+import time
+from flask.cli import AppGroup
+
+rollups_cli = AppGroup('rollups', help='Maintain the savings_rollups table.')
+idempotency_cli = AppGroup('idempotency', help='Maintain stored Idempotency-Key responses.')
+ledger_cli = AppGroup('ledger', help='Check balances against the savings_updates ledger.')
+snapshots_cli = AppGroup('snapshots', help='Maintain the wallet_balance_snapshots table.')
+users_cli = AppGroup('users', help='Manage user roles.')
+deletions_cli = AppGroup('deletions', help='Run chunked wallet and user deletions.')
+groups_cli = AppGroup('groups', help='Maintain group membership counters.')
+
+def run_deletion(service, job_id, chunk_size):
+    """Run one deletion job in the foreground, echoing its progress"""
+    job = None
+    for job in service.run(job_id, chunk_size=chunk_size):
+        click.echo(f"{job.kind} {job.target_id}: {job.deleted}/{job.total} ledger rows deleted "
+                   f"({job.progress_percentage:.1f}%)")
+    return job
+
+@rollups_cli.command('backfill')
+@click.option('--chunk-size', default=500, show_default=True, help='Users rebuilt per transaction.')
+def backfill_rollups(chunk_size):
+    """Rebuild savings_rollups from the savings_updates ledger."""
+    from app.services.rollup_service import RollupService
+    
+    for processed, last_user_id in RollupService().backfill(chunk_size=chunk_size):
+        click.echo(f"Rebuilt rollups for {processed} users (last user id {last_user_id})")
+    
+    click.echo("Rollup backfill complete")
+
+@idempotency_cli.command('sweep')
+@click.option('--batch-size', default=1000, show_default=True, help='Keys deleted per transaction.')
+@click.option('--interval', default=0, show_default=True, help='Seconds between sweeps; 0 sweeps once and exits.')
+def sweep_idempotency_keys(batch_size, interval):
+    """Delete expired idempotency keys."""
+    from app.services.idempotency_service import IdempotencyService
+    
+    service = IdempotencyService()
+    
+    while True:
+        deleted = sum(service.sweep_expired(batch_size=batch_size))
+        click.echo(f"Deleted {deleted} expired idempotency keys")
+        
+        if not interval:
+            break
+        
+        time.sleep(interval)
+
+@ledger_cli.command('reconcile')
+@click.option('--rebuild', is_flag=True, help='Reset drifted balances to their ledger sums.')
+@click.option('--workers', default=1, show_default=True, help='Processes checking id ranges in parallel.')
+@click.option('--chunk-size', default=10000, show_default=True, help='Wallet/goal ids per range.')
+@click.option('--kind', 'kinds', type=click.Choice(['wallet', 'goal']), multiple=True,
+              help='Balances to check (default: both).')
+def reconcile_ledger(rebuild, workers, chunk_size, kinds):
+    """Compare wallet and goal balances with the ledger."""
+    from app.services.ledger_service import LedgerService
+    
+    service = LedgerService()
+    unresolved = 0
+    
+    for kind in kinds or ('wallet', 'goal'):
+        checked = drifted = rebuilt = 0
+        
+        for result, total in service.reconcile(kind, chunk_size=chunk_size, workers=workers, rebuild=rebuild):
+            checked += result['checked']
+            drifted += len(result['drifted'])
+            rebuilt += result['rebuilt']
+            
+            for owner_id, stored, ledger in result['drifted']:
+                click.echo(f"{kind} {owner_id}: stored {stored:f}, ledger {ledger:f}")
+            
+            click.echo(f"{kind}s: {checked}/{total} checked, {drifted} drifted, {rebuilt} rebuilt")
+        
+        click.echo(f"{kind}s done: {checked} checked, {drifted} drifted, {rebuilt} rebuilt")
+        unresolved += drifted - rebuilt
+    
+    if unresolved:
+        click.echo(f"{unresolved} balances disagree with the ledger")
+        raise SystemExit(1)
+    
+    click.echo("All balances match the ledger")
+
+@snapshots_cli.command('backfill')
+def backfill_snapshots():
+    """Rebuild wallet balance snapshots from the savings_updates ledger."""
+    from app.services.snapshot_service import SnapshotService
+    
+    wallets = snapshots = 0
+    for _, written in SnapshotService().backfill():
+        wallets += 1
+        snapshots += written
+        if wallets % 1000 == 0:
+            click.echo(f"Rebuilt snapshots for {wallets} wallets ({snapshots} snapshots)")
+    
+    click.echo(f"Snapshot backfill complete: {wallets} wallets, {snapshots} snapshots")
+
+@users_cli.command('set-admin')
+@click.argument('email')
+@click.option('--revoke', is_flag=True, help='Remove admin rights instead of granting them.')
+def set_admin(email, revoke):
+    """Grant or revoke admin rights; the user's existing tokens stop working."""
+    from app.services.auth_service import AuthService
+    
+    service = AuthService()
+    user = service.get_user_by_email(email)
+    if not user:
+        click.echo(f"No user with email {email}")
+        raise SystemExit(1)
+    
+    service.set_admin(user.id, not revoke)
+    click.echo(f"{email} is {'no longer' if revoke else 'now'} an admin")
+
+@users_cli.command('delete')
+@click.argument('email')
+@click.option('--chunk-size', default=5000, show_default=True, help='Ledger rows deleted per transaction.')
+def delete_user(email, chunk_size):
+    """Delete a user and all their data, in chunks."""
+    from app import db
+    from app.models.group import Group
+    from app.services.auth_service import AuthService
+    from app.services.deletion_service import DeletionService
+    
+    user = AuthService().get_user_by_email(email)
+    if not user:
+        click.echo(f"No user with email {email}")
+        raise SystemExit(1)
+    
+    # Groups outlive their creator's membership, so they are not cascaded
+    created = Group.query.filter_by(created_by=user.id).count()
+    if created:
+        click.echo(f"{email} created {created} groups; delete them first")
+        raise SystemExit(1)
+    
+    service = DeletionService()
+    job = service.schedule('user', user.id, user.id)
+    db.session.commit()
+    
+    run_deletion(service, job.id, chunk_size)
+    click.echo(f"Deleted {email}")
+
+@deletions_cli.command('resume')
+@click.option('--chunk-size', default=5000, show_default=True, help='Ledger rows deleted per transaction.')
+@click.option('--interval', default=0, show_default=True, help='Seconds between runs; 0 runs once and exits.')
+def resume_deletions(chunk_size, interval):
+    """
+    Finish deletion jobs left unfinished, e.g. by a restart.
+    
+    Jobs started by DELETE /wallets/<id> run on a thread of the web worker
+    and are not resumed when it restarts; keep this running with --interval
+    (or run it from cron) so they always finish.
+    """
+    from app.services.deletion_service import DeletionService
+    
+    service = DeletionService()
+    
+    while True:
+        job_ids = service.unfinished_jobs()
+        failed = 0
+        
+        for job_id in job_ids:
+            try:
+                run_deletion(service, job_id, chunk_size)
+            except Exception as e:
+                click.echo(f"Deletion job {job_id} failed: {e}")
+                failed += 1
+        
+        click.echo(f"Resumed {len(job_ids)} deletion jobs, {failed} failed")
+        
+        if not interval:
+            break
+        
+        time.sleep(interval)
+    
+    if failed:
+        raise SystemExit(1)
+
+@groups_cli.command('repair-counts')
+@click.option('--chunk-size', default=1000, show_default=True, help='Groups checked per transaction.')
+def repair_group_counts(chunk_size):
+    """Recompute every group's member_count and admin_count from its members."""
+    from app.services.group_service import GroupService
+    
+    checked = repaired = 0
+    for checked, repaired, last_group_id in GroupService().repair_counts(chunk_size=chunk_size):
+        click.echo(f"Checked {checked} groups, {repaired} repaired (last group id {last_group_id})")
+    
+    click.echo(f"Group counter repair complete: {checked} checked, {repaired} repaired")
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 from dotenv import load_dotenv
 
@@ -17,10 +18,35 @@ class Config:
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'default-jwt-secret-key'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+    AUTH_EPOCH_CACHE_TTL = 30  # seconds a process trusts a user's cached auth_epoch
     
     # Application
     EMAIL_VERIFICATION_ENABLED = True
     PASSWORD_MIN_LENGTH = 8
+    WALLET_BATCH_MAX_ITEMS = 1000  # transactions accepted by POST /wallets/<id>/transactions:batch
+    WALLET_IMPORT_BATCH = 2000  # statement lines per INSERT in POST /wallets/<id>/import
+    WALLET_IMPORT_MAX_ERRORS = 100  # invalid lines reported before an import stops reading
+    GROUP_BATCH_MAX_MEMBERS = 1000  # users accepted by POST/DELETE /groups/<id>/members:batch
+    GROUP_LEADERBOARD_MAX_LIMIT = 100  # members ranked by GET /groups/<id>/leaderboard
+    WALLET_DELETE_INLINE_MAX = 10000  # ledger rows DELETE /wallets/<id> removes inline; larger wallets use a job
+    DELETION_CHUNK_SIZE = 5000  # ledger rows removed per transaction by a deletion job
+    DELETION_STALE_AFTER = timedelta(minutes=10)  # unfinished jobs without progress this long are resumed
+    BALANCE_SNAPSHOT_INTERVAL = 100  # ledger entries between wallet balance snapshots (also one per day)
+    ENTITY_CACHE_STATS_HEADER = False  # report request loader hits/misses in an X-Entity-Cache header
+    
+    # Savings summary/statistics cache ('memory', 'sqlite' shared by the workers on a host, or None)
+    SUMMARY_CACHE_BACKEND = os.environ.get('SUMMARY_CACHE_BACKEND', 'memory') or None
+    SUMMARY_CACHE_TTL = 300  # seconds
+    SUMMARY_CACHE_MAX_ENTRIES = 10000
+    SUMMARY_CACHE_PATH = os.environ.get('SUMMARY_CACHE_PATH') or \
+        os.path.join(tempfile.gettempdir(), 'savings_app_cache.db')
+    SINGLE_FLIGHT_TIMEOUT = 30  # seconds a request waits on an identical in-flight computation
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'auto')  # 'orjson', 'stdlib' or 'auto' (orjson when installed)
+    
+    # Idempotency keys
+    IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+    IDEMPOTENCY_WAIT_SECONDS = 5  # how long a duplicate waits on the in-flight request
+    IDEMPOTENCY_LOCK_TIMEOUT = timedelta(minutes=2)  # in-flight claims older than this are abandoned
 
 class TestConfig(Config):
     TESTING = True
@@ -30,6 +56,7 @@ class TestConfig(Config):
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    ENTITY_CACHE_STATS_HEADER = True
     
 class ProductionConfig(Config):
     DEBUG = False
@@ -0,0 +1,79 @@
+"""cascade deletes and deletion jobs
+
+Revision ID: 880907bf0c65
+Revises: af0dcf8648c2
+Create Date: 2026-10-18 15:20:03.247998
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '880907bf0c65'
+down_revision = 'af0dcf8648c2'
+branch_labels = None
+depends_on = None
+
+# The initial schema left foreign keys unnamed; PostgreSQL named them
+# <table>_<column>_fkey, and batch mode reflects SQLite's under the same names
+NAMING_CONVENTION = {'fk': '%(table_name)s_%(column_0_name)s_fkey'}
+
+# (table, column, referenced table, ON DELETE action)
+FOREIGN_KEYS = [
+    ('wallets', 'user_id', 'users', 'CASCADE'),
+    ('goals', 'user_id', 'users', 'CASCADE'),
+    ('group_members', 'group_id', 'groups', 'CASCADE'),
+    ('group_members', 'user_id', 'users', 'CASCADE'),
+    ('savings_updates', 'user_id', 'users', 'CASCADE'),
+    ('savings_updates', 'wallet_id', 'wallets', 'CASCADE'),
+    ('savings_updates', 'goal_id', 'goals', 'SET NULL'),
+    ('savings_rollups', 'user_id', 'users', 'CASCADE'),
+    ('savings_rollups', 'wallet_id', 'wallets', 'CASCADE'),
+    ('wallet_balance_snapshots', 'wallet_id', 'wallets', 'CASCADE'),
+    ('idempotency_keys', 'user_id', 'users', 'CASCADE'),
+]
+
+
+def _replace_foreign_keys(cascade):
+    for table, column, referent, ondelete in FOREIGN_KEYS:
+        name = f'{table}_{column}_fkey'
+        with op.batch_alter_table(table, schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+            batch_op.drop_constraint(name, type_='foreignkey')
+            batch_op.create_foreign_key(name, referent, [column], ['id'], ondelete=ondelete if cascade else None)
+
+
+def upgrade():
+    op.create_table('deletion_jobs',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('target_id', sa.BigInteger(), nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('deleted', sa.Integer(), nullable=False),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('deletion_jobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_deletion_jobs_user_id'), ['user_id'], unique=False)
+
+    with op.batch_alter_table('wallets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_deleted', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+    _replace_foreign_keys(cascade=True)
+
+
+def downgrade():
+    _replace_foreign_keys(cascade=False)
+
+    with op.batch_alter_table('wallets', schema=None) as batch_op:
+        batch_op.drop_column('is_deleted')
+
+    with op.batch_alter_table('deletion_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_deletion_jobs_user_id'))
+
+    op.drop_table('deletion_jobs')
@@ -2,4 +2,8 @@ from app.models.user import User
 from app.models.wallet import Wallet
 from app.models.goal import Goal
 from app.models.group import Group, GroupMember
-from app.models.savings import SavingsUpdate
\ No newline at end of file
+from app.models.savings import SavingsUpdate
+from app.models.rollup import SavingsRollup
+from app.models.idempotency import IdempotencyKey
+from app.models.snapshot import WalletBalanceSnapshot
+from app.models.deletion import DeletionJob
\ No newline at end of file
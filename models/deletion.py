@@ -0,0 +1,53 @@
+from app import db
+from app.utils.db import BigIntegerPK
+from datetime import datetime
+
+class DeletionJob(db.Model):
+    """Progress of a large wallet or user deletion, done in chunks in the background"""
+    __tablename__ = 'deletion_jobs'
+    
+    id = db.Column(BigIntegerPK, primary_key=True)
+    kind = db.Column(db.String, nullable=False)  # wallet, user
+    target_id = db.Column(db.BigInteger, nullable=False)  # no foreign key: the job outlives its target
+    user_id = db.Column(db.BigInteger, nullable=False, index=True)  # who asked, to authorize progress reads
+    status = db.Column(db.String, nullable=False, default='pending')  # pending, running, completed, failed
+    total = db.Column(db.Integer, nullable=False, default=0)  # ledger rows to delete, counted when scheduled
+    deleted = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.String, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def __init__(self, kind, target_id, user_id, total=0):
+        self.kind = kind
+        self.target_id = target_id
+        self.user_id = user_id
+        self.status = 'pending'
+        self.total = total
+        self.deleted = 0
+    
+    @property
+    def progress_percentage(self):
+        if self.status == 'completed':
+            return 100.0
+        if not self.total:
+            return 0.0
+        return min(100.0, round(self.deleted / self.total * 100, 2))
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'target_id': self.target_id,
+            'status': self.status,
+            'total': self.total,
+            'deleted': self.deleted,
+            'progress_percentage': self.progress_percentage,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        return f'<DeletionJob {self.id} {self.kind} {self.target_id} {self.status}>'
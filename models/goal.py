@@ -1,12 +1,13 @@
 from app import db
+from app.utils.db import BigIntegerPK
 from datetime import datetime
 from decimal import Decimal
 
 class Goal(db.Model):
     __tablename__ = 'goals'
     
-    id = db.Column(db.BigInteger, primary_key=True)
-    user_id = db.Column(db.BigInteger, db.ForeignKey('users.id'), nullable=False)
+    id = db.Column(BigIntegerPK, primary_key=True)
+    user_id = db.Column(db.BigInteger, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     target_amount = db.Column(db.Numeric, nullable=False)
     current_amount = db.Column(db.Numeric, nullable=False, default=0)
     time_period = db.Column(db.Interval, nullable=False)  # Using PostgreSQL's interval type
@@ -17,9 +18,14 @@ class Goal(db.Model):
     achieved = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version_id = db.Column(db.Integer, nullable=False, default=1)  # bumped on every write
+    
+    # Flushes check and bump version_id, so a stale write raises
+    # StaleDataError instead of silently overwriting a concurrent one
+    __mapper_args__ = {'version_id_col': version_id}
     
     # Relationships
-    savings_updates = db.relationship('SavingsUpdate', backref='goal', lazy=True)
+    savings_updates = db.relationship('SavingsUpdate', backref='goal', lazy=True, passive_deletes=True)
     
     def __init__(self, user_id, target_amount, time_period, description=None, name=None):
         self.user_id = user_id
@@ -54,20 +60,28 @@ class Goal(db.Model):
     @property
     def is_expired(self):
         """Check if the goal has expired"""
-        if not self.end_date:
-            return False
-        return datetime.utcnow() > self.end_date
+        return self.is_expired_at(datetime.utcnow())
     
     @property
     def days_remaining(self):
         """Calculate days remaining until goal expiration"""
+        return self.days_remaining_at(datetime.utcnow())
+    
+    def is_expired_at(self, now):
+        if not self.end_date:
+            return False
+        return now > self.end_date
+    
+    def days_remaining_at(self, now):
         if not self.end_date:
             return None
         
-        remaining = self.end_date - datetime.utcnow()
+        remaining = self.end_date - now
         return max(0, remaining.days)
     
-    def to_dict(self):
+    def to_dict(self, now=None):
+        # Serializing many goals? Pass one `now` so they agree on expiry
+        now = now or datetime.utcnow()
         return {
             'id': self.id,
             'user_id': self.user_id,
@@ -77,13 +91,14 @@ class Goal(db.Model):
             'time_period_days': self.time_period.days if self.time_period else None,
             'start_date': self.start_date.isoformat() if self.start_date else None,
             'end_date': self.end_date.isoformat() if self.end_date else None,
-            'days_remaining': self.days_remaining,
+            'days_remaining': self.days_remaining_at(now),
             'description': self.description,
             'name': self.name,
             'achieved': self.achieved,
-            'is_expired': self.is_expired,
+            'is_expired': self.is_expired_at(now),
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'version_id': self.version_id
         }
     
     def __repr__(self):
@@ -1,24 +1,33 @@
 from app import db
+from app.utils.db import BigIntegerPK
+from sqlalchemy import inspect
+from sqlalchemy.sql import ClauseElement
 from datetime import datetime
 
 class Group(db.Model):
     __tablename__ = 'groups'
     
-    id = db.Column(db.BigInteger, primary_key=True)
+    id = db.Column(BigIntegerPK, primary_key=True)
     name = db.Column(db.String, nullable=False)
     description = db.Column(db.String, nullable=True)
     created_by = db.Column(db.BigInteger, db.ForeignKey('users.id'), nullable=False)
+    # Maintained by every membership write (GroupService); `flask groups repair-counts` recomputes them
+    member_count = db.Column(db.Integer, nullable=False, default=0)
+    admin_count = db.Column(db.Integer, nullable=False, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # Relationships
-    members = db.relationship('GroupMember', backref='group', lazy=True, cascade='all, delete-orphan')
+    # Relationships; the database cascades deletes (ON DELETE CASCADE)
+    members = db.relationship('GroupMember', backref='group', lazy=True,
+                              cascade='all, delete-orphan', passive_deletes=True)
     creator = db.relationship('User', foreign_keys=[created_by], backref='created_groups')
     
     def __init__(self, name, description, created_by):
         self.name = name
         self.description = description
         self.created_by = created_by
+        self.member_count = 0
+        self.admin_count = 0
     
     def add_member(self, user_id, is_admin=False):
         """Add a member to the group"""
@@ -28,6 +37,7 @@ class Group(db.Model):
             is_admin=is_admin
         )
         db.session.add(member)
+        self._count(1, 1 if is_admin else 0)
         return member
     
     def remove_member(self, user_id):
@@ -35,6 +45,7 @@ class Group(db.Model):
         member = GroupMember.query.filter_by(group_id=self.id, user_id=user_id).first()
         if member:
             db.session.delete(member)
+            self._count(-1, -1 if member.is_admin else 0)
             return True
         return False
     
@@ -55,21 +66,42 @@ class Group(db.Model):
             'created_by': self.created_by,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'member_count': len(self.members)
+            'member_count': self.member_count
         }
     
+    def _count(self, members, admins):
+        # Added to the stored values in SQL at flush, not to a possibly stale
+        # copy; calls before that flush build on the pending expression, so
+        # none of them is lost. A group not inserted yet just counts.
+        persisted = inspect(self).persistent
+        for column, delta in ((Group.member_count, members), (Group.admin_count, admins)):
+            current = self.__dict__.get(column.key)
+            if isinstance(current, ClauseElement):
+                setattr(self, column.key, current + delta)
+            elif persisted:
+                setattr(self, column.key, column + delta)
+            else:
+                setattr(self, column.key, (current or 0) + delta)
+    
     def __repr__(self):
         return f'<Group {self.name}>'
 
 class GroupMember(db.Model):
     __tablename__ = 'group_members'
     
-    id = db.Column(db.BigInteger, primary_key=True)
-    group_id = db.Column(db.BigInteger, db.ForeignKey('groups.id'), nullable=False)
-    user_id = db.Column(db.BigInteger, db.ForeignKey('users.id'), nullable=False)
+    id = db.Column(BigIntegerPK, primary_key=True)
+    group_id = db.Column(db.BigInteger, db.ForeignKey('groups.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.BigInteger, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
     joined_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ux_group_members_group_user', 'group_id', 'user_id', unique=True),
+        db.Index('ix_group_members_group_admin', 'group_id', 'is_admin'),
+        # A user's groups (listings, listing_version)
+        db.Index('ix_group_members_user_group', 'user_id', 'group_id'),
+    )
+    
     def __init__(self, group_id, user_id, is_admin=False):
         self.group_id = group_id
         self.user_id = user_id
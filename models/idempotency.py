@@ -0,0 +1,38 @@
+from app import db
+from app.utils.db import BigIntegerPK
+from datetime import datetime
+
+class IdempotencyKey(db.Model):
+    """Stored outcome of a money-moving request, keyed by the client's Idempotency-Key"""
+    __tablename__ = 'idempotency_keys'
+    
+    id = db.Column(BigIntegerPK, primary_key=True)
+    user_id = db.Column(db.BigInteger, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.String, nullable=False, default='in_flight')  # in_flight, committed, completed
+    response_code = db.Column(db.Integer, nullable=True)
+    response_body = db.Column(db.Text, nullable=True)
+    response_mimetype = db.Column(db.String, nullable=True)
+    locked_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'key', name='uq_idempotency_keys_user_key'),
+    )
+    
+    def __init__(self, user_id, key, request_hash, expires_at):
+        self.user_id = user_id
+        self.key = key
+        self.request_hash = request_hash
+        self.status = 'in_flight'
+        self.locked_at = datetime.utcnow()
+        self.expires_at = expires_at
+    
+    @property
+    def is_expired(self):
+        return datetime.utcnow() >= self.expires_at
+    
+    def __repr__(self):
+        return f'<IdempotencyKey {self.user_id}:{self.key} {self.status}>'
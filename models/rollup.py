@@ -0,0 +1,36 @@
+from app import db
+from datetime import datetime
+
+class SavingsRollup(db.Model):
+    """Monthly per-wallet aggregate of savings_updates, maintained on every write"""
+    __tablename__ = 'savings_rollups'
+    
+    user_id = db.Column(db.BigInteger, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    wallet_id = db.Column(db.BigInteger, db.ForeignKey('wallets.id', ondelete='CASCADE'), primary_key=True)
+    month = db.Column(db.String(7), primary_key=True)  # YYYY-MM
+    type = db.Column(db.String, primary_key=True)
+    total = db.Column(db.Numeric, nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    min_amount = db.Column(db.Numeric, nullable=True)
+    max_amount = db.Column(db.Numeric, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        # One member's months of one type (statistics, group leaderboards)
+        db.Index('ix_savings_rollups_user_type_month', 'user_id', 'type', 'month'),
+    )
+    
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'wallet_id': self.wallet_id,
+            'month': self.month,
+            'type': self.type,
+            'total': float(self.total),
+            'count': self.count,
+            'min_amount': float(self.min_amount) if self.min_amount is not None else None,
+            'max_amount': float(self.max_amount) if self.max_amount is not None else None
+        }
+    
+    def __repr__(self):
+        return f'<SavingsRollup {self.wallet_id} {self.month} {self.type} {self.total}>'
@@ -0,0 +1,67 @@
+"""
+Read-only row objects for the savings app's listings.
+
+Listing endpoints only read a few columns and serialize them straight
+away, so they select those columns with a Core statement and wrap each
+result row in one of these __slots__ classes instead of loading ORM
+instances (no identity map, instance state or relationship proxies).
+They are plain values: changing one writes nothing back.
+
+Usage:
+    rows = SavingsUpdateRow.fetch(SavingsUpdateRow.select().where(...))
+"""
+from app import db
+from app.models.goal import Goal
+from app.models.group import Group
+from app.models.savings import SavingsUpdate
+from app.models.wallet import Wallet
+from sqlalchemy import select
+
+class Row:
+    """Base row: `__slots__` name the model columns that are selected."""
+    
+    __slots__ = ()
+    model = None
+    
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+    
+    @classmethod
+    def columns(cls):
+        return [cls.model.__table__.c[name] for name in cls.__slots__]
+    
+    @classmethod
+    def select(cls):
+        """Core SELECT of this row's columns, to be filtered by the caller"""
+        return select(*cls.columns())
+    
+    @classmethod
+    def fetch(cls, statement):
+        return [cls(*row) for row in db.session.execute(statement)]
+    
+    def __repr__(self):
+        return f'<{type(self).__name__} {self.id}>'
+
+class WalletRow(Row):
+    __slots__ = ('id', 'user_id', 'amount', 'name', 'created_at', 'updated_at', 'version_id')
+    model = Wallet
+
+class SavingsUpdateRow(Row):
+    __slots__ = ('id', 'user_id', 'wallet_id', 'goal_id', 'amount', 'description', 'type', 'transfer_id',
+                 'created_at', 'updated_at')
+    model = SavingsUpdate
+
+class GoalRow(Row):
+    __slots__ = ('id', 'user_id', 'target_amount', 'current_amount', 'time_period', 'start_date', 'end_date',
+                 'description', 'name', 'achieved', 'created_at', 'updated_at', 'version_id')
+    model = Goal
+    
+    # Same rules as the model (they only read the columns above)
+    progress_percentage = Goal.progress_percentage
+    is_expired_at = Goal.is_expired_at
+    days_remaining_at = Goal.days_remaining_at
+
+class GroupRow(Row):
+    __slots__ = ('id', 'name', 'description', 'created_by', 'created_at', 'updated_at', 'member_count')
+    model = Group
@@ -1,26 +1,42 @@
 from app import db
+from app.utils.db import BigIntegerPK
 from datetime import datetime
 from decimal import Decimal
 
 class SavingsUpdate(db.Model):
     __tablename__ = 'savings_updates'
     
-    id = db.Column(db.BigInteger, primary_key=True)
-    user_id = db.Column(db.BigInteger, db.ForeignKey('users.id'), nullable=False)
-    wallet_id = db.Column(db.BigInteger, db.ForeignKey('wallets.id'), nullable=False)
-    goal_id = db.Column(db.BigInteger, db.ForeignKey('goals.id'), nullable=True)
+    id = db.Column(BigIntegerPK, primary_key=True)
+    user_id = db.Column(db.BigInteger, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    wallet_id = db.Column(db.BigInteger, db.ForeignKey('wallets.id', ondelete='CASCADE'), nullable=False)
+    goal_id = db.Column(db.BigInteger, db.ForeignKey('goals.id', ondelete='SET NULL'), nullable=True)
     amount = db.Column(db.Numeric, nullable=False)
     description = db.Column(db.String, nullable=True)
-    type = db.Column(db.String, nullable=False)  # deposit, withdrawal
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    type = db.Column(db.String, nullable=False)  # deposit, withdrawal, goal_contribution, transfer, transfer_out, transfer_in
+    transfer_id = db.Column(db.String(36), nullable=True, index=True)  # shared by the two legs of a wallet transfer
+    content_hash = db.Column(db.String(64), nullable=True)  # set on rows imported from a statement, to skip re-imports
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # event time, never updated
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    def __init__(self, user_id, wallet_id, amount, type, goal_id=None, description=None):
+    # Every ledger read filters on an owner column and walks event time;
+    # the trailing id makes (created_at, id) keyset pages pure index scans
+    __table_args__ = (
+        db.Index('ix_savings_updates_user_created', 'user_id', 'created_at', 'id'),
+        db.Index('ix_savings_updates_wallet_created', 'wallet_id', 'created_at', 'id'),
+        db.Index('ix_savings_updates_goal_created', 'goal_id', 'created_at', 'id'),
+        db.Index('ix_savings_updates_user_type_created', 'user_id', 'type', 'created_at'),
+        # NULLs never conflict, so only imported rows are deduplicated
+        db.Index('ux_savings_updates_wallet_content_hash', 'wallet_id', 'content_hash', unique=True),
+    )
+    
+    def __init__(self, user_id, wallet_id, amount, type, goal_id=None, description=None, transfer_id=None):
         self.user_id = user_id
         self.wallet_id = wallet_id
         self.goal_id = goal_id
         self.amount = Decimal(str(amount))
         self.description = description
         self.type = type
+        self.transfer_id = transfer_id
     
     def to_dict(self):
         return {
@@ -31,6 +47,8 @@ class SavingsUpdate(db.Model):
             'amount': float(self.amount),
             'description': self.description,
             'type': self.type,
+            'transfer_id': self.transfer_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
     
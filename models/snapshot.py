@@ -0,0 +1,30 @@
+from app import db
+from app.utils.db import BigIntegerPK
+from datetime import datetime
+
+class WalletBalanceSnapshot(db.Model):
+    """A wallet's balance right after one ledger entry, so balances can be rebuilt from a short tail"""
+    __tablename__ = 'wallet_balance_snapshots'
+    
+    id = db.Column(BigIntegerPK, primary_key=True)
+    wallet_id = db.Column(db.BigInteger, db.ForeignKey('wallets.id', ondelete='CASCADE'), nullable=False)
+    ledger_id = db.Column(db.BigInteger, nullable=False)  # last savings_updates row included
+    taken_at = db.Column(db.DateTime, nullable=False)  # created_at of that row
+    balance = db.Column(db.Numeric, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Snapshots are looked up by ledger position, (created_at, id), like the ledger itself
+    __table_args__ = (
+        db.Index('ix_wallet_balance_snapshots_position', 'wallet_id', 'taken_at', 'ledger_id', unique=True),
+    )
+    
+    def to_dict(self):
+        return {
+            'wallet_id': self.wallet_id,
+            'ledger_id': self.ledger_id,
+            'taken_at': self.taken_at.isoformat() if self.taken_at else None,
+            'balance': float(self.balance)
+        }
+    
+    def __repr__(self):
+        return f'<WalletBalanceSnapshot {self.wallet_id}@{self.ledger_id} {self.balance}>'
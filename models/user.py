@@ -1,24 +1,30 @@
 from app import db, bcrypt
+from app.utils.db import BigIntegerPK
 import uuid
 from datetime import datetime
 
 class User(db.Model):
     __tablename__ = 'users'
     
-    id = db.Column(db.BigInteger, primary_key=True)
+    id = db.Column(BigIntegerPK, primary_key=True)
     email = db.Column(db.String, nullable=False, unique=True)
     name = db.Column(db.String, nullable=False)
     password_hash = db.Column(db.String, nullable=False)
     verified = db.Column(db.Boolean, default=False)
+    is_admin = db.Column(db.Boolean, nullable=False, default=False)
+    auth_epoch = db.Column(db.Integer, nullable=False, default=0)  # bumped to revoke every token issued so far
+    data_version = db.Column(db.Integer, nullable=False, default=0)  # bumped by every savings write; keys cached reports
     verification_token = db.Column(db.String)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # Relationships
-    wallets = db.relationship('Wallet', backref='user', lazy=True, cascade='all, delete-orphan')
-    goals = db.relationship('Goal', backref='user', lazy=True, cascade='all, delete-orphan')
-    savings_updates = db.relationship('SavingsUpdate', backref='user', lazy=True, cascade='all, delete-orphan')
-    group_memberships = db.relationship('GroupMember', backref='user', lazy=True, cascade='all, delete-orphan')
+    # Relationships; the database cascades deletes (ON DELETE CASCADE)
+    wallets = db.relationship('Wallet', backref='user', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    goals = db.relationship('Goal', backref='user', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    savings_updates = db.relationship('SavingsUpdate', backref='user', lazy=True,
+                                      cascade='all, delete-orphan', passive_deletes=True)
+    group_memberships = db.relationship('GroupMember', backref='user', lazy=True,
+                                        cascade='all, delete-orphan', passive_deletes=True)
     
     def __init__(self, email, name, password):
         self.email = email
@@ -40,13 +46,18 @@ class User(db.Model):
     def verify(self):
         self.verified = True
         self.verification_token = None
-        
+    
+    def bump_auth_epoch(self):
+        """Revoke every token issued so far (they carry the old epoch)"""
+        self.auth_epoch = User.auth_epoch + 1
+    
     def to_dict(self):
         return {
             'id': self.id,
             'email': self.email,
             'name': self.name,
             'verified': self.verified,
+            'is_admin': self.is_admin,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
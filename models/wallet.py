@@ -1,19 +1,31 @@
 from app import db
+from app.utils.db import BigIntegerPK
 from datetime import datetime
 from decimal import Decimal
 
 class Wallet(db.Model):
     __tablename__ = 'wallets'
     
-    id = db.Column(db.BigInteger, primary_key=True)
-    user_id = db.Column(db.BigInteger, db.ForeignKey('users.id'), nullable=False)
+    id = db.Column(BigIntegerPK, primary_key=True)
+    user_id = db.Column(db.BigInteger, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
     amount = db.Column(db.Numeric, nullable=False, default=0)
     name = db.Column(db.String, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version_id = db.Column(db.Integer, nullable=False, default=1)  # bumped on every write
+    is_deleted = db.Column(db.Boolean, nullable=False, default=False)  # hidden while a deletion job empties it
     
-    # Relationships
-    savings_updates = db.relationship('SavingsUpdate', backref='wallet', lazy=True, cascade='all, delete-orphan')
+    # Flushes check and bump version_id, so a stale write raises
+    # StaleDataError instead of silently overwriting a concurrent one
+    __mapper_args__ = {'version_id_col': version_id}
+    
+    # Relationships; the database cascades deletes (ON DELETE CASCADE), so
+    # deleting a wallet never loads its ledger into the session
+    savings_updates = db.relationship('SavingsUpdate', backref='wallet', lazy=True,
+                                      cascade='all, delete-orphan', passive_deletes=True)
+    rollups = db.relationship('SavingsRollup', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    balance_snapshots = db.relationship('WalletBalanceSnapshot', lazy=True,
+                                        cascade='all, delete-orphan', passive_deletes=True)
     
     def __init__(self, user_id, amount=0, name=None):
         self.user_id = user_id
@@ -42,7 +54,8 @@ class Wallet(db.Model):
             'amount': float(self.amount),
             'name': self.name,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'version_id': self.version_id
         }
     
     def __repr__(self):
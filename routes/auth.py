@@ -133,7 +133,7 @@ def change_password():
         )
         
         if result:
-            return jsonify({"message": "Password changed successfully"}), 200
+            return jsonify({"message": "Password changed successfully", **result}), 200
         else:
             return jsonify({"error": "Current password is incorrect"}), 400
     except ValueError as e:
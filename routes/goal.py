@@ -1,6 +1,11 @@
 from flask import Blueprint, request, jsonify
 from app.services.goal_service import GoalService
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.models.goal import Goal
+from app.utils.db import ConflictError
+from app.utils.etag import conditional
+from app.utils.idempotency import idempotent
+from app.utils.serializers import GoalSerializer, SavingsUpdateSerializer
 from datetime import timedelta
 
 bp = Blueprint('goal', __name__)
@@ -8,11 +13,12 @@ goal_service = GoalService()
 
 @bp.route('', methods=['GET'])
 @jwt_required()
+@conditional(lambda user_id: goal_service.listing_version(user_id))
 def get_goals():
     user_id = get_jwt_identity()
     try:
         goals = goal_service.get_user_goals(user_id)
-        return jsonify([goal.to_dict() for goal in goals]), 200
+        return jsonify(GoalSerializer().dump_many(goals)), 200
     except Exception as e:
         return jsonify({"error": "Failed to retrieve goals"}), 500
 
@@ -82,6 +88,9 @@ def update_goal(goal_id):
         if goal:
             return jsonify(goal.to_dict()), 200
         return jsonify({"error": "Goal not found or unauthorized"}), 404
+    except ConflictError as e:
+        current = goal_service.get_goal(goal_id, user_id)
+        return jsonify({"error": str(e), "goal": current.to_dict() if current else None}), 409
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     except Exception as e:
@@ -96,11 +105,15 @@ def delete_goal(goal_id):
         if success:
             return jsonify({"message": "Goal deleted successfully"}), 200
         return jsonify({"error": "Goal not found or unauthorized"}), 404
+    except ConflictError as e:
+        current = goal_service.get_goal(goal_id, user_id)
+        return jsonify({"error": str(e), "goal": current.to_dict() if current else None}), 409
     except Exception as e:
         return jsonify({"error": "Failed to delete goal"}), 500
 
 @bp.route('/<int:goal_id>/progress', methods=['POST'])
 @jwt_required()
+@idempotent
 def add_progress(goal_id):
     user_id = get_jwt_identity()
     data = request.get_json()
@@ -133,11 +146,21 @@ def add_progress(goal_id):
 
 @bp.route('/<int:goal_id>/history', methods=['GET'])
 @jwt_required()
+@conditional(lambda user_id, goal_id: goal_service.cache.owned_version(Goal, goal_id, user_id))
 def get_goal_history(goal_id):
     user_id = get_jwt_identity()
     try:
-        history = goal_service.get_goal_history(goal_id, user_id)
-        return jsonify([entry.to_dict() for entry in history]), 200
+        history = goal_service.get_goal_history(
+            goal_id,
+            user_id,
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', 20, type=int),
+            include_total=request.args.get('include_total', 'false').lower() == 'true'
+        )
+        return jsonify({
+            "items": SavingsUpdateSerializer().dump_many(history['items']),
+            "pagination": history['pagination']
+        }), 200
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     except Exception as e:
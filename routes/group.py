@@ -1,17 +1,21 @@
 from flask import Blueprint, request, jsonify
 from app.services.group_service import GroupService
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.utils.etag import conditional
+from app.utils.serializers import GroupSerializer
+from app.utils.singleflight import SingleFlightTimeout
 
 bp = Blueprint('group', __name__)
 group_service = GroupService()
 
 @bp.route('', methods=['GET'])
 @jwt_required()
+@conditional(lambda user_id: group_service.listing_version(user_id))
 def get_groups():
     user_id = get_jwt_identity()
     try:
         groups = group_service.get_user_groups(user_id)
-        return jsonify([group.to_dict() for group in groups]), 200
+        return jsonify(GroupSerializer().dump_many(groups)), 200
     except Exception as e:
         return jsonify({"error": "Failed to retrieve groups"}), 500
 
@@ -48,7 +52,7 @@ def get_group(group_id):
             result['members'] = [
                 {
                     'user_id': member.user_id,
-                    'name': member.user.name if hasattr(member, 'user') else None,
+                    'name': member.name,
                     'is_admin': member.is_admin,
                     'joined_at': member.joined_at.isoformat() if member.joined_at else None
                 }
@@ -96,6 +100,29 @@ def delete_group(group_id):
     except Exception as e:
         return jsonify({"error": "Failed to delete group"}), 500
 
+@bp.route('/<int:group_id>/leaderboard', methods=['GET'])
+@jwt_required()
+def get_leaderboard(group_id):
+    user_id = get_jwt_identity()
+    try:
+        leaderboard = group_service.get_leaderboard(
+            group_id=group_id,
+            user_id=user_id,
+            metric=request.args.get('metric', 'deposits'),
+            period=request.args.get('period', 'month'),
+            limit=request.args.get('limit', 10, type=int)
+        )
+        
+        if leaderboard is not None:
+            return jsonify(leaderboard), 200
+        return jsonify({"error": "Group not found or unauthorized"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except SingleFlightTimeout as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": "Failed to build group leaderboard"}), 500
+
 @bp.route('/<int:group_id>/members', methods=['POST'])
 @jwt_required()
 def add_member(group_id):
@@ -121,6 +148,56 @@ def add_member(group_id):
     except Exception as e:
         return jsonify({"error": "Failed to add member to group"}), 500
 
+@bp.route('/<int:group_id>/members:batch', methods=['POST'])
+@jwt_required()
+def add_members(group_id):
+    user_id = get_jwt_identity()
+    data = request.get_json()
+    
+    if not data or 'members' not in data:
+        return jsonify({"error": "Members are required"}), 400
+    
+    try:
+        results = group_service.add_members(
+            group_id=group_id,
+            admin_user_id=user_id,
+            members=data['members']
+        )
+        
+        return jsonify({
+            "added": sum(1 for result in results if result['status'] == 'added'),
+            "results": results
+        }), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": "Failed to add members to group"}), 500
+
+@bp.route('/<int:group_id>/members:batch', methods=['DELETE'])
+@jwt_required()
+def remove_members(group_id):
+    user_id = get_jwt_identity()
+    data = request.get_json()
+    
+    if not data or 'user_ids' not in data:
+        return jsonify({"error": "User IDs are required"}), 400
+    
+    try:
+        results = group_service.remove_members(
+            group_id=group_id,
+            admin_user_id=user_id,
+            user_ids=data['user_ids']
+        )
+        
+        return jsonify({
+            "removed": sum(1 for result in results if result['status'] == 'removed'),
+            "results": results
+        }), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": "Failed to remove members from group"}), 500
+
 @bp.route('/<int:group_id>/members/<int:member_id>', methods=['DELETE'])
 @jwt_required()
 def remove_member(group_id, member_id):
@@ -1,6 +1,12 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from app.services.savings_service import SavingsService
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.utils.auth import admin_required, current_claims
+from app.utils.export import EXPORT_FORMATS, csv_chunks, ndjson_chunks
+from app.utils.idempotency import idempotent
+from app.utils.serializers import SavingsUpdateSerializer
+from app.utils.singleflight import SingleFlightTimeout
+from app.utils.validators import validate_timestamp
 
 bp = Blueprint('savings', __name__)
 savings_service = SavingsService()
@@ -19,15 +25,24 @@ def get_savings_updates():
             user_id=user_id,
             wallet_id=wallet_id,
             goal_id=goal_id,
-            savings_type=savings_type
+            savings_type=savings_type,
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', 20, type=int),
+            include_total=request.args.get('include_total', 'false').lower() == 'true'
         )
         
-        return jsonify([update.to_dict() for update in savings_updates]), 200
+        return jsonify({
+            "items": SavingsUpdateSerializer().dump_many(savings_updates['items']),
+            "pagination": savings_updates['pagination']
+        }), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": "Failed to retrieve savings updates"}), 500
 
 @bp.route('', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_savings_update():
     user_id = get_jwt_identity()
     data = request.get_json()
@@ -97,6 +112,8 @@ def delete_savings_update(update_id):
         if success:
             return jsonify({"message": "Savings update deleted successfully"}), 200
         return jsonify({"error": "Savings update not found or unauthorized"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": "Failed to delete savings update"}), 500
 
@@ -107,5 +124,69 @@ def get_savings_summary():
     try:
         summary = savings_service.get_user_savings_summary(user_id)
         return jsonify(summary), 200
+    except SingleFlightTimeout as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
-        return jsonify({"error": "Failed to generate savings summary"}), 500
\ No newline at end of file
+        return jsonify({"error": "Failed to generate savings summary"}), 500
+
+@bp.route('/statistics', methods=['GET'])
+@jwt_required()
+def get_savings_statistics():
+    user_id = get_jwt_identity()
+    period = request.args.get('period')
+    
+    if period not in (None, 'week', 'month', 'year'):
+        return jsonify({"error": "Period must be one of: week, month, year"}), 400
+    
+    try:
+        statistics = savings_service.get_savings_statistics(user_id, period)
+        return jsonify(statistics), 200
+    except SingleFlightTimeout as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": "Failed to generate savings statistics"}), 500
+
+@bp.route('/cache-stats', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_cache_stats():
+    return jsonify(savings_service.cache.stats()), 200
+
+@bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_savings_updates():
+    user_id = int(get_jwt_identity())
+    export_format = request.args.get('format', 'csv')
+    
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": f"Format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    
+    # Support staff (admins) may export another user's history
+    owner_id = request.args.get('user_id', user_id, type=int)
+    if owner_id != user_id and not current_claims().get("is_admin"):
+        return jsonify({"error": "Admin privileges required"}), 403
+    
+    bounds = {}
+    for arg in ('from', 'to'):
+        if arg in request.args:
+            is_valid, message, bounds[arg] = validate_timestamp(request.args[arg], end_of_day=(arg == 'to'))
+            if not is_valid:
+                return jsonify({"error": f"'{arg}': {message}"}), 400
+    
+    try:
+        batches = savings_service.iter_export(owner_id, start=bounds.get('from'), end=bounds.get('to'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": "Failed to export savings updates"}), 500
+    
+    if export_format == 'csv':
+        chunks = csv_chunks(batches, SavingsUpdateSerializer.fields)
+    else:
+        chunks = ndjson_chunks(batches, SavingsUpdateSerializer(), current_app.json.dumps)
+    
+    return Response(
+        stream_with_context(chunks),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename="savings-{owner_id}.{export_format}"'}
+    )
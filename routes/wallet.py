@@ -1,17 +1,28 @@
 from flask import Blueprint, request, jsonify
 from app.services.wallet_service import WalletService
+from app.schemas.wallet import WalletTransferSchema
+from marshmallow import ValidationError
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.models.wallet import Wallet
+from app.utils.db import ConflictError
+from app.utils.etag import conditional
+from app.utils.idempotency import idempotent
+from app.utils.serializers import SavingsUpdateSerializer, WalletSerializer
+from app.utils.validators import validate_timestamp
+from datetime import datetime
+import codecs
 
 bp = Blueprint('wallet', __name__)
 wallet_service = WalletService()
 
 @bp.route('', methods=['GET'])
 @jwt_required()
+@conditional(lambda user_id: wallet_service.cache.version(user_id))
 def get_wallets():
     user_id = get_jwt_identity()
     try:
         wallets = wallet_service.get_user_wallets(user_id)
-        return jsonify([wallet.to_dict() for wallet in wallets]), 200
+        return jsonify(WalletSerializer().dump_many(wallets)), 200
     except Exception as e:
         return jsonify({"error": "Failed to retrieve wallets"}), 500
 
@@ -67,6 +78,9 @@ def update_wallet(wallet_id):
         if wallet:
             return jsonify(wallet.to_dict()), 200
         return jsonify({"error": "Wallet not found or unauthorized"}), 404
+    except ConflictError as e:
+        current = wallet_service.get_wallet(wallet_id, user_id)
+        return jsonify({"error": str(e), "wallet": current.to_dict() if current else None}), 409
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     except Exception as e:
@@ -77,15 +91,34 @@ def update_wallet(wallet_id):
 def delete_wallet(wallet_id):
     user_id = get_jwt_identity()
     try:
-        success = wallet_service.delete_wallet(wallet_id, user_id)
-        if success:
-            return jsonify({"message": "Wallet deleted successfully"}), 200
-        return jsonify({"error": "Wallet not found or unauthorized"}), 404
+        success, job = wallet_service.delete_wallet(wallet_id, user_id)
+        if not success:
+            return jsonify({"error": "Wallet not found or unauthorized"}), 404
+        if job is not None:
+            return jsonify({"message": "Wallet deletion started", "job": job.to_dict()}), 202, \
+                {"Location": f"/wallets/deletions/{job.id}"}
+        return jsonify({"message": "Wallet deleted successfully"}), 200
+    except ConflictError as e:
+        current = wallet_service.get_wallet(wallet_id, user_id)
+        return jsonify({"error": str(e), "wallet": current.to_dict() if current else None}), 409
     except Exception as e:
         return jsonify({"error": "Failed to delete wallet"}), 500
 
+@bp.route('/deletions/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_deletion(job_id):
+    user_id = get_jwt_identity()
+    try:
+        job = wallet_service.deletions.get_job(job_id, user_id)
+        if not job:
+            return jsonify({"error": "Deletion job not found"}), 404
+        return jsonify(job.to_dict()), 200
+    except Exception as e:
+        return jsonify({"error": "Failed to retrieve deletion job"}), 500
+
 @bp.route('/<int:wallet_id>/deposit', methods=['POST'])
 @jwt_required()
+@idempotent
 def deposit(wallet_id):
     user_id = get_jwt_identity()
     data = request.get_json()
@@ -113,6 +146,7 @@ def deposit(wallet_id):
 
 @bp.route('/<int:wallet_id>/withdraw', methods=['POST'])
 @jwt_required()
+@idempotent
 def withdraw(wallet_id):
     user_id = get_jwt_identity()
     data = request.get_json()
@@ -137,14 +171,146 @@ def withdraw(wallet_id):
     except Exception as e:
         return jsonify({"error": "Failed to process withdrawal"}), 500
 
+@bp.route('/transfer', methods=['POST'])
+@jwt_required()
+@idempotent
+def transfer():
+    user_id = get_jwt_identity()
+    
+    try:
+        data = WalletTransferSchema().load(request.get_json() or {})
+    except ValidationError as e:
+        return jsonify({"errors": e.messages}), 400
+    
+    try:
+        source_wallet, destination_wallet, transfer_out, transfer_in = wallet_service.transfer(
+            user_id=user_id,
+            source_wallet_id=data['source_wallet_id'],
+            destination_wallet_id=data['destination_wallet_id'],
+            amount=data['amount'],
+            description=data.get('description')
+        )
+        
+        return jsonify({
+            "source_wallet": source_wallet.to_dict(),
+            "destination_wallet": destination_wallet.to_dict(),
+            "transfer_out": transfer_out.to_dict(),
+            "transfer_in": transfer_in.to_dict()
+        }), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": "Failed to process transfer"}), 500
+
+@bp.route('/<int:wallet_id>/transactions:batch', methods=['POST'])
+@jwt_required()
+@idempotent
+def apply_batch(wallet_id):
+    user_id = get_jwt_identity()
+    data = request.get_json()
+    
+    if not data or 'transactions' not in data:
+        return jsonify({"error": "Transactions are required"}), 400
+    
+    try:
+        wallet, results = wallet_service.apply_batch(
+            wallet_id=wallet_id,
+            user_id=user_id,
+            transactions=data['transactions']
+        )
+        
+        if not wallet:
+            return jsonify({"error": "Batch rejected", "results": results}), 400
+        
+        return jsonify({
+            "wallet": wallet.to_dict(),
+            "results": results
+        }), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": "Failed to process transactions"}), 500
+
+@bp.route('/<int:wallet_id>/import', methods=['POST'])
+@jwt_required()
+def import_statement(wallet_id):
+    user_id = get_jwt_identity()
+    
+    # A multipart upload is spooled to disk by the form parser; a text/csv
+    # body is read straight off the request. Either way it is decoded and
+    # parsed line by line, never held in memory whole.
+    upload = request.files.get('file')
+    if upload:
+        stream = upload.stream
+    elif request.mimetype == 'text/csv':
+        stream = request.stream
+    else:
+        return jsonify({"error": "Send the statement as a 'file' upload or with Content-Type: text/csv"}), 400
+    
+    try:
+        wallet, result = wallet_service.import_statement(
+            wallet_id=wallet_id,
+            user_id=user_id,
+            lines=codecs.iterdecode(stream, 'utf-8-sig')
+        )
+        
+        if not wallet:
+            return jsonify({"error": "Statement rejected", **result}), 400
+        
+        return jsonify({"wallet": wallet.to_dict(), **result}), 200
+    except UnicodeDecodeError:
+        return jsonify({"error": "The statement must be UTF-8 encoded"}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": "Failed to import statement"}), 500
+
 @bp.route('/<int:wallet_id>/history', methods=['GET'])
 @jwt_required()
+@conditional(lambda user_id, wallet_id: wallet_service.cache.owned_version(Wallet, wallet_id, user_id))
 def get_wallet_history(wallet_id):
     user_id = get_jwt_identity()
     try:
-        history = wallet_service.get_wallet_history(wallet_id, user_id)
-        return jsonify([entry.to_dict() for entry in history]), 200
+        history = wallet_service.get_wallet_history(
+            wallet_id,
+            user_id,
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', 20, type=int),
+            include_total=request.args.get('include_total', 'false').lower() == 'true'
+        )
+        balances = history['running_balances']
+        serializer = SavingsUpdateSerializer()
+        return jsonify({
+            "items": [
+                dict(serializer.dump(entry), running_balance=balances[entry.id])
+                for entry in history['items']
+            ],
+            "pagination": history['pagination']
+        }), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": "Failed to retrieve wallet history"}), 500
+
+@bp.route('/<int:wallet_id>/balance', methods=['GET'])
+@jwt_required()
+def get_wallet_balance(wallet_id):
+    user_id = get_jwt_identity()
+    
+    at = datetime.utcnow()
+    if 'at' in request.args:
+        is_valid, message, at = validate_timestamp(request.args['at'])
+        if not is_valid:
+            return jsonify({"error": message}), 400
+    
+    try:
+        balance = wallet_service.get_balance_at(wallet_id, user_id, at)
+        return jsonify({
+            "wallet_id": wallet_id,
+            "at": at.isoformat(),
+            "balance": float(balance)
+        }), 200
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     except Exception as e:
-        return jsonify({"error": "Failed to retrieve wallet history"}), 500
\ No newline at end of file
+        return jsonify({"error": "Failed to retrieve wallet balance"}), 500
@@ -1,7 +1,7 @@
 """
 Wallet schemas for request validation and response serialization.
 """
-from marshmallow import Schema, fields, validates, ValidationError, post_load, validate
+from marshmallow import Schema, fields, validates, validates_schema, ValidationError, post_load, validate
 from app.schemas import BaseSchema
 from app.utils.validators import validate_amount, validate_name
 
@@ -73,10 +73,10 @@ class WalletTransferSchema(Schema):
         if not is_valid:
             raise ValidationError(message)
     
-    @validates('source_wallet_id')
-    def validate_source_wallet(self, value, **kwargs):
-        if value == kwargs['data'].get('destination_wallet_id'):
-            raise ValidationError("Source and destination wallets must be different")
+    @validates_schema
+    def validate_wallets(self, data, **kwargs):
+        if data.get('source_wallet_id') == data.get('destination_wallet_id'):
+            raise ValidationError("Source and destination wallets must be different", 'destination_wallet_id')
 
 class WalletResponseSchema(WalletSchema):
     """Schema for wallet responses with additional stats."""
@@ -1,5 +1,6 @@
 from app import db, jwt, bcrypt
 from app.models.user import User
+from app.utils.auth import auth_epochs, token_claims
 from flask_jwt_extended import create_access_token, create_refresh_token
 from flask import current_app
 import uuid
@@ -39,16 +40,20 @@ class AuthService:
         if self.verification_required and not user.verified:
             raise ValueError("Email not verified. Please verify your email before logging in.")
         
-        # Create tokens
-        access_token = create_access_token(identity=user.id)
-        refresh_token = create_refresh_token(identity=user.id)
-        
         return {
-            "access_token": access_token,
-            "refresh_token": refresh_token,
+            **self.create_tokens(user),
             "user": user.to_dict()
         }
     
+    def create_tokens(self, user):
+        """Access and refresh tokens carrying the user's verified/is_admin/auth_epoch claims"""
+        claims = token_claims(user)
+        
+        return {
+            "access_token": create_access_token(identity=str(user.id), additional_claims=claims),
+            "refresh_token": create_refresh_token(identity=str(user.id), additional_claims=claims)
+        }
+    
     def verify_email(self, token):
         """Verify user's email using token"""
         user = User.query.filter_by(verification_token=token).first()
@@ -57,7 +62,9 @@ class AuthService:
             return False
         
         user.verify()
+        user.bump_auth_epoch()
         db.session.commit()
+        auth_epochs.forget(user.id)
         
         return True
     
@@ -102,12 +109,14 @@ class AuthService:
         # Update password
         user.set_password(new_password)
         user.verification_token = None
+        user.bump_auth_epoch()
         db.session.commit()
+        auth_epochs.forget(user.id)
         
         return True
     
     def change_password(self, user_id, current_password, new_password):
-        """Change a user's password"""
+        """Change a user's password and return fresh tokens"""
         user = self.get_user_by_id(user_id)
         
         if not user:
@@ -121,11 +130,27 @@ class AuthService:
         if len(new_password) < current_app.config.get('PASSWORD_MIN_LENGTH', 8):
             raise ValueError("New password is too short")
         
-        # Update password
+        # Update password; every token issued so far stops working
         user.set_password(new_password)
+        user.bump_auth_epoch()
         db.session.commit()
+        auth_epochs.forget(user.id)
         
-        return True
+        return self.create_tokens(user)
+    
+    def set_admin(self, user_id, is_admin=True):
+        """Grant or revoke admin rights; the user's existing tokens are revoked"""
+        user = self.get_user_by_id(user_id)
+        
+        if not user:
+            raise ValueError("User not found")
+        
+        user.is_admin = is_admin
+        user.bump_auth_epoch()
+        db.session.commit()
+        auth_epochs.forget(user.id)
+        
+        return user
     
     # Private methods
     def _send_verification_email(self, user):
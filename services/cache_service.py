@@ -0,0 +1,112 @@
+from app import db
+from app.models.group import Group, GroupMember
+from app.models.user import User
+from app.utils.singleflight import flight_key, flights
+from flask import current_app
+from sqlalchemy import func, select, update
+from datetime import datetime
+import json
+
+class CacheService:
+    """
+    Per-user cache of expensive reports (savings summary and statistics).
+    
+    Every write to a user's wallets, goals or savings updates bumps
+    users.data_version in the same transaction, and the version is part of
+    every cache key. A read fetches the committed version first, so once a
+    write has committed no reader can see a report computed before it.
+    
+    Group reports (leaderboards) are keyed the same way on the group's
+    version: its membership and the sum of its members' data versions.
+    """
+    
+    @property
+    def backend(self):
+        return current_app.extensions.get('summary_cache')
+    
+    def bump(self, user_id):
+        """Invalidate the user's cached reports (caller commits, just before its commit)"""
+        self.bump_many([user_id])
+    
+    def bump_many(self, user_ids):
+        """Invalidate several users' cached reports (caller commits)"""
+        db.session.execute(
+            update(User)
+            .where(User.id.in_(user_ids))
+            .values(data_version=User.data_version + 1, updated_at=User.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+    
+    def version(self, user_id):
+        """The user's committed data version"""
+        return db.session.query(User.data_version).filter(User.id == user_id).scalar()
+    
+    def owned_version(self, model, entity_id, user_id):
+        """The user's data version if the wallet/goal entity_id is theirs, else None"""
+        return db.session.query(User.data_version)\
+            .join(model, model.user_id == User.id)\
+            .filter(model.id == entity_id, User.id == user_id)\
+            .scalar()
+    
+    def group_version(self, group_id):
+        """
+        A group's committed version, from one query: its updated_at, which
+        membership writes move, and the sum of its members' data versions,
+        which any member's write moves. None if the group does not exist.
+        
+        Reading it costs an index scan of the group's members, but member
+        writes stay free of a shared row every one of them would update.
+        """
+        data_versions = select(func.sum(User.data_version))\
+            .join(GroupMember, GroupMember.user_id == User.id)\
+            .where(GroupMember.group_id == Group.id)\
+            .scalar_subquery()
+        
+        row = db.session.execute(select(Group.updated_at, data_versions).where(Group.id == group_id)).first()
+        return f'{row[0]}+{row[1] or 0}' if row else None
+    
+    def get_or_compute(self, user_id, name, compute, **params):
+        """
+        Return the cached report `name` for the user, computing and storing it on a miss.
+        
+        The key also carries today's UTC date, as reports group by calendar
+        day and month (in UTC, like the rollups' month buckets). Concurrent
+        misses for the same key in this process share one computation
+        (single-flight), even with the cache disabled.
+        """
+        return self._get_or_compute([name, str(user_id), str(self.version(user_id))], compute, params)
+    
+    def get_or_compute_for_group(self, group_id, name, compute, **params):
+        """Like get_or_compute, for a report on a group (cached until a member writes or the membership changes)"""
+        return self._get_or_compute([name, f'group{group_id}', str(self.group_version(group_id))], compute, params)
+    
+    def _get_or_compute(self, parts, compute, params):
+        backend = self.backend
+        key = ':'.join(parts + [
+            datetime.utcnow().date().isoformat(),
+            json.dumps(params, sort_keys=True, default=str)
+        ])
+        
+        value = backend.get(key) if backend is not None else None
+        if value is None:
+            value = flights.do(
+                flight_key('CacheService.get_or_compute', key),
+                lambda: self._compute_and_store(key, compute),
+                timeout=current_app.config.get('SINGLE_FLIGHT_TIMEOUT', 30)
+            )
+        
+        return value
+    
+    def _compute_and_store(self, key, compute):
+        value = compute()
+        if self.backend is not None:
+            self.backend.set(key, value)
+        return value
+    
+    def stats(self):
+        """Hit-rate metrics of this process's cache"""
+        backend = self.backend
+        if backend is None:
+            return {'backend': None, 'single_flight': flights.stats()}
+        
+        return {'backend': backend.name, 'entries': len(backend), **backend.stats.to_dict(), 'single_flight': flights.stats()}
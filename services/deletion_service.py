@@ -0,0 +1,165 @@
+from app import db
+from app.models.deletion import DeletionJob
+from app.models.savings import SavingsUpdate
+from app.models.user import User
+from app.models.wallet import Wallet
+from app.services.group_service import GroupService
+from flask import current_app
+from sqlalchemy import delete, func, select, update
+from datetime import datetime, timedelta
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class DeletionService:
+    """
+    Deletes wallets and users whose ledgers are too large for one statement.
+    
+    The database cascades every delete (ON DELETE CASCADE), so removing the
+    wallet or user row alone is correct, but for a very large ledger that
+    one statement holds its locks and its transaction open for as long as
+    the cascade takes. A deletion job instead deletes the ledger rows
+    DELETION_CHUNK_SIZE at a time, one short transaction per chunk, and
+    records its progress on the job row; the final DELETE of the target
+    then only cascades to the few rows left (rollups, snapshots, ...).
+    
+    Jobs started by a request run on a daemon thread of the worker, which a
+    restart or crash of that worker kills mid-job. Nothing picks them up
+    again on startup: run `flask deletions resume --interval N` (or the
+    command from cron) to finish jobs that stopped making progress.
+    """
+    TARGETS = {
+        'wallet': (Wallet, SavingsUpdate.wallet_id),
+        'user': (User, SavingsUpdate.user_id)
+    }
+    
+    groups = GroupService()
+    
+    def _target(self, kind):
+        """(model, ledger key column) for a kind of deletion"""
+        if kind not in self.TARGETS:
+            raise ValueError(f"Unknown deletion kind: {kind}")
+        return self.TARGETS[kind]
+    
+    def count_ledger_rows(self, kind, target_id):
+        ledger_key = self._target(kind)[1]
+        return db.session.scalar(select(func.count()).where(ledger_key == target_id))
+    
+    def schedule(self, kind, target_id, user_id, total=None):
+        """Create a pending deletion job (caller commits)"""
+        if total is None:
+            total = self.count_ledger_rows(kind, target_id)
+        
+        job = DeletionJob(kind=kind, target_id=target_id, user_id=user_id, total=total)
+        db.session.add(job)
+        db.session.flush()
+        return job
+    
+    def get_job(self, job_id, user_id):
+        """Get a deletion job the user started"""
+        return DeletionJob.query.filter_by(id=job_id, user_id=user_id)\
+            .execution_options(populate_existing=True)\
+            .first()
+    
+    def run(self, job_id, chunk_size=None):
+        """
+        Carry out a deletion job, one chunk per transaction.
+        
+        Safe to re-run after a crash: every chunk deletes whatever ledger
+        rows are still there, and the job's counter only moves in the same
+        transaction as the rows it counts.
+        
+        Yields:
+            DeletionJob: The job after each committed chunk, then once completed
+        
+        Raises:
+            Exception: Whatever stopped the job, after marking it failed
+        """
+        chunk_size = chunk_size or current_app.config.get('DELETION_CHUNK_SIZE', 5000)
+        job = db.session.get(DeletionJob, job_id)
+        if job is None or job.status == 'completed':
+            return
+        
+        model, ledger_key = self._target(job.kind)
+        job.status = 'running'
+        job.error = None
+        db.session.commit()
+        
+        try:
+            while True:
+                ids = select(SavingsUpdate.id).where(ledger_key == job.target_id).limit(chunk_size)
+                deleted = db.session.execute(
+                    delete(SavingsUpdate).where(SavingsUpdate.id.in_(ids)),
+                    execution_options={'synchronize_session': False}
+                ).rowcount
+                if not deleted:
+                    break
+                
+                db.session.execute(
+                    update(DeletionJob).where(DeletionJob.id == job_id)
+                    .values(deleted=DeletionJob.deleted + deleted, updated_at=datetime.utcnow())
+                    .execution_options(synchronize_session=False)
+                )
+                db.session.commit()
+                db.session.refresh(job)
+                yield job
+            
+            if job.kind == 'user':
+                # The cascade would drop the memberships but leave the groups' counters
+                self.groups.leave_all_groups(job.target_id)
+            
+            # Cascades to what the ledger left behind (rollups, snapshots, goals, ...)
+            db.session.execute(
+                delete(model).where(model.id == job.target_id),
+                execution_options={'synchronize_session': False}
+            )
+            job.status = 'completed'
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            yield job
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(DeletionJob, job_id)
+            job.status = 'failed'
+            job.error = str(e)[:500]
+            db.session.commit()
+            raise
+    
+    def start(self, job_id):
+        """
+        Run a deletion job on a background daemon thread with its own app context and session.
+        
+        The thread does not survive the process: a job cut short by a restart
+        stays pending or running until `flask deletions resume` picks it up.
+        """
+        app = current_app._get_current_object()
+        
+        def work():
+            with app.app_context():
+                try:
+                    for _ in self.run(job_id):
+                        pass
+                except Exception:
+                    logger.exception(f"Deletion job {job_id} failed")
+        
+        thread = threading.Thread(target=work, name=f'deletion-job-{job_id}', daemon=True)
+        thread.start()
+        return thread
+    
+    def unfinished_jobs(self, stale_after=None):
+        """
+        Ids of jobs that are pending, running or failed and have made no
+        progress for `stale_after` (default DELETION_STALE_AFTER).
+        
+        A job still being run by a live worker commits progress every chunk,
+        so it is left alone; one whose worker died stops updating and shows up.
+        """
+        if stale_after is None:
+            stale_after = current_app.config.get('DELETION_STALE_AFTER', timedelta(minutes=10))
+        
+        return [
+            row[0] for row in db.session.query(DeletionJob.id)
+            .filter(DeletionJob.status != 'completed', DeletionJob.updated_at <= datetime.utcnow() - stale_after)
+            .order_by(DeletionJob.id)
+        ]
@@ -1,17 +1,53 @@
 from app import db
 from app.models.goal import Goal
 from app.models.savings import SavingsUpdate
+from app.models.rows import GoalRow, SavingsUpdateRow
+from app.models.user import User
 from app.models.wallet import Wallet
+from app.services.cache_service import CacheService
+from app.services.rollup_service import RollupService
+from app.services.snapshot_service import SnapshotService
+from app.services.wallet_service import WalletService
+from app.utils.db import keyset_paginate, retry_on_conflict
+from app.utils.loader import request_loader
+from app.utils.singleflight import single_flight
+from sqlalchemy import and_, update, case
+from datetime import datetime
 from decimal import Decimal
 
 class GoalService:
+    cache = CacheService()
+    rollups = RollupService()
+    snapshots = SnapshotService()
+    wallets = WalletService()
+    
+    def listing_version(self, user_id, now=None):
+        """
+        What the user's goal listing depends on, from one query: their data
+        version and the days_remaining of each goal that has not expired.
+        
+        Those count down with the clock alone, and a goal drops out of them
+        once it expires, so the version moves whenever a listed
+        days_remaining or is_expired would, without a write.
+        """
+        now = now or datetime.utcnow()
+        rows = db.session.query(User.data_version, Goal.end_date)\
+            .outerjoin(Goal, and_(Goal.user_id == User.id, Goal.end_date >= now))\
+            .filter(User.id == user_id)\
+            .order_by(Goal.id)\
+            .all()
+        
+        if not rows:
+            return None
+        return (rows[0][0],) + tuple((end_date - now).days for _, end_date in rows if end_date)
+    
     def get_user_goals(self, user_id):
-        """Get all goals for a user"""
-        return Goal.query.filter_by(user_id=user_id).all()
+        """Get all goals for a user, as read-only rows"""
+        return GoalRow.fetch(GoalRow.select().where(Goal.user_id == user_id))
     
     def get_goal(self, goal_id, user_id):
-        """Get a specific goal"""
-        return Goal.query.filter_by(id=goal_id, user_id=user_id).first()
+        """Get a specific goal (loaded at most once per request)"""
+        return request_loader().get(Goal, goal_id, user_id)
     
     def create_goal(self, user_id, target_amount, time_period, description=None, name=None):
         """Create a new savings goal"""
@@ -27,10 +63,12 @@ class GoalService:
         )
         
         db.session.add(goal)
+        self.cache.bump(user_id)
         db.session.commit()
         
         return goal
     
+    @retry_on_conflict()
     def update_goal(self, goal_id, user_id, target_amount=None, time_period=None, description=None, name=None):
         """Update a goal's details"""
         goal = self.get_goal(goal_id, user_id)
@@ -52,9 +90,11 @@ class GoalService:
         if name is not None:
             goal.name = name
         
+        self.cache.bump(user_id)
         db.session.commit()
         return goal
     
+    @retry_on_conflict()
     def delete_goal(self, goal_id, user_id):
         """Delete a goal"""
         goal = self.get_goal(goal_id, user_id)
@@ -63,35 +103,55 @@ class GoalService:
             return False
         
         db.session.delete(goal)
+        self.cache.bump(user_id)
         db.session.commit()
+        request_loader().forget(Goal, goal_id)
         
         return True
     
+    def apply_progress(self, goal_id, user_id, amount):
+        """
+        Atomically add amount to a goal's current amount (caller commits).
+        
+        Returns the refreshed goal, or None if it is not the user's goal.
+        """
+        new_amount = Goal.current_amount + amount
+        stmt = update(Goal).where(Goal.id == goal_id, Goal.user_id == user_id).values(
+            current_amount=new_amount,
+            achieved=case((new_amount >= Goal.target_amount, True), else_=Goal.achieved),
+            version_id=Goal.version_id + 1
+        ).returning(Goal)
+        
+        goal = db.session.execute(
+            stmt,
+            execution_options={'populate_existing': True, 'synchronize_session': False}
+        ).scalar_one_or_none()
+        
+        if goal:
+            request_loader().put(Goal, goal_id, user_id, goal)
+        
+        return goal
+    
     def add_progress(self, goal_id, user_id, amount, wallet_id, description=None):
         """Add progress to a goal by transferring from a wallet"""
-        # Verify goal exists and belongs to user
-        goal = self.get_goal(goal_id, user_id)
-        if not goal:
-            raise ValueError("Goal not found or unauthorized")
-        
-        # Verify wallet exists and belongs to user
-        wallet = Wallet.query.filter_by(id=wallet_id, user_id=user_id).first()
-        if not wallet:
-            raise ValueError("Wallet not found or unauthorized")
-        
         # Validate amount
         if not isinstance(amount, (int, float, Decimal)) or amount <= 0:
             raise ValueError("Amount must be a positive number")
         
-        # Ensure sufficient funds in wallet
-        if wallet.amount < Decimal(str(amount)):
-            raise ValueError("Insufficient funds in wallet")
+        amount = Decimal(str(amount))
         
-        # Update wallet balance
-        wallet.withdraw(amount)
+        # Update wallet balance, only if there are sufficient funds
+        wallet = self.wallets.apply_balance_change(wallet_id, user_id, -amount)
+        if not wallet:
+            if not self.wallets.get_wallet(wallet_id, user_id):
+                raise ValueError("Wallet not found or unauthorized")
+            raise ValueError("Insufficient funds in wallet")
         
         # Update goal's current amount
-        goal.add_progress(amount)
+        goal = self.apply_progress(goal_id, user_id, amount)
+        if not goal:
+            db.session.rollback()
+            raise ValueError("Goal not found or unauthorized")
         
         # Create savings update record
         savings_update = SavingsUpdate(
@@ -104,25 +164,35 @@ class GoalService:
         )
         
         db.session.add(savings_update)
+        db.session.flush()
+        self.rollups.record(savings_update)
+        self.snapshots.record(wallet_id, savings_update)
+        self.cache.bump(user_id)
         db.session.commit()
         
         return goal, wallet, savings_update
     
-    def get_goal_history(self, goal_id, user_id):
-        """Get contribution history for a goal"""
+    def get_goal_history(self, goal_id, user_id, cursor=None, limit=20, include_total=False):
+        """Get a page of contribution history for a goal, as read-only rows"""
         # First verify goal ownership
         goal = self.get_goal(goal_id, user_id)
         
         if not goal:
             raise ValueError("Goal not found or unauthorized")
         
-        # Get all savings updates for this goal
-        history = SavingsUpdate.query.filter_by(
-            goal_id=goal_id
-        ).order_by(SavingsUpdate.updated_at.desc()).all()
-        
-        return history
+        # Get one page of savings updates for this goal
+        return keyset_paginate(
+            SavingsUpdateRow.select()
+            .join(Wallet, Wallet.id == SavingsUpdate.wallet_id)
+            .where(SavingsUpdate.goal_id == goal_id, Wallet.is_deleted.is_(False)),
+            [SavingsUpdate.created_at, SavingsUpdate.id],
+            cursor=cursor,
+            limit=limit,
+            include_total=include_total,
+            row=SavingsUpdateRow
+        )
     
+    @single_flight(version=lambda self, goal_id, user_id: self.cache.version(user_id))
     def calculate_goal_progress(self, goal_id, user_id):
         """Calculate the progress percentage and remaining amount for a goal"""
         goal = self.get_goal(goal_id, user_id)
@@ -139,6 +209,7 @@ class GoalService:
             "remaining_amount": float(remaining_amount)
         }
     
+    @single_flight(version=lambda self, goal_id, user_id: self.cache.version(user_id))
     def calculate_daily_savings_needed(self, goal_id, user_id):
         """Calculate how much needs to be saved daily to reach the goal on time"""
         goal = self.get_goal(goal_id, user_id)
@@ -1,19 +1,57 @@
 from app import db
 from app.models.group import Group, GroupMember
+from app.models.rollup import SavingsRollup
+from app.models.rows import GroupRow
 from app.models.user import User
+from app.services.cache_service import CacheService
+from app.utils.db import upsert_insert
+from app.utils.loader import request_loader
+from flask import current_app
+from sqlalchemy import delete, func, select, update
 from sqlalchemy.exc import IntegrityError
+from datetime import datetime
 
 class GroupService:
+    """
+    Groups and their memberships.
+    
+    Each group keeps its member_count and admin_count on its own row. Every
+    write to group_members moves them in the same transaction, with SQL
+    arithmetic on the stored values, so listings read them instead of
+    counting members, and the last-admin checks are a condition on the
+    counter update itself (two admins removing each other at once cannot
+    both succeed).
+    """
+    cache = CacheService()
+    
+    # Leaderboard metrics and the savings_rollups type each ranks by
+    LEADERBOARD_METRICS = {
+        'deposits': 'deposit',
+        'goal_contributions': 'goal_contribution'
+    }
+    LEADERBOARD_PERIODS = ('month', 'year', 'all')
+    
     def get_user_groups(self, user_id):
-        """Get all groups a user is a member of"""
-        # Query through group members to find all groups
-        memberships = GroupMember.query.filter_by(user_id=user_id).all()
-        group_ids = [membership.group_id for membership in memberships]
-        
-        if not group_ids:
-            return []
-        
-        return Group.query.filter(Group.id.in_(group_ids)).all()
+        """Get all groups a user is a member of, as read-only rows"""
+        # Join through group members to find all groups
+        return GroupRow.fetch(
+            GroupRow.select().join(GroupMember, GroupMember.group_id == Group.id)
+            .where(GroupMember.user_id == user_id)
+        )
+    
+    def listing_version(self, user_id):
+        """
+        What the user's group listing depends on, from one aggregate query
+        over their groups' rows: the group count, latest group update and
+        total member count (member joins and leaves update the group).
+        """
+        groups = select(GroupMember.group_id).where(GroupMember.user_id == user_id)
+        
+        return tuple(db.session.query(
+            func.count(Group.id),
+            func.max(Group.updated_at),
+            func.sum(Group.member_count)
+        ).filter(Group.id.in_(groups)).one())
     
     def create_group(self, name, created_by, description=None):
         """Create a new group"""
@@ -26,11 +64,13 @@ class GroupService:
             description=description,
             created_by=created_by
         )
+        group.member_count = 1
+        group.admin_count = 1
         
         db.session.add(group)
-        db.session.commit()
+        db.session.flush()
         
-        # Add creator as admin member
+        # Add creator as admin member, in the same transaction
         member = GroupMember(
             group_id=group.id,
             user_id=created_by,
@@ -39,21 +79,26 @@ class GroupService:
         
         db.session.add(member)
         db.session.commit()
+        request_loader().put(GroupMember, group.id, created_by, member)
         
         return group
     
     def get_group(self, group_id, user_id):
         """Get a specific group if user is a member"""
         # Check if user is a member
-        membership = GroupMember.query.filter_by(
-            group_id=group_id,
-            user_id=user_id
-        ).first()
-        
-        if not membership:
+        if not self.get_membership(group_id, user_id):
             return None
         
-        return Group.query.get(group_id)
+        return request_loader().get(Group, group_id)
+    
+    def get_membership(self, group_id, user_id):
+        """Get a user's membership of a group (loaded at most once per request)"""
+        return request_loader().membership(group_id, user_id)
+    
+    def get_admin_membership(self, group_id, user_id):
+        """Get a user's membership of a group if they are one of its admins"""
+        membership = self.get_membership(group_id, user_id)
+        return membership if membership and membership.is_admin else None
     
     def get_group_with_members(self, group_id, user_id):
         """Get a group and its members if user is a member"""
@@ -63,28 +108,28 @@ class GroupService:
         if not group:
             return None, None
         
-        # Get all members with joined user data
-        members = GroupMember.query.filter_by(group_id=group_id).all()
-        
-        # Load user data for each member
-        for member in members:
-            member.user = User.query.get(member.user_id)
+        # Get all members with their user's name in one joined query,
+        # selecting only the columns the listing serializes
+        members = db.session.query(
+            GroupMember.user_id,
+            User.name,
+            GroupMember.is_admin,
+            GroupMember.joined_at
+        ).join(User, User.id == GroupMember.user_id)\
+            .filter(GroupMember.group_id == group_id)\
+            .all()
         
         return group, members
     
     def update_group(self, group_id, user_id, name=None, description=None):
         """Update a group's details if user is an admin"""
         # Check if user is an admin
-        membership = GroupMember.query.filter_by(
-            group_id=group_id,
-            user_id=user_id,
-            is_admin=True
-        ).first()
+        membership = self.get_admin_membership(group_id, user_id)
         
         if not membership:
             return None
         
-        group = Group.query.get(group_id)
+        group = request_loader().get(Group, group_id)
         
         if name is not None:
             if not name or len(name.strip()) == 0:
@@ -100,52 +145,39 @@ class GroupService:
     def delete_group(self, group_id, user_id):
         """Delete a group if user is the creator or an admin"""
         # Check if user is an admin
-        membership = GroupMember.query.filter_by(
-            group_id=group_id,
-            user_id=user_id,
-            is_admin=True
-        ).first()
+        membership = self.get_admin_membership(group_id, user_id)
         
         if not membership:
             return False
         
-        group = Group.query.get(group_id)
+        group = request_loader().get(Group, group_id)
         
         # Additional check for creator (optional - you might want only creators to delete)
         # if group.created_by != user_id:
         #     return False
         
-        # Delete all members first
-        GroupMember.query.filter_by(group_id=group_id).delete()
-        
-        # Then delete the group
+        # The database deletes the memberships with it (ON DELETE CASCADE)
         db.session.delete(group)
         db.session.commit()
+        self._forget_group(group_id)
         
         return True
     
     def add_member(self, group_id, admin_user_id, user_id, is_admin=False):
         """Add a new member to the group"""
         # Check if the adding user is an admin
-        admin_membership = GroupMember.query.filter_by(
-            group_id=group_id,
-            user_id=admin_user_id,
-            is_admin=True
-        ).first()
+        admin_membership = self.get_admin_membership(group_id, admin_user_id)
         
         if not admin_membership:
             raise ValueError("Only group admins can add members")
         
         # Check if user exists
-        user = User.query.get(user_id)
+        user = request_loader().get(User, user_id)
         if not user:
             raise ValueError("User not found")
         
         # Check if user is already a member
-        existing_member = GroupMember.query.filter_by(
-            group_id=group_id,
-            user_id=user_id
-        ).first()
+        existing_member = self.get_membership(group_id, user_id)
         
         if existing_member:
             raise ValueError("User is already a member of this group")
@@ -157,44 +189,181 @@ class GroupService:
             is_admin=is_admin
         )
         
-        db.session.add(member)
-        db.session.commit()
+        try:
+            db.session.add(member)
+            self._count_members(group_id, 1, 1 if is_admin else 0)
+            db.session.commit()
+        except IntegrityError:
+            # Added by a concurrent request since the check above
+            db.session.rollback()
+            request_loader().forget(GroupMember, group_id, user_id)
+            raise ValueError("User is already a member of this group")
+        
+        request_loader().put(GroupMember, group_id, user_id, member)
         
         return member
     
+    def add_members(self, group_id, admin_user_id, members):
+        """
+        Add many members to a group in one transaction.
+        
+        Admin rights are checked once, the users are resolved with one IN
+        query, and the new memberships go in with one multi-row insert
+        that skips existing members (ON CONFLICT DO NOTHING on the unique
+        (group_id, user_id) index) and a single commit. Invalid items,
+        unknown users and existing members are skipped and reported;
+        everyone else is added.
+        
+        Args:
+            members: List of {"user_id": ..., "is_admin": ...} objects
+        
+        Returns:
+            list: One outcome per item, in order - status is added,
+            already_member or rejected (with an error)
+        """
+        max_items = current_app.config.get('GROUP_BATCH_MAX_MEMBERS', 1000)
+        
+        if not isinstance(members, list) or not members:
+            raise ValueError("Members must be a non-empty list")
+        
+        if len(members) > max_items:
+            raise ValueError(f"A batch cannot contain more than {max_items} members")
+        
+        if not self.get_admin_membership(group_id, admin_user_id):
+            raise ValueError("Only group admins can add members")
+        
+        results = []
+        wanted = {}
+        for index, item in enumerate(members):
+            user_id = item.get('user_id') if isinstance(item, dict) else None
+            result = {"index": index, "user_id": user_id, "status": "rejected"}
+            results.append(result)
+            
+            if not self._is_id(user_id):
+                result["error"] = "User ID must be an integer"
+            elif not isinstance(item.get('is_admin', False), bool):
+                result["error"] = "is_admin must be a boolean"
+            elif user_id in wanted:
+                result["error"] = "User is listed more than once"
+            else:
+                wanted[user_id] = (result, item.get('is_admin', False))
+        
+        if not wanted:
+            return results
+        
+        users = set(db.session.scalars(select(User.id).where(User.id.in_(list(wanted)))))
+        
+        rows = []
+        joined_at = datetime.utcnow()
+        for user_id, (result, is_admin) in wanted.items():
+            if user_id not in users:
+                result["error"] = "User not found"
+            else:
+                rows.append({"group_id": group_id, "user_id": user_id, "is_admin": is_admin, "joined_at": joined_at})
+        
+        if not rows:
+            return results
+        
+        added = dict(db.session.execute(
+            upsert_insert(GroupMember.__table__).values(rows)
+            .on_conflict_do_nothing(index_elements=['group_id', 'user_id'])
+            .returning(GroupMember.user_id, GroupMember.is_admin)
+        ).all())
+        
+        for row in rows:
+            result = wanted[row["user_id"]][0]
+            if row["user_id"] in added:
+                result.update(status="added", is_admin=row["is_admin"])
+            else:
+                result["status"] = "already_member"
+        
+        if added:
+            self._count_members(group_id, len(added), sum(1 for is_admin in added.values() if is_admin))
+        db.session.commit()
+        request_loader().forget(GroupMember, group_id)
+        
+        return results
+    
+    def remove_members(self, group_id, admin_user_id, user_ids):
+        """
+        Remove many members from a group with one DELETE and a single commit.
+        
+        Like remove_member, the batch is refused if it would leave the group
+        without an admin.
+        
+        Returns:
+            list: One outcome per user id, in order - status is removed,
+            not_member or rejected (with an error)
+        """
+        max_items = current_app.config.get('GROUP_BATCH_MAX_MEMBERS', 1000)
+        
+        if not isinstance(user_ids, list) or not user_ids:
+            raise ValueError("User IDs must be a non-empty list")
+        
+        if len(user_ids) > max_items:
+            raise ValueError(f"A batch cannot contain more than {max_items} members")
+        
+        if not self.get_admin_membership(group_id, admin_user_id):
+            raise ValueError("Only group admins can remove members")
+        
+        results = []
+        wanted = {}
+        for index, user_id in enumerate(user_ids):
+            result = {"index": index, "user_id": user_id, "status": "rejected"}
+            results.append(result)
+            
+            if not self._is_id(user_id):
+                result["error"] = "User ID must be an integer"
+            elif user_id in wanted:
+                result["error"] = "User is listed more than once"
+            else:
+                wanted[user_id] = result
+        
+        if not wanted:
+            return results
+        
+        removed = self._delete_members(group_id, list(wanted))
+        
+        if removed and not self._count_members(group_id, -len(removed),
+                                               -sum(1 for is_admin in removed.values() if is_admin)):
+            db.session.rollback()
+            raise ValueError("Cannot remove the last admin from the group")
+        
+        for user_id, result in wanted.items():
+            result["status"] = "removed" if user_id in removed else "not_member"
+        
+        db.session.commit()
+        request_loader().forget(GroupMember, group_id)
+        
+        return results
+    
     def remove_member(self, group_id, admin_user_id, user_id):
         """Remove a member from the group"""
         # Check if the removing user is an admin
-        admin_membership = GroupMember.query.filter_by(
-            group_id=group_id,
-            user_id=admin_user_id,
-            is_admin=True
-        ).first()
+        admin_membership = self.get_admin_membership(group_id, admin_user_id)
         
         if not admin_membership:
             raise ValueError("Only group admins can remove members")
         
         # Check if target user is a member
-        member = GroupMember.query.filter_by(
-            group_id=group_id,
-            user_id=user_id
-        ).first()
+        member = self.get_membership(group_id, user_id)
         
         if not member:
             return False
         
+        removed = self._delete_members(group_id, [user_id])
+        request_loader().forget(GroupMember, group_id, user_id)
+        
+        if not removed:
+            # Removed by a concurrent request
+            db.session.rollback()
+            return False
+        
         # Prevent removing the last admin
-        if member.is_admin:
-            # Check if this is the last admin
-            admin_count = GroupMember.query.filter_by(
-                group_id=group_id,
-                is_admin=True
-            ).count()
-            
-            if admin_count <= 1:
-                raise ValueError("Cannot remove the last admin from the group")
+        if not self._count_members(group_id, -1, -1 if any(removed.values()) else 0):
+            db.session.rollback()
+            raise ValueError("Cannot remove the last admin from the group")
         
-        db.session.delete(member)
         db.session.commit()
         
         return True
@@ -202,36 +371,30 @@ class GroupService:
     def update_member(self, group_id, admin_user_id, user_id, is_admin):
         """Update a member's admin status"""
         # Check if the updating user is an admin
-        admin_membership = GroupMember.query.filter_by(
-            group_id=group_id,
-            user_id=admin_user_id,
-            is_admin=True
-        ).first()
+        admin_membership = self.get_admin_membership(group_id, admin_user_id)
         
         if not admin_membership:
             raise ValueError("Only group admins can update members")
         
         # Check if target user is a member
-        member = GroupMember.query.filter_by(
-            group_id=group_id,
-            user_id=user_id
-        ).first()
+        member = self.get_membership(group_id, user_id)
         
         if not member:
             return None
         
+        is_admin = bool(is_admin)
+        changed = db.session.execute(
+            update(GroupMember)
+            .where(GroupMember.id == member.id, GroupMember.is_admin.is_not(is_admin))
+            .values(is_admin=is_admin)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        
         # If removing admin status, check that this isn't the last admin
-        if member.is_admin and not is_admin:
-            # Check if this is the last admin
-            admin_count = GroupMember.query.filter_by(
-                group_id=group_id,
-                is_admin=True
-            ).count()
-            
-            if admin_count <= 1:
-                raise ValueError("Cannot remove the last admin from the group")
+        if changed and not self._count_members(group_id, 0, 1 if is_admin else -1):
+            db.session.rollback()
+            raise ValueError("Cannot remove the last admin from the group")
         
-        member.is_admin = is_admin
         db.session.commit()
         
         return member
@@ -239,36 +402,250 @@ class GroupService:
     def leave_group(self, group_id, user_id):
         """Leave a group"""
         # Check if user is a member
-        member = GroupMember.query.filter_by(
-            group_id=group_id,
-            user_id=user_id
-        ).first()
+        member = self.get_membership(group_id, user_id)
         
         if not member:
             return False
         
+        removed = self._delete_members(group_id, [user_id])
+        request_loader().forget(GroupMember, group_id, user_id)
+        
+        if not removed:
+            # Left in a concurrent request
+            db.session.rollback()
+            return False
+        
         # Check if this is the last admin
-        if member.is_admin:
-            admin_count = GroupMember.query.filter_by(
-                group_id=group_id,
-                is_admin=True
-            ).count()
+        if not self._count_members(group_id, -1, -1 if any(removed.values()) else 0):
+            db.session.rollback()
+            group = request_loader().get(Group, group_id)
+            
+            # Check if there are other members who could become admin
+            if group.member_count > 1:
+                raise ValueError("You are the last admin. Promote another member to admin before leaving.")
             
-            if admin_count <= 1:
-                # Check if there are other members who could become admin
-                member_count = GroupMember.query.filter_by(group_id=group_id).count()
-                
-                if member_count > 1:
-                    raise ValueError("You are the last admin. Promote another member to admin before leaving.")
-                else:
-                    # User is the last member, delete the group
-                    group = Group.query.get(group_id)
-                    db.session.delete(group)
-                    db.session.commit()
-                    return True
+            # User is the last member, delete the group
+            db.session.delete(group)
+            db.session.commit()
+            self._forget_group(group_id)
+            return True
         
         # User can leave
-        db.session.delete(member)
         db.session.commit()
         
-        return True
\ No newline at end of file
+        return True
+    
+    def leave_all_groups(self, user_id):
+        """
+        Take a user out of every group they are in, e.g. before deleting them
+        (the database would cascade the memberships, but not the counters).
+        Caller commits.
+        
+        Nobody is left behind to promote someone first, so, unlike
+        leave_group, this promotes the earliest-joined remaining member of a
+        group the user was the last admin of, and deletes a group the user
+        was the last member of.
+        
+        Returns:
+            int: Groups left
+        """
+        removed = db.session.execute(
+            delete(GroupMember).where(GroupMember.user_id == user_id)
+            .returning(GroupMember.group_id, GroupMember.is_admin)
+            .execution_options(synchronize_session=False)
+        ).all()
+        
+        for group_id, is_admin in removed:
+            self._count_members(group_id, -1, -1 if is_admin else 0, keep_admin=False)
+        
+        orphaned = db.session.execute(
+            select(Group.id, Group.member_count)
+            .where(Group.id.in_([group_id for group_id, _ in removed]), Group.admin_count == 0)
+        ).all()
+        
+        for group_id, member_count in orphaned:
+            if member_count:
+                self._promote_earliest_member(group_id)
+            else:
+                db.session.execute(
+                    delete(Group).where(Group.id == group_id).execution_options(synchronize_session=False)
+                )
+                self._forget_group(group_id)
+        
+        return len(removed)
+    
+    def repair_counts(self, chunk_size=1000):
+        """
+        Recompute every group's member_count and admin_count from
+        group_members, one chunk of groups per transaction.
+        
+        Yields:
+            tuple: (groups checked, groups repaired, last group id) after each committed chunk
+        """
+        members = select(func.count()).where(GroupMember.group_id == Group.id).scalar_subquery()
+        admins = select(func.count()).where(GroupMember.group_id == Group.id, GroupMember.is_admin.is_(True))\
+            .scalar_subquery()
+        checked = repaired = 0
+        last_group_id = 0
+        
+        while True:
+            group_ids = list(db.session.scalars(
+                select(Group.id).where(Group.id > last_group_id).order_by(Group.id).limit(chunk_size)
+            ))
+            if not group_ids:
+                break
+            
+            repaired += db.session.execute(
+                update(Group)
+                .where(Group.id.in_(group_ids), (Group.member_count != members) | (Group.admin_count != admins))
+                .values(member_count=members, admin_count=admins)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.session.commit()
+            
+            checked += len(group_ids)
+            last_group_id = group_ids[-1]
+            yield checked, repaired, last_group_id
+    
+    def get_leaderboard(self, group_id, user_id, metric='deposits', period='month', limit=10):
+        """
+        Rank a group's members by their deposits or goal contributions over
+        a period, with the group's totals, if user is a member.
+        
+        Computed from savings_rollups with one grouped query joined through
+        group_members, and cached until a member writes or the membership
+        changes (see CacheService.group_version). The rollups are monthly,
+        so periods are calendar ones: this month, this year or all time.
+        
+        Returns:
+            dict: The leaderboard, or None if the user is not a member
+        """
+        max_limit = current_app.config.get('GROUP_LEADERBOARD_MAX_LIMIT', 100)
+        
+        if metric not in self.LEADERBOARD_METRICS:
+            raise ValueError(f"Metric must be one of: {', '.join(self.LEADERBOARD_METRICS)}")
+        
+        if period not in self.LEADERBOARD_PERIODS:
+            raise ValueError(f"Period must be one of: {', '.join(self.LEADERBOARD_PERIODS)}")
+        
+        if not self._is_id(limit) or not 1 <= limit <= max_limit:
+            raise ValueError(f"Limit must be between 1 and {max_limit}")
+        
+        if not self.get_membership(group_id, user_id):
+            return None
+        
+        return self.cache.get_or_compute_for_group(
+            group_id,
+            'group_leaderboard',
+            lambda: self._build_leaderboard(group_id, metric, period, limit),
+            metric=metric,
+            period=period,
+            limit=limit
+        )
+    
+    # Private methods
+    def _build_leaderboard(self, group_id, metric, period, limit):
+        today = datetime.utcnow()
+        since = {'month': today.strftime('%Y-%m'), 'year': f'{today.year}-01', 'all': None}[period]
+        
+        amount = func.sum(SavingsRollup.total)
+        count = func.sum(SavingsRollup.count)
+        query = db.session.query(
+            SavingsRollup.user_id,
+            User.name,
+            amount,
+            count,
+            func.rank().over(order_by=amount.desc()),
+            # Group totals over every contributor, not only the top `limit`
+            func.sum(amount).over(),
+            func.sum(count).over(),
+            func.count().over()
+        ).join(GroupMember, GroupMember.user_id == SavingsRollup.user_id)\
+            .join(User, User.id == SavingsRollup.user_id)\
+            .filter(GroupMember.group_id == group_id, SavingsRollup.type == self.LEADERBOARD_METRICS[metric])
+        
+        if since:
+            query = query.filter(SavingsRollup.month >= since)
+        
+        rows = query.group_by(SavingsRollup.user_id, User.name)\
+            .order_by(amount.desc(), SavingsRollup.user_id)\
+            .limit(limit)\
+            .all()
+        
+        total_amount, total_count, contributors = rows[0][5:] if rows else (0, 0, 0)
+        
+        return {
+            'group_id': group_id,
+            'metric': metric,
+            'period': period,
+            'since': since,
+            'totals': {
+                'amount': float(total_amount or 0),
+                'count': int(total_count or 0),
+                'contributors': contributors,
+                'members': request_loader().get(Group, group_id).member_count
+            },
+            'leaders': [
+                {
+                    'rank': rank,
+                    'user_id': member_id,
+                    'name': name,
+                    'amount': float(member_amount or 0),
+                    'count': int(member_count or 0)
+                }
+                for member_id, name, member_amount, member_count, rank, *_ in rows
+            ]
+        }
+    
+    def _is_id(self, value):
+        return isinstance(value, int) and not isinstance(value, bool)
+    
+    def _delete_members(self, group_id, user_ids):
+        """Delete the memberships of user_ids (caller commits); returns {user_id: is_admin} of those deleted"""
+        return dict(db.session.execute(
+            delete(GroupMember)
+            .where(GroupMember.group_id == group_id, GroupMember.user_id.in_(user_ids))
+            .returning(GroupMember.user_id, GroupMember.is_admin)
+            .execution_options(synchronize_session=False)
+        ).all())
+    
+    def _promote_earliest_member(self, group_id):
+        """Make the group's earliest-joined member an admin (caller commits)"""
+        earliest = select(GroupMember.id).where(GroupMember.group_id == group_id)\
+            .order_by(GroupMember.joined_at, GroupMember.id)\
+            .limit(1)\
+            .scalar_subquery()
+        
+        promoted = db.session.execute(
+            update(GroupMember).where(GroupMember.id == earliest, GroupMember.is_admin.is_(False))
+            .values(is_admin=True)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if promoted:
+            self._count_members(group_id, 0, 1)
+            request_loader().forget(GroupMember, group_id)
+    
+    def _count_members(self, group_id, members, admins, keep_admin=True):
+        """
+        Move a group's member_count and admin_count by the given deltas
+        (caller commits). While keep_admin, an update that would take the
+        last admins away does not apply.
+        
+        Returns:
+            bool: Whether the counters moved
+        """
+        statement = update(Group).where(Group.id == group_id)
+        if keep_admin and admins < 0:
+            statement = statement.where(Group.admin_count > -admins)
+        
+        # updated_at moves too (onupdate): the group's member_count is part of its listing
+        return db.session.execute(
+            statement.values(member_count=Group.member_count + members, admin_count=Group.admin_count + admins)
+            .execution_options(synchronize_session=False)
+        ).rowcount == 1
+    
+    def _forget_group(self, group_id):
+        """Drop a deleted group and its memberships from the request's loader"""
+        loader = request_loader()
+        loader.forget(Group, group_id)
+        loader.forget(GroupMember, group_id)
\ No newline at end of file
@@ -0,0 +1,161 @@
+from app import db
+from app.models.idempotency import IdempotencyKey
+from app.utils.db import upsert_insert
+from flask import current_app
+from sqlalchemy import update, or_, and_
+from datetime import datetime
+
+class IdempotencyKeyLost(Exception):
+    """A retry took over the request's Idempotency-Key before the request's write committed."""
+    pass
+
+class IdempotencyService:
+    """
+    Idempotency keys and the stored responses of the requests that own them.
+    
+    A key is in_flight while its request runs. The first commit of the
+    request's write also marks the key committed, in that same transaction
+    (see utils.idempotency), and the response is stored once the endpoint
+    returns. A committed key is never taken over, so a request whose write
+    went in is not run again, even if its process dies before the response
+    is stored; and a request whose key was taken over cannot commit.
+    """
+    def get(self, user_id, key):
+        """Get the current state of an idempotency key"""
+        return IdempotencyKey.query.filter_by(user_id=user_id, key=key)\
+            .execution_options(populate_existing=True)\
+            .first()
+    
+    def claim(self, user_id, key, request_hash):
+        """
+        Try to claim an idempotency key for a new request.
+        
+        The claim is committed straight away so concurrent duplicates see it.
+        Expired keys and abandoned in-flight claims are taken over; claims
+        whose write has committed are not.
+        
+        Returns:
+            tuple: (record, claimed) - claimed is False when another request
+            owns the key, in which case record is its current state
+        """
+        now = datetime.utcnow()
+        expires_at = now + current_app.config.get('IDEMPOTENCY_KEY_TTL')
+        abandoned_before = now - current_app.config.get('IDEMPOTENCY_LOCK_TIMEOUT')
+        
+        stmt = upsert_insert(IdempotencyKey).values(
+            user_id=user_id,
+            key=key,
+            request_hash=request_hash,
+            status='in_flight',
+            locked_at=now,
+            created_at=now,
+            expires_at=expires_at
+        ).on_conflict_do_nothing(index_elements=['user_id', 'key'])
+        inserted = db.session.execute(stmt).rowcount
+        
+        if not inserted:
+            # Take over the key if its stored outcome has expired or its
+            # owner died without completing or releasing it
+            inserted = db.session.execute(
+                update(IdempotencyKey)
+                .where(
+                    IdempotencyKey.user_id == user_id,
+                    IdempotencyKey.key == key,
+                    or_(
+                        IdempotencyKey.expires_at <= now,
+                        and_(IdempotencyKey.status == 'in_flight', IdempotencyKey.locked_at < abandoned_before)
+                    )
+                )
+                .values(
+                    request_hash=request_hash,
+                    status='in_flight',
+                    response_code=None,
+                    response_body=None,
+                    response_mimetype=None,
+                    locked_at=now,
+                    expires_at=expires_at
+                )
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        
+        db.session.commit()
+        
+        record = self.get(user_id, key)
+        return record, bool(inserted) and record is not None and record.locked_at == now
+    
+    def mark_committed(self, record_id, locked_at):
+        """
+        Mark a claimed key's write as committed, in the transaction about to
+        commit it (caller commits).
+        
+        Raises:
+            IdempotencyKeyLost: If the claim (identified by its locked_at) was taken over
+        """
+        updated = db.session.execute(
+            self._owned(record_id, locked_at).values(status='committed')
+        ).rowcount
+        
+        if not updated:
+            raise IdempotencyKeyLost("The Idempotency-Key was taken over by a retry of this request")
+    
+    def complete(self, record_id, locked_at, status_code, body, mimetype):
+        """Store the response of the request that owns the key"""
+        db.session.rollback()
+        db.session.execute(
+            self._owned(record_id, locked_at).values(
+                status='completed',
+                response_code=status_code,
+                response_body=body,
+                response_mimetype=mimetype
+            )
+        )
+        db.session.commit()
+    
+    def release(self, record_id, locked_at):
+        """
+        Give up a claimed key so the request can be retried for real.
+        
+        Returns:
+            bool: False if the request's write had already committed, so the
+            key was kept (a retry must not run it again)
+        """
+        db.session.rollback()
+        released = IdempotencyKey.query\
+            .filter_by(id=record_id, locked_at=locked_at, status='in_flight')\
+            .delete(synchronize_session=False)
+        db.session.commit()
+        return bool(released)
+    
+    def _owned(self, record_id, locked_at):
+        """UPDATE of a key while its claim is still the one taken at locked_at"""
+        return update(IdempotencyKey)\
+            .where(
+                IdempotencyKey.id == record_id,
+                IdempotencyKey.locked_at == locked_at,
+                IdempotencyKey.status.in_(['in_flight', 'committed'])
+            )\
+            .execution_options(synchronize_session=False)
+    
+    def sweep_expired(self, batch_size=1000):
+        """
+        Delete expired idempotency keys in batches, one transaction per batch.
+        
+        Yields:
+            int: Number of keys deleted by each batch
+        """
+        while True:
+            expired_ids = [
+                row[0] for row in db.session.query(IdempotencyKey.id)
+                .filter(IdempotencyKey.expires_at <= datetime.utcnow())
+                .limit(batch_size)
+                .all()
+            ]
+            
+            if not expired_ids:
+                break
+            
+            IdempotencyKey.query.filter(IdempotencyKey.id.in_(expired_ids))\
+                .delete(synchronize_session=False)
+            db.session.commit()
+            
+            yield len(expired_ids)
@@ -0,0 +1,183 @@
+from app import create_app, db
+from app.config import Config
+from app.models.goal import Goal
+from app.models.savings import SavingsUpdate
+from app.models.wallet import Wallet
+from app.services.cache_service import CacheService
+from flask import current_app
+from sqlalchemy import and_, case, func, select, update
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from decimal import Decimal
+
+class LedgerService:
+    """Checks the denormalized wallet and goal balances against savings_updates"""
+    
+    # How each ledger type moves its wallet's balance ('transfer' moves nothing)
+    CREDIT_TYPES = ['deposit', 'transfer_in']
+    DEBIT_TYPES = ['withdrawal', 'goal_contribution', 'transfer_out']
+    
+    # Amounts are in cents; smaller differences are floating point noise
+    # from databases without an exact NUMERIC (SQLite)
+    TOLERANCE = Decimal('0.005')
+    
+    # Rows fetched per round trip when streaming drift results
+    STREAM_BATCH = 1000
+    
+    cache = CacheService()
+    
+    def signed_amount(self):
+        """SQL expression for a ledger row's effect on its wallet's balance"""
+        return case(
+            (SavingsUpdate.type.in_(self.CREDIT_TYPES), SavingsUpdate.amount),
+            (SavingsUpdate.type.in_(self.DEBIT_TYPES), -SavingsUpdate.amount),
+            else_=0
+        )
+    
+    def sign(self, savings_type):
+        """+1, -1 or 0: how a ledger type moves its wallet's balance"""
+        if savings_type in self.CREDIT_TYPES:
+            return 1
+        if savings_type in self.DEBIT_TYPES:
+            return -1
+        return 0
+    
+    def _target(self, kind):
+        """(model, balance column, ledger key column, ledger amount) for a kind of balance"""
+        if kind == 'wallet':
+            return Wallet, Wallet.amount, SavingsUpdate.wallet_id, self.signed_amount()
+        if kind == 'goal':
+            contribution = case((SavingsUpdate.type == 'goal_contribution', SavingsUpdate.amount), else_=0)
+            return Goal, Goal.current_amount, SavingsUpdate.goal_id, contribution
+        raise ValueError(f"Unknown balance kind: {kind}")
+    
+    def id_ranges(self, kind, chunk_size=10000):
+        """
+        Split the id space of wallets or goals into half-open [start, end) ranges.
+        
+        Returns:
+            tuple: (list of ranges, number of rows to check)
+        """
+        model = self._target(kind)[0]
+        low, high, total = db.session.query(func.min(model.id), func.max(model.id), func.count(model.id)).one()
+        
+        if low is None:
+            return [], 0
+        
+        return [(start, min(start + chunk_size, high + 1)) for start in range(low, high + 1, chunk_size)], total
+    
+    def reconcile_range(self, kind, start, end, rebuild=False):
+        """
+        Compare stored balances with the ledger for ids in [start, end).
+        
+        The ledger is summed per wallet/goal by the database and only rows
+        that disagree are streamed back, so memory is bounded by the range
+        size whatever the ledger size. With rebuild, each drifted balance is
+        reset to its ledger sum unless it was written since it was read.
+        
+        Returns:
+            dict: checked, drifted (list of (id, stored, ledger)), rebuilt
+        """
+        model, balance, ledger_key, ledger_amount = self._target(kind)
+        
+        ledger = select(ledger_key.label('owner_id'), func.sum(ledger_amount).label('total'))\
+            .where(ledger_key >= start, ledger_key < end)\
+            .group_by(ledger_key)\
+            .subquery()
+        ledger_total = func.coalesce(ledger.c.total, 0)
+        
+        # Wallets a deletion job is emptying disagree with their ledger until they are gone
+        in_range = [model.id >= start, model.id < end]
+        if hasattr(model, 'is_deleted'):
+            in_range.append(model.is_deleted.is_(False))
+        
+        stmt = select(model.id, model.version_id, balance, ledger_total)\
+            .outerjoin(ledger, ledger.c.owner_id == model.id)\
+            .where(*in_range)\
+            .where(func.abs(balance - ledger_total) > self.TOLERANCE)\
+            .order_by(model.id)
+        
+        checked = db.session.query(func.count(model.id)).filter(*in_range).scalar()
+        
+        drifted = []
+        versions = []
+        result = db.session.execute(stmt, execution_options={'stream_results': True, 'yield_per': self.STREAM_BATCH})
+        for owner_id, version_id, stored, total in result:
+            drifted.append((owner_id, Decimal(str(stored)), Decimal(str(total))))
+            versions.append(version_id)
+        
+        rebuilt = 0
+        if rebuild:
+            for (owner_id, _, total), version_id in zip(drifted, versions):
+                rebuilt += self._rebuild(kind, owner_id, version_id, total)
+            db.session.commit()
+        else:
+            db.session.rollback()
+        
+        return {"checked": checked, "drifted": drifted, "rebuilt": rebuilt}
+    
+    def _rebuild(self, kind, owner_id, version_id, total):
+        """Reset one balance to its ledger sum if its version is unchanged"""
+        model, balance = self._target(kind)[:2]
+        values = {balance.key: total, 'version_id': model.version_id + 1}
+        
+        if kind == 'goal':
+            values['achieved'] = case((Goal.target_amount <= total, True), else_=Goal.achieved)
+        
+        user_id = db.session.execute(
+            update(model)
+            .where(and_(model.id == owner_id, model.version_id == version_id))
+            .values(**values)
+            .returning(model.user_id)
+            .execution_options(synchronize_session=False)
+        ).scalar_one_or_none()
+        
+        if user_id is None:
+            return 0
+        
+        self.cache.bump(user_id)
+        return 1
+    
+    def reconcile(self, kind, chunk_size=10000, workers=1, rebuild=False):
+        """
+        Reconcile every wallet or goal, one id range at a time.
+        
+        With workers > 1 the ranges are spread over a process pool, each
+        process with its own database connection.
+        
+        Yields:
+            tuple: (range result, rows to check in total) as each range finishes
+        """
+        ranges, total = self.id_ranges(kind, chunk_size)
+        
+        if workers <= 1:
+            for start, end in ranges:
+                yield self.reconcile_range(kind, start, end, rebuild), total
+            return
+        
+        initargs = (
+            current_app.config['SQLALCHEMY_DATABASE_URI'],
+            current_app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        )
+        db.session.remove()
+        
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+            futures = [pool.submit(_reconcile_range, kind, start, end, rebuild) for start, end in ranges]
+            for future in as_completed(futures):
+                yield future.result(), total
+
+_worker_context = None
+
+def _init_worker(database_uri, engine_options):
+    """Give a pool process its own app and database connection"""
+    global _worker_context
+    
+    config = type('LedgerWorkerConfig', (Config,), {
+        'SQLALCHEMY_DATABASE_URI': database_uri,
+        'SQLALCHEMY_ENGINE_OPTIONS': engine_options
+    })
+    _worker_context = create_app(config).app_context()
+    _worker_context.push()
+
+def _reconcile_range(kind, start, end, rebuild):
+    """Pool entry point for LedgerService.reconcile_range"""
+    return LedgerService().reconcile_range(kind, start, end, rebuild)
@@ -0,0 +1,186 @@
+from app import db
+from app.models.rollup import SavingsRollup
+from app.models.savings import SavingsUpdate
+from app.models.user import User
+from app.services.cache_service import CacheService
+from app.utils.db import month_bucket, upsert_insert
+from sqlalchemy import func, case, insert, select
+from datetime import datetime
+from types import SimpleNamespace
+
+class RollupService:
+    """Keeps savings_rollups in step with savings_updates"""
+    
+    cache = CacheService()
+    
+    def record(self, savings_update):
+        """Fold a flushed savings update into its monthly rollup (caller commits)"""
+        self.record_many([savings_update])
+    
+    def record_many(self, savings_updates):
+        """
+        Fold savings updates into their monthly rollups with one upsert (caller commits).
+        
+        Accepts model instances or the dicts given to a bulk insert; each
+        needs user_id, wallet_id, amount, type and created_at.
+        """
+        buckets = {}
+        for update in savings_updates:
+            if isinstance(update, dict):
+                update = SimpleNamespace(**update)
+            key = (update.user_id, update.wallet_id, self.month_key(update.created_at), update.type)
+            amount = update.amount
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = [amount, 1, amount, amount]
+            else:
+                bucket[0] += amount
+                bucket[1] += 1
+                bucket[2] = min(bucket[2], amount)
+                bucket[3] = max(bucket[3], amount)
+        
+        if not buckets:
+            return
+        
+        now = datetime.utcnow()
+        stmt = upsert_insert(SavingsRollup).values([
+            dict(
+                user_id=user_id,
+                wallet_id=wallet_id,
+                month=month,
+                type=savings_type,
+                total=total,
+                count=count,
+                min_amount=min_amount,
+                max_amount=max_amount,
+                updated_at=now
+            )
+            for (user_id, wallet_id, month, savings_type), (total, count, min_amount, max_amount) in buckets.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'wallet_id', 'month', 'type'],
+            set_={
+                'total': SavingsRollup.total + stmt.excluded.total,
+                'count': SavingsRollup.count + stmt.excluded.count,
+                'min_amount': case(
+                    (stmt.excluded.min_amount < SavingsRollup.min_amount, stmt.excluded.min_amount),
+                    else_=SavingsRollup.min_amount
+                ),
+                'max_amount': case(
+                    (stmt.excluded.max_amount > SavingsRollup.max_amount, stmt.excluded.max_amount),
+                    else_=SavingsRollup.max_amount
+                ),
+                'updated_at': stmt.excluded.updated_at
+            }
+        )
+        db.session.execute(stmt)
+    
+    def revert(self, savings_update):
+        """Remove a deleted savings update from its rollup (call after the delete is flushed)"""
+        # min/max cannot be decremented, so the single affected bucket is
+        # recomputed from the ledger instead
+        self.refresh_bucket(
+            savings_update.user_id,
+            savings_update.wallet_id,
+            self.month_key(savings_update.created_at),
+            savings_update.type
+        )
+    
+    def refresh_bucket(self, user_id, wallet_id, month, savings_type):
+        """Recompute one (user, wallet, month, type) rollup from savings_updates"""
+        month_start = datetime.strptime(month, '%Y-%m')
+        if month_start.month == 12:
+            month_end = datetime(month_start.year + 1, 1, 1)
+        else:
+            month_end = datetime(month_start.year, month_start.month + 1, 1)
+        
+        total, count, min_amount, max_amount = db.session.query(
+            func.sum(SavingsUpdate.amount),
+            func.count(SavingsUpdate.id),
+            func.min(SavingsUpdate.amount),
+            func.max(SavingsUpdate.amount)
+        ).filter(
+            SavingsUpdate.user_id == user_id,
+            SavingsUpdate.wallet_id == wallet_id,
+            SavingsUpdate.type == savings_type,
+            SavingsUpdate.created_at >= month_start,
+            SavingsUpdate.created_at < month_end
+        ).one()
+        
+        key = dict(user_id=user_id, wallet_id=wallet_id, month=month, type=savings_type)
+        if not count:
+            SavingsRollup.query.filter_by(**key).delete(synchronize_session=False)
+            return
+        
+        stmt = upsert_insert(SavingsRollup).values(
+            total=total, count=count, min_amount=min_amount, max_amount=max_amount,
+            updated_at=datetime.utcnow(), **key
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key),
+            set_={
+                'total': stmt.excluded.total,
+                'count': stmt.excluded.count,
+                'min_amount': stmt.excluded.min_amount,
+                'max_amount': stmt.excluded.max_amount,
+                'updated_at': stmt.excluded.updated_at
+            }
+        )
+        db.session.execute(stmt)
+    
+    def forget_wallet(self, wallet_id):
+        """Drop a wallet's rollups, so reports stop counting it before it is gone (caller commits)"""
+        SavingsRollup.query.filter_by(wallet_id=wallet_id).delete(synchronize_session=False)
+    
+    def backfill(self, chunk_size=500):
+        """
+        Rebuild savings_rollups from savings_updates, one chunk of users per transaction.
+        
+        Yields:
+            tuple: (users_processed, last_user_id) after each committed chunk
+        """
+        month = month_bucket(SavingsUpdate.created_at)
+        processed = 0
+        last_user_id = None
+        
+        while True:
+            query = db.session.query(User.id).order_by(User.id)
+            if last_user_id is not None:
+                query = query.filter(User.id > last_user_id)
+            user_ids = [row[0] for row in query.limit(chunk_size).all()]
+            
+            if not user_ids:
+                break
+            
+            SavingsRollup.query.filter(SavingsRollup.user_id.in_(user_ids))\
+                .delete(synchronize_session=False)
+            
+            aggregates = select(
+                SavingsUpdate.user_id,
+                SavingsUpdate.wallet_id,
+                month,
+                SavingsUpdate.type,
+                func.sum(SavingsUpdate.amount),
+                func.count(SavingsUpdate.id),
+                func.min(SavingsUpdate.amount),
+                func.max(SavingsUpdate.amount),
+                func.max(SavingsUpdate.created_at)
+            ).where(SavingsUpdate.user_id.in_(user_ids))\
+                .group_by(SavingsUpdate.user_id, SavingsUpdate.wallet_id, month, SavingsUpdate.type)
+            
+            db.session.execute(insert(SavingsRollup).from_select(
+                ['user_id', 'wallet_id', 'month', 'type', 'total', 'count',
+                 'min_amount', 'max_amount', 'updated_at'],
+                aggregates
+            ))
+            self.cache.bump_many(user_ids)
+            db.session.commit()
+            
+            processed += len(user_ids)
+            last_user_id = user_ids[-1]
+            yield processed, last_user_id
+    
+    @staticmethod
+    def month_key(timestamp):
+        """'YYYY-MM' rollup key for a timestamp (matches utils.db.month_bucket)"""
+        return timestamp.strftime('%Y-%m')
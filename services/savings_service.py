@@ -1,30 +1,89 @@
 from app import db
 from app.models.savings import SavingsUpdate
+from app.models.rows import SavingsUpdateRow
 from app.models.wallet import Wallet
-from app.models.goal import Goal
+from app.models.rollup import SavingsRollup
+from app.services.goal_service import GoalService
+from app.services.cache_service import CacheService
+from app.services.rollup_service import RollupService
+from app.services.snapshot_service import SnapshotService
+from app.services.wallet_service import WalletService
+from app.utils.db import keyset_paginate
 from decimal import Decimal
-from sqlalchemy import func, desc
+from sqlalchemy import func, case
 from datetime import datetime, timedelta
 
 class SavingsService:
-    def get_user_savings_updates(self, user_id, wallet_id=None, goal_id=None, savings_type=None):
-        """Get savings updates for a user with optional filters"""
-        query = SavingsUpdate.query.filter_by(user_id=user_id)
+    cache = CacheService()
+    rollups = RollupService()
+    snapshots = SnapshotService()
+    wallets = WalletService()
+    goals = GoalService()
+    
+    # Rows fetched per round trip when streaming an export
+    EXPORT_BATCH = 1000
+    
+    def get_user_savings_updates(self, user_id, wallet_id=None, goal_id=None, savings_type=None,
+                                 cursor=None, limit=20, include_total=False):
+        """Get a page of savings updates for a user with optional filters, as read-only rows"""
+        query = SavingsUpdateRow.select()\
+            .join(Wallet, Wallet.id == SavingsUpdate.wallet_id)\
+            .where(SavingsUpdate.user_id == user_id, Wallet.is_deleted.is_(False))
         
         if wallet_id:
-            query = query.filter_by(wallet_id=wallet_id)
+            query = query.where(SavingsUpdate.wallet_id == wallet_id)
         
         if goal_id:
-            query = query.filter_by(goal_id=goal_id)
+            query = query.where(SavingsUpdate.goal_id == goal_id)
         
         if savings_type:
-            query = query.filter_by(type=savings_type)
+            query = query.where(SavingsUpdate.type == savings_type)
+        
+        return keyset_paginate(
+            query,
+            [SavingsUpdate.created_at, SavingsUpdate.id],
+            cursor=cursor,
+            limit=limit,
+            include_total=include_total,
+            row=SavingsUpdateRow
+        )
+    
+    def iter_export(self, user_id, start=None, end=None):
+        """
+        Stream a user's savings updates oldest first, optionally within [start, end].
+        
+        The query runs (and the range is checked) when this is called; the
+        rows are then read through a server-side cursor, so only one batch is
+        in memory at a time whatever the size of the history.
+        
+        Returns:
+            iterator: Lists of up to EXPORT_BATCH read-only rows (SavingsUpdateRow)
+        """
+        if start and end and start > end:
+            raise ValueError("'from' must not be after 'to'")
+        
+        query = SavingsUpdateRow.select()\
+            .join(Wallet, Wallet.id == SavingsUpdate.wallet_id)\
+            .where(SavingsUpdate.user_id == user_id, Wallet.is_deleted.is_(False))
+        
+        if start:
+            query = query.where(SavingsUpdate.created_at >= start)
+        
+        if end:
+            query = query.where(SavingsUpdate.created_at <= end)
         
-        return query.order_by(SavingsUpdate.updated_at.desc()).all()
+        result = db.session.execute(
+            query.order_by(SavingsUpdate.created_at, SavingsUpdate.id),
+            execution_options={'stream_results': True, 'yield_per': self.EXPORT_BATCH}
+        )
+        return ([SavingsUpdateRow(*row) for row in batch] for batch in result.partitions())
     
     def get_savings_update(self, update_id, user_id):
-        """Get a specific savings update"""
-        return SavingsUpdate.query.filter_by(id=update_id, user_id=user_id).first()
+        """Get a specific savings update, unless its wallet is being deleted"""
+        return SavingsUpdate.query\
+            .join(Wallet, Wallet.id == SavingsUpdate.wallet_id)\
+            .filter(SavingsUpdate.id == update_id, SavingsUpdate.user_id == user_id, Wallet.is_deleted.is_(False))\
+            .first()
     
     def create_savings_update(self, user_id, wallet_id, amount, savings_type, goal_id=None, description=None):
         """Create a new savings update record"""
@@ -32,34 +91,39 @@ class SavingsService:
         if not isinstance(amount, (int, float, Decimal)) or amount <= 0:
             raise ValueError("Amount must be a positive number")
         
-        # Verify wallet exists and belongs to user
-        wallet = Wallet.query.filter_by(id=wallet_id, user_id=user_id).first()
-        if not wallet:
-            raise ValueError("Wallet not found or unauthorized")
-        
-        # If goal_id provided, verify it exists and belongs to user
-        if goal_id:
-            goal = Goal.query.filter_by(id=goal_id, user_id=user_id).first()
-            if not goal:
-                raise ValueError("Goal not found or unauthorized")
-        
         # Validate savings_type
         valid_types = ['deposit', 'withdrawal', 'goal_contribution', 'transfer']
         if savings_type not in valid_types:
             raise ValueError(f"Invalid savings type. Must be one of: {', '.join(valid_types)}")
         
-        # Update wallet balance based on type
+        amount = Decimal(str(amount))
+        
+        # Update wallet balance based on type; the conditional UPDATE also
+        # verifies the wallet exists and belongs to user
         if savings_type == 'deposit':
-            wallet.deposit(amount)
+            delta = amount
         elif savings_type in ['withdrawal', 'goal_contribution']:
-            if wallet.amount < Decimal(str(amount)):
+            delta = -amount
+        else:
+            delta = Decimal('0')
+        
+        wallet = self.wallets.apply_balance_change(wallet_id, user_id, delta)
+        if not wallet:
+            if delta < 0 and self.wallets.get_wallet(wallet_id, user_id):
                 raise ValueError("Insufficient funds in wallet")
-            wallet.withdraw(amount)
+            raise ValueError("Wallet not found or unauthorized")
         
-        # Update goal amount if applicable
-        if goal_id and savings_type == 'goal_contribution':
-            goal = Goal.query.get(goal_id)
-            goal.add_progress(amount)
+        # If goal_id provided, verify it exists and belongs to user,
+        # updating the goal amount if applicable
+        if goal_id:
+            if savings_type == 'goal_contribution':
+                goal = self.goals.apply_progress(goal_id, user_id, amount)
+            else:
+                goal = self.goals.get_goal(goal_id, user_id)
+            
+            if not goal:
+                db.session.rollback()
+                raise ValueError("Goal not found or unauthorized")
         
         # Create savings update record
         savings_update = SavingsUpdate(
@@ -72,6 +136,10 @@ class SavingsService:
         )
         
         db.session.add(savings_update)
+        db.session.flush()
+        self.rollups.record(savings_update)
+        self.snapshots.record(wallet_id, savings_update)
+        self.cache.bump(user_id)
         db.session.commit()
         
         return savings_update
@@ -86,6 +154,7 @@ class SavingsService:
         if description is not None:
             update.description = description
         
+        self.cache.bump(user_id)
         db.session.commit()
         return update
     
@@ -96,108 +165,101 @@ class SavingsService:
         if not update:
             return False
         
+        if update.type in ['transfer_out', 'transfer_in']:
+            raise ValueError("A wallet transfer cannot be deleted; make a transfer back instead")
+        
         # This operation is complex as it needs to revert the associated changes
         # in wallet and potentially goal balances
         
-        # Get the affected wallet
-        wallet = Wallet.query.get(update.wallet_id)
-        
-        # Reverse the original transaction effect
+        # Reverse the original transaction effect on the wallet; removing a
+        # deposit only succeeds if the wallet still has sufficient funds
         if update.type == 'deposit':
-            # Check if wallet has sufficient funds to remove deposit
-            if wallet.amount < update.amount:
-                raise ValueError("Cannot delete deposit as wallet has insufficient funds")
-            wallet.withdraw(update.amount)
+            delta = -update.amount
         elif update.type in ['withdrawal', 'goal_contribution']:
-            wallet.deposit(update.amount)
+            delta = update.amount
+        else:
+            delta = Decimal('0')
+        
+        if delta and not self.wallets.apply_balance_change(update.wallet_id, user_id, delta):
+            if delta < 0:
+                raise ValueError("Cannot delete deposit as wallet has insufficient funds")
+            raise ValueError("Wallet not found or unauthorized")
         
-        # If a goal was involved, reverse that too
+        # If a goal was involved, reverse that too (a deleted goal has
+        # nothing left to reverse)
         if update.goal_id and update.type == 'goal_contribution':
-            goal = Goal.query.get(update.goal_id)
-            
-            # Ensure goal exists and has sufficient funds
-            if goal and goal.current_amount >= update.amount:
-                goal.current_amount -= update.amount
+            self.goals.apply_progress(update.goal_id, user_id, -update.amount)
         
         db.session.delete(update)
+        db.session.flush()
+        self.rollups.revert(update)
+        self.snapshots.revert(update)
+        self.cache.bump(user_id)
         db.session.commit()
         
         return True
     
     def get_user_savings_summary(self, user_id):
+        """Get a summary of the user's savings activity (cached until the user's next write)"""
+        return self.cache.get_or_compute(user_id, 'savings_summary', lambda: self._build_savings_summary(user_id))
+    
+    def get_savings_statistics(self, user_id, period=None):
+        """Get savings statistics for a user with optional time filter (cached until the user's next write)"""
+        return self.cache.get_or_compute(
+            user_id,
+            'savings_statistics',
+            lambda: self._build_savings_statistics(user_id, period),
+            period=period
+        )
+    
+    # Private methods
+    def _build_savings_summary(self, user_id):
         """Generate a summary of the user's savings activity"""
-        # Get total deposits
-        total_deposits = db.session.query(func.sum(SavingsUpdate.amount))\
-            .filter(SavingsUpdate.user_id == user_id, SavingsUpdate.type == 'deposit')\
-            .scalar() or 0
+        # Totals and the monthly series come from the user's rollup rows
+        # (one per wallet, month and type) instead of the raw ledger
+        monthly_totals = db.session.query(
+            SavingsRollup.month,
+            self._sum_of_type('deposit'),
+            self._sum_of_type('withdrawal'),
+            self._sum_of_type('goal_contribution')
+        ).filter(SavingsRollup.user_id == user_id)\
+            .group_by(SavingsRollup.month)\
+            .all()
         
-        # Get total withdrawals
-        total_withdrawals = db.session.query(func.sum(SavingsUpdate.amount))\
-            .filter(SavingsUpdate.user_id == user_id, SavingsUpdate.type == 'withdrawal')\
-            .scalar() or 0
-        
-        # Get total goal contributions
-        total_goal_contributions = db.session.query(func.sum(SavingsUpdate.amount))\
-            .filter(SavingsUpdate.user_id == user_id, SavingsUpdate.type == 'goal_contribution')\
-            .scalar() or 0
+        total_deposits = sum(Decimal(str(row[1] or 0)) for row in monthly_totals)
+        total_withdrawals = sum(Decimal(str(row[2] or 0)) for row in monthly_totals)
+        total_goal_contributions = sum(Decimal(str(row[3] or 0)) for row in monthly_totals)
         
         # Get current wallet balance
         current_balance = db.session.query(func.sum(Wallet.amount))\
-            .filter(Wallet.user_id == user_id)\
+            .filter(Wallet.user_id == user_id, Wallet.is_deleted.is_(False))\
             .scalar() or 0
         
         # Get recent transactions
         recent_transactions = SavingsUpdate.query\
-            .filter(SavingsUpdate.user_id == user_id)\
-            .order_by(SavingsUpdate.updated_at.desc())\
+            .join(Wallet, Wallet.id == SavingsUpdate.wallet_id)\
+            .filter(SavingsUpdate.user_id == user_id, Wallet.is_deleted.is_(False))\
+            .order_by(SavingsUpdate.created_at.desc())\
             .limit(5)\
             .all()
         
-        # Get monthly savings data (last 6 months)
+        # Monthly savings data (last 6 months); months without activity are
+        # filled in here rather than in SQL
+        by_month = {row[0]: row for row in monthly_totals}
         today = datetime.now()
-        six_months_ago = today - timedelta(days=180)
         
         monthly_data = []
-        current_date = six_months_ago
-        
-        while current_date <= today:
-            month_start = datetime(current_date.year, current_date.month, 1)
-            
-            if current_date.month == 12:
-                month_end = datetime(current_date.year + 1, 1, 1)
-            else:
-                month_end = datetime(current_date.year, current_date.month + 1, 1)
-            
-            # Get deposits for this month
-            month_deposits = db.session.query(func.sum(SavingsUpdate.amount))\
-                .filter(
-                    SavingsUpdate.user_id == user_id,
-                    SavingsUpdate.type == 'deposit',
-                    SavingsUpdate.created_at >= month_start,
-                    SavingsUpdate.created_at < month_end
-                ).scalar() or 0
-            
-            # Get withdrawals for this month
-            month_withdrawals = db.session.query(func.sum(SavingsUpdate.amount))\
-                .filter(
-                    SavingsUpdate.user_id == user_id,
-                    SavingsUpdate.type == 'withdrawal',
-                    SavingsUpdate.created_at >= month_start,
-                    SavingsUpdate.created_at < month_end
-                ).scalar() or 0
+        for month_key in self._month_keys(today - timedelta(days=180), today):
+            row = by_month.get(month_key)
+            month_deposits = Decimal(str(row[1] or 0)) if row else Decimal('0')
+            month_withdrawals = Decimal(str(row[2] or 0)) if row else Decimal('0')
             
             monthly_data.append({
-                'month': month_start.strftime('%Y-%m'),
+                'month': month_key,
                 'deposits': float(month_deposits),
                 'withdrawals': float(month_withdrawals),
                 'net': float(month_deposits - month_withdrawals)
             })
-            
-            # Move to next month
-            if current_date.month == 12:
-                current_date = datetime(current_date.year + 1, 1, 1)
-            else:
-                current_date = datetime(current_date.year, current_date.month + 1, 1)
         
         return {
             'total_deposits': float(total_deposits),
@@ -209,7 +271,7 @@ class SavingsService:
             'monthly_data': monthly_data
         }
     
-    def get_savings_statistics(self, user_id, period=None):
+    def _build_savings_statistics(self, user_id, period=None):
         """Generate savings statistics for a user with optional time filter"""
         # Define time period filter
         if period:
@@ -225,40 +287,55 @@ class SavingsService:
         else:
             start_date = None
         
-        # Base query for deposits
-        deposits_query = db.session.query(SavingsUpdate)\
-            .filter(SavingsUpdate.user_id == user_id, SavingsUpdate.type == 'deposit')
-            
-        # Base query for withdrawals
-        withdrawals_query = db.session.query(SavingsUpdate)\
-            .filter(SavingsUpdate.user_id == user_id, SavingsUpdate.type == 'withdrawal')
+        # Whole months are read from the rollups. A period starting mid-month
+        # takes its partial first month from the ledger instead.
+        types = ['deposit', 'withdrawal']
+        rollup_query = db.session.query(
+            SavingsRollup.type,
+            func.sum(SavingsRollup.total),
+            func.sum(SavingsRollup.count),
+            func.max(SavingsRollup.max_amount)
+        ).filter(SavingsRollup.user_id == user_id, SavingsRollup.type.in_(types))
         
-        # Apply time period filter if needed
         if start_date:
-            deposits_query = deposits_query.filter(SavingsUpdate.created_at >= start_date)
-            withdrawals_query = withdrawals_query.filter(SavingsUpdate.created_at >= start_date)
-        
-        # Get total deposits and withdrawals
-        total_deposits = db.session.query(func.sum(SavingsUpdate.amount))\
-            .filter(SavingsUpdate.user_id == user_id, SavingsUpdate.type == 'deposit')
+            first_full_month = self._next_month_start(start_date)
+            rollup_query = rollup_query.filter(
+                SavingsRollup.month >= first_full_month.strftime('%Y-%m')
+            )
         
-        total_withdrawals = db.session.query(func.sum(SavingsUpdate.amount))\
-            .filter(SavingsUpdate.user_id == user_id, SavingsUpdate.type == 'withdrawal')
+        rows = rollup_query.group_by(SavingsRollup.type).all()
         
         if start_date:
-            total_deposits = total_deposits.filter(SavingsUpdate.created_at >= start_date)
-            total_withdrawals = total_withdrawals.filter(SavingsUpdate.created_at >= start_date)
-        
-        total_deposits = total_deposits.scalar() or 0
-        total_withdrawals = total_withdrawals.scalar() or 0
+            rows += db.session.query(
+                SavingsUpdate.type,
+                func.sum(SavingsUpdate.amount),
+                func.count(SavingsUpdate.id),
+                func.max(SavingsUpdate.amount)
+            ).filter(
+                SavingsUpdate.user_id == user_id,
+                SavingsUpdate.type.in_(types),
+                SavingsUpdate.created_at >= start_date,
+                SavingsUpdate.created_at < first_full_month
+            ).group_by(SavingsUpdate.type).all()
+        
+        totals = {savings_type: Decimal('0') for savings_type in types}
+        counts = {savings_type: 0 for savings_type in types}
+        largest = {savings_type: None for savings_type in types}
+        
+        for savings_type, total, count, max_amount in rows:
+            totals[savings_type] += Decimal(str(total or 0))
+            counts[savings_type] += int(count or 0)
+            if max_amount is not None and (largest[savings_type] is None or max_amount > largest[savings_type]):
+                largest[savings_type] = max_amount
+        
+        total_deposits = totals['deposit']
+        total_withdrawals = totals['withdrawal']
+        deposit_count = counts['deposit']
+        withdrawal_count = counts['withdrawal']
         
         # Get largest deposit and withdrawal
-        largest_deposit = deposits_query.order_by(desc(SavingsUpdate.amount)).first()
-        largest_withdrawal = withdrawals_query.order_by(desc(SavingsUpdate.amount)).first()
-        
-        # Get deposit and withdrawal counts
-        deposit_count = deposits_query.count()
-        withdrawal_count = withdrawals_query.count()
+        largest_deposit = self._find_largest(user_id, 'deposit', largest['deposit'], start_date)
+        largest_withdrawal = self._find_largest(user_id, 'withdrawal', largest['withdrawal'], start_date)
         
         # Calculate averages
         avg_deposit = total_deposits / deposit_count if deposit_count > 0 else 0
@@ -275,4 +352,43 @@ class SavingsService:
             'largest_deposit': largest_deposit.to_dict() if largest_deposit else None,
             'largest_withdrawal': largest_withdrawal.to_dict() if largest_withdrawal else None,
             'period': period
-        }
\ No newline at end of file
+        }
+    
+    def _sum_of_type(self, savings_type):
+        """SUM of rollup totals restricted to one savings type, for conditional aggregation"""
+        return func.sum(case(
+            (SavingsRollup.type == savings_type, SavingsRollup.total),
+            else_=None
+        ))
+    
+    def _find_largest(self, user_id, savings_type, amount, start_date=None):
+        """Fetch the savings update carrying a known maximum amount"""
+        if amount is None:
+            return None
+        
+        query = SavingsUpdate.query.filter(
+            SavingsUpdate.user_id == user_id,
+            SavingsUpdate.type == savings_type,
+            SavingsUpdate.amount == amount
+        )
+        if start_date:
+            query = query.filter(SavingsUpdate.created_at >= start_date)
+        
+        return query.order_by(SavingsUpdate.created_at.desc()).first()
+    
+    def _next_month_start(self, timestamp):
+        """Midnight on the first day of the month after timestamp"""
+        if timestamp.month == 12:
+            return datetime(timestamp.year + 1, 1, 1)
+        return datetime(timestamp.year, timestamp.month + 1, 1)
+    
+    def _month_keys(self, start, end):
+        """'YYYY-MM' keys for every calendar month from start to end inclusive"""
+        keys = []
+        year, month = start.year, start.month
+        
+        while (year, month) <= (end.year, end.month):
+            keys.append(f"{year:04d}-{month:02d}")
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        
+        return keys
\ No newline at end of file
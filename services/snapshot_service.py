@@ -0,0 +1,177 @@
+from app import db
+from app.models.savings import SavingsUpdate
+from app.models.snapshot import WalletBalanceSnapshot
+from app.models.wallet import Wallet
+from app.services.ledger_service import LedgerService
+from flask import current_app
+from sqlalchemy import func, tuple_
+from decimal import Decimal
+
+class SnapshotService:
+    """Maintains wallet_balance_snapshots and answers point-in-time balance queries"""
+    ledger = LedgerService()
+    
+    def latest(self, wallet_id, *criteria):
+        """Get a wallet's newest snapshot matching criteria"""
+        return WalletBalanceSnapshot.query.filter(WalletBalanceSnapshot.wallet_id == wallet_id, *criteria)\
+            .order_by(WalletBalanceSnapshot.taken_at.desc(), WalletBalanceSnapshot.ledger_id.desc())\
+            .first()
+    
+    def record(self, wallet_id, last_entry):
+        """
+        Snapshot a wallet after its newest ledger entry if one is due (caller commits).
+        
+        A snapshot is due every BALANCE_SNAPSHOT_INTERVAL entries and on a
+        wallet's first entry of each day. Call after the entry is flushed and
+        while the balance UPDATE still holds the wallet's row lock, so no
+        other entry can land before it. The balance is carried forward from
+        the previous snapshot over the ledger rather than copied from
+        Wallet.amount, so snapshots never inherit drift.
+        """
+        interval = current_app.config.get('BALANCE_SNAPSHOT_INTERVAL', 100)
+        created_at, ledger_id = self._position(last_entry)
+        
+        snapshot = self.latest(wallet_id)
+        tail, count = self._tail(
+            wallet_id,
+            snapshot,
+            tuple_(SavingsUpdate.created_at, SavingsUpdate.id) <= tuple_(created_at, ledger_id)
+        )
+        
+        if snapshot and count < interval and snapshot.taken_at.date() == created_at.date():
+            return None
+        
+        new_snapshot = WalletBalanceSnapshot(
+            wallet_id=wallet_id,
+            ledger_id=ledger_id,
+            taken_at=created_at,
+            balance=(snapshot.balance if snapshot else Decimal('0')) + tail
+        )
+        db.session.add(new_snapshot)
+        return new_snapshot
+    
+    def revert(self, entry):
+        """Take a deleted ledger entry out of the wallet's later snapshots (caller commits)"""
+        created_at, ledger_id = self._position(entry)
+        WalletBalanceSnapshot.query.filter(
+            WalletBalanceSnapshot.wallet_id == entry.wallet_id,
+            tuple_(WalletBalanceSnapshot.taken_at, WalletBalanceSnapshot.ledger_id) >= tuple_(created_at, ledger_id)
+        ).update(
+            {WalletBalanceSnapshot.balance: WalletBalanceSnapshot.balance - self.ledger.sign(entry.type) * entry.amount},
+            synchronize_session=False
+        )
+    
+    def balance_at(self, wallet_id, at):
+        """Get a wallet's balance at a point in time: nearest snapshot plus the ledger tail"""
+        snapshot = self.latest(wallet_id, WalletBalanceSnapshot.taken_at <= at)
+        tail, _ = self._tail(wallet_id, snapshot, SavingsUpdate.created_at <= at)
+        return (snapshot.balance if snapshot else Decimal('0')) + tail
+    
+    def balance_after(self, wallet_id, entry):
+        """Get a wallet's balance right after one of its ledger entries"""
+        position = tuple_(*self._position(entry))
+        snapshot = self.latest(
+            wallet_id,
+            tuple_(WalletBalanceSnapshot.taken_at, WalletBalanceSnapshot.ledger_id) <= position
+        )
+        tail, _ = self._tail(wallet_id, snapshot, tuple_(SavingsUpdate.created_at, SavingsUpdate.id) <= position)
+        return (snapshot.balance if snapshot else Decimal('0')) + tail
+    
+    def running_balances(self, wallet_id, entries):
+        """
+        Get the balance after each entry of a history page (newest first).
+        
+        Returns:
+            dict: Savings update id to the wallet's balance after it
+        """
+        if not entries:
+            return {}
+        
+        balance = self.balance_after(wallet_id, entries[0])
+        balances = {}
+        
+        for entry in entries:
+            balances[entry.id] = balance
+            balance -= self.ledger.sign(entry.type) * entry.amount
+        
+        return balances
+    
+    def backfill(self):
+        """
+        Rebuild every wallet's snapshots from its full ledger, one wallet per transaction.
+        
+        Yields:
+            tuple: (wallet id, snapshots written)
+        """
+        wallet_ids = [row[0] for row in db.session.query(Wallet.id).order_by(Wallet.id)]
+        
+        for wallet_id in wallet_ids:
+            # Hold the wallet's row lock so no entry is written meanwhile
+            if not Wallet.query.filter_by(id=wallet_id).with_for_update().first():
+                db.session.rollback()
+                continue
+            
+            written = self.rebuild(wallet_id)
+            db.session.commit()
+            
+            yield wallet_id, written
+    
+    def rebuild(self, wallet_id):
+        """
+        Replace a wallet's snapshots with ones recomputed from its full ledger (caller commits).
+        
+        Call while holding the wallet's row lock, e.g. after entries were
+        written into its past. Streams the ledger, but the new snapshots
+        (one per day with entries, at most) are inserted together.
+        
+        Returns:
+            int: Snapshots written
+        """
+        interval = current_app.config.get('BALANCE_SNAPSHOT_INTERVAL', 100)
+        WalletBalanceSnapshot.query.filter_by(wallet_id=wallet_id).delete(synchronize_session=False)
+        
+        rows = db.session.query(SavingsUpdate.id, SavingsUpdate.created_at, SavingsUpdate.type, SavingsUpdate.amount)\
+            .filter(SavingsUpdate.wallet_id == wallet_id)\
+            .order_by(SavingsUpdate.created_at, SavingsUpdate.id)\
+            .execution_options(stream_results=True, yield_per=1000)
+        
+        snapshots = []
+        balance = Decimal('0')
+        since_snapshot = 0
+        last_day = None
+        
+        for ledger_id, created_at, savings_type, amount in rows:
+            balance += self.ledger.sign(savings_type) * Decimal(str(amount))
+            since_snapshot += 1
+            
+            if last_day is None or since_snapshot >= interval or created_at.date() != last_day:
+                snapshots.append({
+                    'wallet_id': wallet_id,
+                    'ledger_id': ledger_id,
+                    'taken_at': created_at,
+                    'balance': balance
+                })
+                since_snapshot = 0
+                last_day = created_at.date()
+        
+        db.session.bulk_insert_mappings(WalletBalanceSnapshot, snapshots)
+        return len(snapshots)
+    
+    def _position(self, entry):
+        """(created_at, id) ledger position of a savings update or its bulk insert dict"""
+        if isinstance(entry, dict):
+            return entry['created_at'], entry['id']
+        return entry.created_at, entry.id
+    
+    def _tail(self, wallet_id, snapshot, *criteria):
+        """(signed sum, row count) of a wallet's ledger after snapshot, within criteria"""
+        query = db.session.query(func.coalesce(func.sum(self.ledger.signed_amount()), 0), func.count(SavingsUpdate.id))\
+            .filter(SavingsUpdate.wallet_id == wallet_id, *criteria)
+        
+        if snapshot:
+            query = query.filter(
+                tuple_(SavingsUpdate.created_at, SavingsUpdate.id) > tuple_(snapshot.taken_at, snapshot.ledger_id)
+            )
+        
+        total, count = query.one()
+        return Decimal(str(total)), count
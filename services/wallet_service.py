@@ -1,16 +1,35 @@
 from app import db
 from app.models.wallet import Wallet
 from app.models.savings import SavingsUpdate
+from app.models.rows import SavingsUpdateRow, WalletRow
+from app.services.cache_service import CacheService
+from app.services.deletion_service import DeletionService
+from app.services.rollup_service import RollupService
+from app.services.snapshot_service import SnapshotService
+from app.utils.db import keyset_paginate, execute_bulk_insert, retry_on_conflict, upsert_insert
+from app.utils.loader import request_loader
+from app.utils.statement import parse_statement
+from app.utils.validators import validate_amount
+from flask import current_app
+from sqlalchemy import update
+from datetime import datetime
 from decimal import Decimal
+import time
+import uuid
 
 class WalletService:
+    cache = CacheService()
+    rollups = RollupService()
+    snapshots = SnapshotService()
+    deletions = DeletionService()
+    
     def get_user_wallets(self, user_id):
-        """Get all wallets for a user"""
-        return Wallet.query.filter_by(user_id=user_id).all()
+        """Get all wallets for a user, as read-only rows"""
+        return WalletRow.fetch(WalletRow.select().where(Wallet.user_id == user_id, Wallet.is_deleted.is_(False)))
     
     def get_wallet(self, wallet_id, user_id):
-        """Get a specific wallet"""
-        return Wallet.query.filter_by(id=wallet_id, user_id=user_id).first()
+        """Get a specific wallet (loaded at most once per request)"""
+        return request_loader().get(Wallet, wallet_id, user_id)
     
     def create_wallet(self, user_id, name=None, initial_amount=0):
         """Create a new wallet"""
@@ -24,6 +43,7 @@ class WalletService:
         )
         
         db.session.add(wallet)
+        self.cache.bump(user_id)
         db.session.commit()
         
         # If there's an initial amount, create a savings update record
@@ -37,10 +57,15 @@ class WalletService:
             )
             
             db.session.add(savings_update)
+            db.session.flush()
+            self.rollups.record(savings_update)
+            self.snapshots.record(wallet.id, savings_update)
+            self.cache.bump(user_id)
             db.session.commit()
         
         return wallet
     
+    @retry_on_conflict()
     def update_wallet(self, wallet_id, user_id, name=None):
         """Update a wallet's details"""
         wallet = self.get_wallet(wallet_id, user_id)
@@ -51,33 +76,83 @@ class WalletService:
         if name is not None:
             wallet.name = name
         
+        self.cache.bump(user_id)
         db.session.commit()
         return wallet
     
+    @retry_on_conflict()
     def delete_wallet(self, wallet_id, user_id):
-        """Delete a wallet"""
+        """
+        Delete a wallet and everything recorded against it.
+        
+        The database cascades the delete to the wallet's ledger, rollups
+        and snapshots. A wallet with more than WALLET_DELETE_INLINE_MAX
+        ledger rows is instead hidden straight away and emptied by a
+        background deletion job, in chunks.
+        
+        Returns:
+            tuple: (deleted, job) - deleted is False if the wallet is not
+            the user's; job is the DeletionJob when the delete was deferred
+        """
         wallet = self.get_wallet(wallet_id, user_id)
         
         if not wallet:
-            return False
+            return False, None
+        
+        job = None
+        rows = self.deletions.count_ledger_rows('wallet', wallet_id)
+        if rows > current_app.config.get('WALLET_DELETE_INLINE_MAX', 10000):
+            wallet.is_deleted = True
+            self.rollups.forget_wallet(wallet_id)
+            job = self.deletions.schedule('wallet', wallet_id, user_id, total=rows)
+        else:
+            db.session.delete(wallet)
         
-        db.session.delete(wallet)
+        self.cache.bump(user_id)
         db.session.commit()
+        request_loader().forget(Wallet, wallet_id)
         
-        return True
+        if job is not None:
+            self.deletions.start(job.id)
+        
+        return True, job
     
-    def deposit(self, wallet_id, user_id, amount, goal_id=None, description=None):
-        """Add funds to a wallet"""
-        wallet = self.get_wallet(wallet_id, user_id)
+    def apply_balance_change(self, wallet_id, user_id, delta):
+        """
+        Atomically add delta to a wallet's balance (caller commits).
         
-        if not wallet:
-            raise ValueError("Wallet not found")
+        Runs a single conditional UPDATE ... RETURNING, so concurrent
+        withdrawals cannot both pass the funds check. Returns the refreshed
+        wallet, or None if the wallet is not the user's or would be overdrawn.
+        """
+        stmt = update(Wallet).where(Wallet.id == wallet_id, Wallet.user_id == user_id, Wallet.is_deleted.is_(False))
+        
+        if delta < 0:
+            stmt = stmt.where(Wallet.amount >= -delta)
+        
+        stmt = stmt.values(amount=Wallet.amount + delta, version_id=Wallet.version_id + 1).returning(Wallet)
+        
+        wallet = db.session.execute(
+            stmt,
+            execution_options={'populate_existing': True, 'synchronize_session': False}
+        ).scalar_one_or_none()
         
+        # The UPDATE proved ownership; later lookups in this request reuse the row
+        if wallet:
+            request_loader().put(Wallet, wallet_id, user_id, wallet)
+        
+        return wallet
+    
+    def deposit(self, wallet_id, user_id, amount, goal_id=None, description=None):
+        """Add funds to a wallet"""
         if not isinstance(amount, (int, float, Decimal)) or amount <= 0:
             raise ValueError("Amount must be a positive number")
         
         # Update wallet balance
-        wallet.deposit(amount)
+        wallet = self.apply_balance_change(wallet_id, user_id, Decimal(str(amount)))
+        
+        if not wallet:
+            raise ValueError("Wallet not found")
         
         # Create savings update record
         savings_update = SavingsUpdate(
@@ -90,26 +165,26 @@ class WalletService:
         )
         
         db.session.add(savings_update)
+        db.session.flush()
+        self.rollups.record(savings_update)
+        self.snapshots.record(wallet_id, savings_update)
+        self.cache.bump(user_id)
         db.session.commit()
         
         return wallet, savings_update
     
     def withdraw(self, wallet_id, user_id, amount, description=None):
         """Withdraw funds from a wallet"""
-        wallet = self.get_wallet(wallet_id, user_id)
-        
-        if not wallet:
-            raise ValueError("Wallet not found")
-        
         if not isinstance(amount, (int, float, Decimal)) or amount <= 0:
             raise ValueError("Amount must be a positive number")
         
-        # Ensure sufficient funds
-        if Decimal(str(amount)) > wallet.amount:
-            raise ValueError("Insufficient funds")
+        # Update wallet balance, only if there are sufficient funds
+        wallet = self.apply_balance_change(wallet_id, user_id, -Decimal(str(amount)))
         
-        # Update wallet balance
-        wallet.withdraw(amount)
+        if not wallet:
+            if not self.get_wallet(wallet_id, user_id):
+                raise ValueError("Wallet not found")
+            raise ValueError("Insufficient funds")
         
         # Create savings update record
         savings_update = SavingsUpdate(
@@ -121,21 +196,312 @@ class WalletService:
         )
         
         db.session.add(savings_update)
+        db.session.flush()
+        self.rollups.record(savings_update)
+        self.snapshots.record(wallet_id, savings_update)
+        self.cache.bump(user_id)
         db.session.commit()
         
         return wallet, savings_update
     
-    def get_wallet_history(self, wallet_id, user_id):
-        """Get transaction history for a wallet"""
+    def transfer(self, user_id, source_wallet_id, destination_wallet_id, amount, description=None):
+        """
+        Move funds between two of a user's wallets in one transaction.
+        
+        Both balance changes and the paired transfer_out/transfer_in ledger
+        rows are committed together. The wallets are updated lowest id
+        first, so opposing transfers take their row locks in the same order
+        and cannot deadlock.
+        """
+        is_valid, message, amount = validate_amount(amount)
+        if not is_valid:
+            raise ValueError(message)
+        
+        if source_wallet_id == destination_wallet_id:
+            raise ValueError("Source and destination wallets must be different")
+        
+        deltas = {source_wallet_id: -amount, destination_wallet_id: amount}
+        wallets = {}
+        
+        for wallet_id in sorted(deltas):
+            wallet = self.apply_balance_change(wallet_id, user_id, deltas[wallet_id])
+            
+            if not wallet:
+                db.session.rollback()
+                if not self.get_wallet(wallet_id, user_id):
+                    raise ValueError("Wallet not found")
+                raise ValueError("Insufficient funds")
+            
+            wallets[wallet_id] = wallet
+        
+        # Create the paired ledger records
+        transfer_id = str(uuid.uuid4())
+        transfer_out = SavingsUpdate(
+            user_id=user_id,
+            wallet_id=source_wallet_id,
+            amount=amount,
+            type='transfer_out',
+            description=description,
+            transfer_id=transfer_id
+        )
+        transfer_in = SavingsUpdate(
+            user_id=user_id,
+            wallet_id=destination_wallet_id,
+            amount=amount,
+            type='transfer_in',
+            description=description,
+            transfer_id=transfer_id
+        )
+        
+        db.session.add_all([transfer_out, transfer_in])
+        db.session.flush()
+        self.rollups.record_many([transfer_out, transfer_in])
+        self.snapshots.record(source_wallet_id, transfer_out)
+        self.snapshots.record(destination_wallet_id, transfer_in)
+        self.cache.bump(user_id)
+        db.session.commit()
+        
+        return wallets[source_wallet_id], wallets[destination_wallet_id], transfer_out, transfer_in
+    
+    def apply_batch(self, wallet_id, user_id, transactions):
+        """
+        Apply a batch of deposits and withdrawals to a wallet in one transaction.
+        
+        The batch is all-or-nothing: every item is validated first, the net
+        balance change is applied with one conditional UPDATE (which also
+        rejects a batch that would overdraw the wallet part-way through), the
+        ledger rows go in with one multi-row insert and everything is
+        committed once.
+        
+        Returns:
+            tuple: (wallet, results) - wallet is None when the batch was
+            rejected, and results has one entry per item either way
+        """
+        max_items = current_app.config.get('WALLET_BATCH_MAX_ITEMS', 1000)
+        
+        if not isinstance(transactions, list) or not transactions:
+            raise ValueError("Transactions must be a non-empty list")
+        
+        if len(transactions) > max_items:
+            raise ValueError(f"A batch cannot contain more than {max_items} transactions")
+        
+        results = [{"index": index, "status": "rejected"} for index in range(len(transactions))]
+        rows = []
+        deltas = []
+        
+        for index, item in enumerate(transactions):
+            if not isinstance(item, dict):
+                results[index]["error"] = "Transaction must be an object"
+                continue
+            
+            if item.get('type') not in ('deposit', 'withdrawal'):
+                results[index]["error"] = "Type must be one of: deposit, withdrawal"
+                continue
+            
+            is_valid, message, amount = validate_amount(item.get('amount'))
+            if not is_valid:
+                results[index]["error"] = message
+                continue
+            
+            description = item.get('description')
+            if description is not None and (not isinstance(description, str) or len(description) > 500):
+                results[index]["error"] = "Description must be a string of at most 500 characters"
+                continue
+            
+            rows.append({
+                "user_id": user_id,
+                "wallet_id": wallet_id,
+                "amount": amount,
+                "type": item['type'],
+                "description": description
+            })
+            deltas.append(amount if item['type'] == 'deposit' else -amount)
+        
+        if len(rows) != len(transactions):
+            return None, results
+        
+        # The lowest point the balance reaches while the items are applied
+        # in order; the wallet must cover it for no item to overdraw
+        running = lowest = Decimal('0')
+        for delta in deltas:
+            running += delta
+            lowest = min(lowest, running)
+        
+        stmt = update(Wallet)\
+            .where(Wallet.id == wallet_id, Wallet.user_id == user_id, Wallet.is_deleted.is_(False),
+                   Wallet.amount >= -lowest)\
+            .values(amount=Wallet.amount + running, version_id=Wallet.version_id + 1)\
+            .returning(Wallet)
+        wallet = db.session.execute(
+            stmt,
+            execution_options={'populate_existing': True, 'synchronize_session': False}
+        ).scalar_one_or_none()
+        
+        if not wallet:
+            db.session.rollback()
+            current = self.get_wallet(wallet_id, user_id)
+            
+            if not current:
+                raise ValueError("Wallet not found")
+            
+            balance = current.amount
+            for index, delta in enumerate(deltas):
+                balance += delta
+                if balance < 0:
+                    results[index]["error"] = "Insufficient funds"
+                    break
+            else:
+                # The balance moved between the UPDATE and the re-read
+                raise ValueError("Insufficient funds")
+            
+            return None, results
+        
+        balances = []
+        balance = wallet.amount - running
+        for delta in deltas:
+            balance += delta
+            balances.append(balance)
+        
+        # Stamp the entries only now that the wallet's row is locked, so they
+        # sort after every entry already committed for it
+        now = datetime.utcnow()
+        for row in rows:
+            row['created_at'] = row['updated_at'] = now
+        
+        if not execute_bulk_insert(SavingsUpdate, rows, return_defaults=True, commit=False):
+            raise RuntimeError("Failed to record wallet transactions")
+        
+        self.rollups.record_many(rows)
+        self.snapshots.record(wallet_id, rows[-1])
+        self.cache.bump(user_id)
+        db.session.commit()
+        
+        for index, (row, balance) in enumerate(zip(rows, balances)):
+            results[index] = {
+                "index": index,
+                "status": "applied",
+                "savings_update_id": row['id'],
+                "balance": float(balance)
+            }
+        
+        return wallet, results
+    
+    def import_statement(self, wallet_id, user_id, lines):
+        """
+        Import a bank statement (see app.utils.statement) into a wallet in one transaction.
+        
+        The statement is parsed as it is read and inserted in batches of
+        WALLET_IMPORT_BATCH with INSERT ... ON CONFLICT DO NOTHING on the
+        wallet's content hashes, so entries imported before are skipped.
+        The wallet's balance then moves once by the net amount imported (it
+        must not end up negative), its snapshots are rebuilt because the
+        entries land in its past, and everything is committed together.
+        Any invalid line rejects the whole statement.
+        
+        Returns:
+            tuple: (wallet, result) - wallet is None when the statement was
+            rejected, and result has the counts, throughput and any errors
+        """
+        max_errors = current_app.config.get('WALLET_IMPORT_MAX_ERRORS', 100)
+        batch_size = current_app.config.get('WALLET_IMPORT_BATCH', 2000)
+        
+        if not self.get_wallet(wallet_id, user_id):
+            raise ValueError("Wallet not found")
+        
+        started = time.perf_counter()
+        result = {"lines": 0, "imported": 0, "duplicates": 0, "errors": []}
+        batch = []
+        net = Decimal('0')
+        now = datetime.utcnow()
+        
+        for line, entry, error in parse_statement(lines):
+            result["lines"] += 1
+            
+            if error:
+                result["errors"].append({"line": line, "error": error})
+                if len(result["errors"]) >= max_errors:
+                    break
+                continue
+            
+            # Nothing will be imported; keep reading only to report errors
+            if result["errors"]:
+                continue
+            
+            entry.update(user_id=user_id, wallet_id=wallet_id, updated_at=now)
+            batch.append(entry)
+            if len(batch) >= batch_size:
+                net += self._import_batch(batch, result)
+                batch = []
+        
+        if result["errors"]:
+            db.session.rollback()
+            return None, result
+        
+        if batch:
+            net += self._import_batch(batch, result)
+        
+        if result["imported"]:
+            wallet = self.apply_balance_change(wallet_id, user_id, net)
+            
+            if not wallet:
+                db.session.rollback()
+                raise ValueError("Insufficient funds: the statement would leave the wallet overdrawn")
+            
+            self.snapshots.rebuild(wallet_id)
+            self.cache.bump(user_id)
+        else:
+            wallet = self.get_wallet(wallet_id, user_id)
+        
+        db.session.commit()
+        
+        elapsed = time.perf_counter() - started
+        result["seconds"] = round(elapsed, 3)
+        result["rows_per_second"] = round(result["lines"] / elapsed) if elapsed else None
+        return wallet, result
+    
+    def _import_batch(self, entries, result):
+        """Insert one batch of statement entries, skipping known ones; returns their net amount"""
+        stmt = upsert_insert(SavingsUpdate.__table__)\
+            .on_conflict_do_nothing(index_elements=['wallet_id', 'content_hash'])\
+            .returning(
+                SavingsUpdate.user_id,
+                SavingsUpdate.wallet_id,
+                SavingsUpdate.type,
+                SavingsUpdate.amount,
+                SavingsUpdate.created_at
+            )
+        inserted = db.session.execute(stmt, entries).all()
+        
+        self.rollups.record_many(inserted)
+        result["imported"] += len(inserted)
+        result["duplicates"] += len(entries) - len(inserted)
+        
+        return sum((row.amount if row.type == 'deposit' else -row.amount for row in inserted), Decimal('0'))
+    
+    def get_wallet_history(self, wallet_id, user_id, cursor=None, limit=20, include_total=False):
+        """Get a page of transaction history for a wallet (read-only rows), with the balance after each entry"""
         # First verify wallet ownership
         wallet = self.get_wallet(wallet_id, user_id)
         
         if not wallet:
             raise ValueError("Wallet not found or unauthorized")
         
-        # Get all savings updates for this wallet
-        history = SavingsUpdate.query.filter_by(
-            wallet_id=wallet_id
-        ).order_by(SavingsUpdate.updated_at.desc()).all()
+        # Get one page of savings updates for this wallet
+        page = keyset_paginate(
+            SavingsUpdateRow.select().where(SavingsUpdate.wallet_id == wallet_id),
+            [SavingsUpdate.created_at, SavingsUpdate.id],
+            cursor=cursor,
+            limit=limit,
+            include_total=include_total,
+            row=SavingsUpdateRow
+        )
+        page['running_balances'] = self.snapshots.running_balances(wallet_id, page['items'])
+        
+        return page
+    
+    def get_balance_at(self, wallet_id, user_id, at):
+        """Get a wallet's balance at a point in time (UTC)"""
+        if not self.get_wallet(wallet_id, user_id):
+            raise ValueError("Wallet not found or unauthorized")
         
-        return history
\ No newline at end of file
+        return self.snapshots.balance_at(wallet_id, at)
\ No newline at end of file
@@ -1,28 +1,43 @@
 """
 Authentication utility functions for the savings app.
 """
-from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
 from functools import wraps
-from flask import jsonify, request
+from flask import current_app, jsonify, request
+from collections import OrderedDict
 import re
 import hashlib
 import secrets
 import string
+import threading
+import time
 from app.models.user import User
-from app import jwt
+from app import db, jwt
+
+def token_claims(user):
+    """Claims carried by a user's tokens so checks need no database lookup."""
+    return {
+        "verified": bool(user.verified),
+        "is_admin": bool(user.is_admin),
+        "auth_epoch": user.auth_epoch
+    }
+
+def current_claims():
+    """Claims of the request's token, decoding it only if jwt_required has not."""
+    try:
+        return get_jwt()
+    except RuntimeError:
+        verify_jwt_in_request()
+        return get_jwt()
 
 def admin_required(fn):
     """
     Decorator to require admin rights for an endpoint.
-    Must be used with jwt_required.
+    Must be used with jwt_required. Reads the token's claims only.
     """
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        verify_jwt_in_request()
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user or not user.is_admin:
+        if not current_claims().get("is_admin"):
             return jsonify({"error": "Admin privileges required"}), 403
         
         return fn(*args, **kwargs)
@@ -31,20 +46,63 @@ def admin_required(fn):
 def verified_required(fn):
     """
     Decorator to require email verification for an endpoint.
-    Must be used with jwt_required.
+    Must be used with jwt_required. Reads the token's claims only.
     """
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        verify_jwt_in_request()
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user or not user.verified:
+        if not current_claims().get("verified"):
             return jsonify({"error": "Email verification required"}), 403
         
         return fn(*args, **kwargs)
     return wrapper
 
+class AuthEpochCache:
+    """
+    In-process cache of each user's current auth_epoch.
+    
+    Tokens are checked against it on every request, so revocation costs
+    one query per user per AUTH_EPOCH_CACHE_TTL instead of one per request.
+    Bumps made by this process take effect at once (see forget); bumps made
+    by other processes within the TTL.
+    """
+    
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, user_id):
+        """Current auth_epoch of a user, or None if the user no longer exists"""
+        key = str(user_id)
+        now = time.monotonic()
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(key)
+                return entry[0]
+        
+        epoch = db.session.query(User.auth_epoch).filter(User.id == int(key)).scalar()
+        
+        with self._lock:
+            self._entries[key] = (epoch, now + current_app.config.get('AUTH_EPOCH_CACHE_TTL', 30))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        
+        return epoch
+    
+    def forget(self, user_id):
+        """Drop a user's cached epoch after it was bumped"""
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+auth_epochs = AuthEpochCache()
+
 def generate_verification_token():
     """Generate a secure token for email verification or password reset."""
     return secrets.token_urlsafe(32)
@@ -85,7 +143,23 @@ def validate_password_strength(password):
     
     return True, "Password meets strength requirements"
 
+# JWT revocation: tokens issued before the user's last epoch bump are rejected
+@jwt.token_in_blocklist_loader
+def check_auth_epoch(jwt_header, jwt_payload):
+    try:
+        epoch = auth_epochs.get(jwt_payload["sub"])
+    except (TypeError, ValueError):
+        return True
+    return epoch is None or jwt_payload.get("auth_epoch") != epoch
+
 # JWT error handlers
+@jwt.revoked_token_loader
+def revoked_token_callback(jwt_header, jwt_payload):
+    return jsonify({
+        "error": "Token has been revoked",
+        "code": "token_revoked"
+    }), 401
+
 @jwt.expired_token_loader
 def expired_token_callback(jwt_header, jwt_payload):
     return jsonify({
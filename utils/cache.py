@@ -0,0 +1,176 @@
+"""
+Response cache backends for the savings app.
+
+Two interchangeable backends with get/set/clear:
+
+    MemoryCache  - in-process LRU with a size limit and TTL
+    SQLiteCache  - a SQLite file, shared by every worker process on a host
+
+Values must be JSON serializable. Keys are built by CacheService, which
+puts the user's data version in every key, so entries never need to be
+invalidated explicitly; superseded ones age out through the TTL/LRU.
+
+Configured through SUMMARY_CACHE_BACKEND ('memory', 'sqlite' or None),
+SUMMARY_CACHE_TTL, SUMMARY_CACHE_MAX_ENTRIES and SUMMARY_CACHE_PATH.
+"""
+from collections import OrderedDict
+import json
+import os
+import sqlite3
+import threading
+import time
+
+class CacheStats:
+    """Hit and miss counters of one process."""
+    
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+    
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+    
+    def to_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else None
+        }
+
+class MemoryCache:
+    """Thread-safe LRU cache with a size limit and a TTL, local to one process."""
+    
+    name = 'memory'
+    
+    def __init__(self, max_entries=10000, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Cached value for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry:
+                self._entries.move_to_end(key)
+        
+        self.stats.record(entry is not None)
+        return entry[0] if entry else None
+    
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self):
+        return len(self._entries)
+
+class SQLiteCache:
+    """
+    Cache stored in a SQLite file so every worker process on a host shares it.
+    
+    Each thread keeps its own connection (re-opened after a fork). Expired
+    entries are skipped on read; every PRUNE_EVERY writes the expired and
+    least recently written entries beyond max_entries are deleted.
+    """
+    
+    name = 'sqlite'
+    PRUNE_EVERY = 100
+    
+    def __init__(self, path, max_entries=10000, ttl=300):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._local = threading.local()
+        self._writes = 0
+        
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache_entries ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, written_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_cache_entries_written_at ON cache_entries (written_at)')
+    
+    def get(self, key):
+        """Cached value for key, or None"""
+        row = self._connect().execute(
+            'SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        
+        self.stats.record(row is not None)
+        return json.loads(row[0]) if row else None
+    
+    def set(self, key, value):
+        now = time.time()
+        
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO cache_entries (key, value, expires_at, written_at) VALUES (?, ?, ?, ?)',
+                (key, json.dumps(value), now + self.ttl, now)
+            )
+        
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self.prune()
+    
+    def prune(self):
+        """Delete expired entries and the oldest ones beyond max_entries"""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM cache_entries WHERE expires_at <= ?', (time.time(),))
+            conn.execute(
+                'DELETE FROM cache_entries WHERE key IN ('
+                'SELECT key FROM cache_entries ORDER BY written_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            )
+    
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM cache_entries')
+    
+    def __len__(self):
+        return self._connect().execute('SELECT count(*) FROM cache_entries').fetchone()[0]
+    
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+def init_cache(app):
+    """Create the configured backend as app.extensions['summary_cache'] (None when disabled)"""
+    backend = app.config.get('SUMMARY_CACHE_BACKEND')
+    max_entries = app.config.get('SUMMARY_CACHE_MAX_ENTRIES', 10000)
+    ttl = app.config.get('SUMMARY_CACHE_TTL', 300)
+    
+    if backend == 'memory':
+        cache = MemoryCache(max_entries=max_entries, ttl=ttl)
+    elif backend == 'sqlite':
+        cache = SQLiteCache(app.config['SUMMARY_CACHE_PATH'], max_entries=max_entries, ttl=ttl)
+    elif backend is None:
+        cache = None
+    else:
+        raise ValueError(f"Unknown SUMMARY_CACHE_BACKEND: {backend}")
+    
+    app.extensions['summary_cache'] = cache
+    return cache
@@ -2,12 +2,63 @@
 Database utility functions for the savings app.
 """
 from app import db
+from app.utils.loader import reset_request_loader
+from sqlalchemy import DateTime, String, event, func, literal_column, select, tuple_
+from sqlalchemy.engine import Engine
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
 from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+import base64
+import json
 import logging
+import random
+import sqlite3
+import time
 
 logger = logging.getLogger(__name__)
 
+# SQLite only auto-increments INTEGER PRIMARY KEY columns, so BIGINT primary
+# keys fall back to INTEGER there (tests and local benchmarks run on SQLite).
+BigIntegerPK = db.BigInteger().with_variant(db.Integer(), 'sqlite')
+
+@event.listens_for(Engine, 'connect')
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """SQLite ignores foreign keys, and so ON DELETE CASCADE, unless each connection enables them"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+
+class month_bucket(FunctionElement):
+    """
+    Portable 'YYYY-MM' bucket of a timestamp expression.
+
+    Renders as to_char() on PostgreSQL and strftime() on SQLite, with the
+    format inlined so the same expression can be used in SELECT and GROUP BY.
+
+    Usage:
+        db.session.query(month_bucket(SavingsUpdate.created_at), ...)
+    """
+    type = String()
+    name = 'month_bucket'
+    inherit_cache = True
+
+@compiles(month_bucket)
+def _compile_month_bucket(element, compiler, **kw):
+    return compiler.process(
+        func.to_char(*element.clauses, literal_column("'YYYY-MM'")), **kw
+    )
+
+@compiles(month_bucket, 'sqlite')
+def _compile_month_bucket_sqlite(element, compiler, **kw):
+    return compiler.process(
+        func.strftime(literal_column("'%Y-%m'"), *element.clauses), **kw
+    )
+
 @contextmanager
 def db_transaction():
     """
@@ -30,6 +81,65 @@ def db_transaction():
         logger.error(f"Unexpected error during database transaction: {str(e)}")
         raise
 
+class ConflictError(Exception):
+    """A write kept losing to concurrent updates of the same row."""
+    pass
+
+def retry_on_conflict(retries=3, base_delay=0.01, max_delay=0.2):
+    """
+    Decorator that retries a service method when its commit hits a stale
+    version (optimistic concurrency via version_id_col).
+    
+    The session (and the request's entity loader) is reset and the whole
+    method re-run, so it re-reads the row and re-applies its changes. Waits between attempts grow
+    exponentially with full jitter, capped at max_delay seconds.
+    
+    Args:
+        retries: Retries after the first attempt
+        base_delay: Upper bound of the first wait, in seconds
+        max_delay: Upper bound of any wait, in seconds
+        
+    Raises:
+        ConflictError: When every attempt was stale
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            for attempt in range(retries + 1):
+                try:
+                    return fn(*args, **kwargs)
+                except StaleDataError as e:
+                    db.session.rollback()
+                    reset_request_loader()
+                    
+                    if attempt == retries:
+                        logger.warning(f"{fn.__qualname__} gave up after {attempt + 1} stale attempts")
+                        raise ConflictError("The record was changed by another request, please retry") from e
+                    
+                    time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+        return wrapper
+    return decorator
+
+def upsert_insert(model):
+    """
+    Return a dialect-specific INSERT for model that supports ON CONFLICT.
+    
+    PostgreSQL and SQLite both implement on_conflict_do_update and
+    on_conflict_do_nothing with the same signature.
+    
+    Args:
+        model: SQLAlchemy model class
+        
+    Returns:
+        Insert: INSERT construct for the model's table
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    
+    return insert(model)
+
 def paginate_query(query, page=1, per_page=20):
     """
     Paginate a SQLAlchemy query.
@@ -64,20 +174,121 @@ def paginate_query(query, page=1, per_page=20):
         }
     }
 
-def execute_bulk_insert(model, items):
+def encode_cursor(values):
+    """
+    Encode keyset values as an opaque, URL-safe pagination cursor.
+    
+    Args:
+        values: Sequence of sort-key values (datetimes are stored as ISO strings)
+        
+    Returns:
+        str: Cursor token
+    """
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, columns):
+    """
+    Decode a cursor produced by encode_cursor for the given sort columns.
+    
+    Args:
+        cursor: Cursor token
+        columns: Sort columns the cursor was built from
+        
+    Returns:
+        list: Sort-key values, typed to match the columns
+        
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [
+            datetime.fromisoformat(value) if isinstance(column.type, DateTime) else value
+            for column, value in zip(columns, values)
+        ]
+    except (TypeError, ValueError):
+        raise ValueError("Invalid pagination cursor")
+
+def keyset_paginate(query, columns, cursor=None, limit=20, include_total=False, row=None):
+    """
+    Paginate a SQLAlchemy query newest-first on a unique keyset.
+    
+    Unlike paginate_query, no OFFSET is used: each page is an index range scan
+    that starts after the cursor, so deep pages cost the same as the first.
+    The total row count is only computed when asked for.
+    
+    Args:
+        query: SQLAlchemy query object (without ORDER BY), or a Core select
+            from row.select() when row is given
+        columns: Sort columns, ending with a unique column (e.g. created_at, id)
+        cursor: Cursor from a previous page's next_cursor, or None for page 1
+        limit: Items per page (capped at 100)
+        include_total: Whether to run a COUNT(*) for the total
+        row: Read-only row class (app.models.rows) to wrap the selected columns in
+        
+    Returns:
+        dict: Page items and pagination metadata
+    """
+    if limit is None or limit < 1:
+        limit = 20
+    
+    if limit > 100:
+        limit = 100
+    
+    total = None
+    if include_total:
+        if row is not None:
+            total = db.session.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+        else:
+            total = query.order_by(None).count()
+    
+    if cursor:
+        query = query.filter(tuple_(*columns) < tuple_(*decode_cursor(cursor, columns)))
+    
+    query = query.order_by(*[column.desc() for column in columns]).limit(limit + 1)
+    rows = row.fetch(query) if row is not None else query.all()
+    has_next = len(rows) > limit
+    items = rows[:limit]
+    
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+    
+    pagination = {
+        "limit": limit,
+        "has_next": has_next,
+        "next_cursor": next_cursor
+    }
+    if include_total:
+        pagination["total"] = total
+    
+    return {
+        "items": items,
+        "pagination": pagination
+    }
+
+def execute_bulk_insert(model, items, return_defaults=False, commit=True):
     """
     Efficiently insert multiple items into the database.
     
     Args:
         model: SQLAlchemy model class
         items: List of dictionaries containing model attribute values
+        return_defaults: Write generated primary keys back into items
+        commit: Commit the transaction; otherwise the caller commits
         
     Returns:
         bool: Success status
     """
     try:
-        db.session.bulk_insert_mappings(model, items)
-        db.session.commit()
+        db.session.bulk_insert_mappings(model, items, return_defaults=return_defaults)
+        if commit:
+            db.session.commit()
         return True
     except SQLAlchemyError as e:
         db.session.rollback()
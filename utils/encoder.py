@@ -0,0 +1,89 @@
+"""
+JSON response encoding for the savings app.
+
+Two interchangeable Flask JSON providers, installed as app.json:
+    
+    OrjsonProvider  - orjson (optional dependency), encodes in C
+    StdlibProvider  - Flask's json provider, used when orjson is missing
+
+Both encode the types our models hold natively, so serializers can hand
+over column values as they are instead of converting each one:
+    
+    Decimal    -> number (like the float() in every to_dict)
+    datetime   -> ISO 8601 string (like .isoformat(), not Flask's HTTP date)
+    timedelta  -> number of seconds
+
+Configured through JSON_PROVIDER ('orjson', 'stdlib' or 'auto', which
+picks orjson when it is installed).
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional; StdlibProvider is used instead
+    orjson = None
+
+def encode_default(value):
+    """Encode the values neither encoder handles itself"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    return DefaultJSONProvider.default(value)
+
+class StdlibProvider(DefaultJSONProvider):
+    """Flask's stdlib json provider with Decimal, datetime and timedelta support."""
+    
+    name = 'stdlib'
+    default = staticmethod(encode_default)
+
+class OrjsonProvider(StdlibProvider):
+    """
+    orjson-backed provider. Keeps Flask's behaviour for sort_keys and
+    compact (indented output in debug mode); ensure_ascii is ignored, the
+    output is always UTF-8.
+    """
+    
+    name = 'orjson'
+    
+    def _options(self, indent=False):
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+    
+    def dumps(self, obj, **kwargs):
+        # Formatting or custom hooks the caller asked for are only known to the stdlib encoder
+        if set(kwargs) - {'indent', 'separators'}:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=encode_default, option=self._options(bool(kwargs.get('indent')))).decode()
+    
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        
+        body = orjson.dumps(obj, default=encode_default, option=self._options(indent) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+def init_json(app):
+    """Install the JSON provider selected by JSON_PROVIDER as app.json"""
+    choice = app.config.get('JSON_PROVIDER', 'auto')
+    if choice not in ('auto', 'orjson', 'stdlib'):
+        raise ValueError(f"Unknown JSON_PROVIDER: {choice}")
+    if choice == 'orjson' and orjson is None:
+        raise ValueError("JSON_PROVIDER is 'orjson' but orjson is not installed")
+    
+    provider = OrjsonProvider if orjson is not None and choice != 'stdlib' else StdlibProvider
+    app.json = provider(app)
+    return app.json
@@ -0,0 +1,45 @@
+"""
+Conditional GET (ETag / If-None-Match) support for the savings app's listings.
+"""
+from flask import make_response, request
+from flask_jwt_extended import get_jwt_identity
+from functools import wraps
+import hashlib
+
+def weak_etag(*parts):
+    """Opaque validator for a listing built from cheap version parts"""
+    return hashlib.sha1(':'.join(str(part) for part in parts).encode()).hexdigest()[:20]
+
+def conditional(version):
+    """
+    Decorator answering If-None-Match on a GET endpoint with a 304 before
+    the endpoint runs. Must be used with jwt_required.
+    
+    version(user_id, **view_args) returns what the listing depends on (e.g.
+    the user's data version, or a count and max(updated_at)) from one small
+    query, or None when the resource is not the user's (the endpoint then
+    runs and answers as usual). 200 responses carry the weak ETag, marked
+    private and always revalidated, so the client can send it next time.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            user_id = get_jwt_identity()
+            parts = version(user_id, **kwargs)
+            if parts is not None and not isinstance(parts, (tuple, list)):
+                parts = (parts,)
+            etag = weak_etag(user_id, request.full_path, *parts) if parts is not None else None
+            
+            if etag and request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            if etag:
+                response.set_etag(etag, weak=True)
+                response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
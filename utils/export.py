@@ -0,0 +1,59 @@
+"""
+Streaming export formats for the savings app.
+
+Each writer takes an iterable of row batches (e.g. from
+SavingsService.iter_export) and yields one text chunk per batch, so a
+streamed response built on it holds a single batch in memory at a time.
+"""
+from datetime import date
+import csv
+import io
+
+# Export format to response mimetype
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+def _csv_value(value):
+    """CSV cell for a column value (Decimals keep their exact digits)"""
+    if isinstance(value, date):
+        return value.isoformat()
+    # Text a spreadsheet would run as a formula (free-form descriptions)
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@'):
+        return "'" + value
+    return value
+
+def csv_chunks(batches, fields):
+    """
+    CSV with a header row of `fields`, one chunk per batch.
+    
+    Args:
+        batches: Iterable of lists of rows with the given attributes
+        fields: Column names, read from each row with getattr
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    
+    for batch in batches:
+        writer.writerows([[_csv_value(getattr(row, field)) for field in fields] for row in batch])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    
+    if buffer.tell():
+        # No rows: just the header
+        yield buffer.getvalue()
+
+def ndjson_chunks(batches, serializer, dumps):
+    """
+    Newline-delimited JSON, one object per row and one chunk per batch.
+    
+    Args:
+        batches: Iterable of lists of rows
+        serializer: Serializer (app.utils.serializers) turning a row into a dict
+        dumps: JSON encoder for one dict, e.g. current_app.json.dumps
+    """
+    for batch in batches:
+        yield ''.join([dumps(item) + '\n' for item in serializer.dump_many(batch)])
@@ -0,0 +1,135 @@
+"""
+Idempotency-Key support for the savings app's money-moving endpoints.
+"""
+from app.services.idempotency_service import IdempotencyService
+from flask import current_app, g, has_request_context, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from functools import wraps
+import hashlib
+import time
+
+idempotency_service = IdempotencyService()
+
+# How often a duplicate request re-checks the in-flight original
+POLL_INTERVAL = 0.05
+
+def idempotent(fn):
+    """
+    Decorator making an endpoint safe to retry with an Idempotency-Key header.
+    Must be used with jwt_required.
+    
+    The first request with a given key runs normally and its response is
+    stored. Retries with the same key and body get the stored response back
+    (marked with an Idempotent-Replayed header) without running the endpoint
+    again. A duplicate that arrives while the first is still running waits
+    for it briefly, and gets a 409 if it does not finish in time. Server
+    errors are not stored, so those requests can be retried for real -
+    unless their write had already committed.
+    
+    The commit of the endpoint's write also marks the key committed (see
+    _mark_committed), so if the process dies before the response is stored
+    a retry gets a 409 instead of running the write again.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        
+        if not key:
+            return fn(*args, **kwargs)
+        
+        if len(key) > 255:
+            return jsonify({"error": "Idempotency-Key cannot exceed 255 characters"}), 400
+        
+        user_id = get_jwt_identity()
+        request_hash = _request_fingerprint()
+        deadline = time.monotonic() + current_app.config.get('IDEMPOTENCY_WAIT_SECONDS', 5)
+        
+        while True:
+            record, claimed = idempotency_service.claim(user_id, key, request_hash)
+            
+            if claimed:
+                break
+            
+            if record is not None:
+                if record.request_hash != request_hash:
+                    return jsonify({"error": "Idempotency-Key was already used for a different request"}), 422
+                
+                if record.status == 'completed':
+                    return _replay(record)
+            
+            if time.monotonic() >= deadline:
+                if record is not None and record.status == 'committed':
+                    return jsonify({"error": "A request with this Idempotency-Key was applied, but its response "
+                                             "is not available; do not retry it"}), 409
+                return jsonify({"error": "A request with this Idempotency-Key is still being processed"}), 409
+            
+            time.sleep(POLL_INTERVAL)
+        
+        claim = (record.id, record.locked_at)
+        g.idempotency_claim = claim
+        try:
+            response = make_response(fn(*args, **kwargs))
+        except Exception:
+            g.pop('idempotency_claim', None)
+            idempotency_service.release(*claim)
+            raise
+        
+        g.pop('idempotency_claim', None)
+        if response.status_code >= 500 and idempotency_service.release(*claim):
+            return response
+        
+        idempotency_service.complete(
+            *claim,
+            response.status_code,
+            response.get_data(as_text=True),
+            response.mimetype
+        )
+        
+        return response
+    return wrapper
+
+@event.listens_for(Session, 'after_flush')
+def _note_flush(session, flush_context):
+    session.info['idempotency_writes'] = True
+
+@event.listens_for(Session, 'do_orm_execute')
+def _note_statement(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['idempotency_writes'] = True
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_writes(session):
+    session.info.pop('idempotency_writes', None)
+
+@event.listens_for(Session, 'before_commit')
+def _mark_committed(session):
+    """
+    Mark the request's claimed key committed in the same transaction as
+    its write, or fail the commit if a retry has taken the key over.
+    """
+    wrote = session.info.pop('idempotency_writes', False) or session.new or session.dirty or session.deleted
+    claim = g.get('idempotency_claim') if has_request_context() else None
+    
+    if wrote and claim:
+        idempotency_service.mark_committed(*claim)
+        session.info.pop('idempotency_writes', None)
+
+def _request_fingerprint():
+    """Hash of the parts of the request a replay must match."""
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.path.encode())
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+def _replay(record):
+    """Rebuild the stored response of a completed request."""
+    response = current_app.response_class(
+        record.response_body,
+        status=record.response_code,
+        mimetype=record.response_mimetype
+    )
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
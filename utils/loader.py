@@ -0,0 +1,106 @@
+"""
+Request-scoped entity loader for the savings app.
+
+A request often checks ownership of the same wallet, goal or group
+membership in several services. The loader, kept on flask.g, fetches each
+(model, id, owner) at most once per request and counts hits and misses.
+Flask-SQLAlchemy removes the session when the app context ends, so the
+cached instances never outlive their session.
+"""
+from app import db
+from flask import g, has_request_context
+
+class RequestLoader:
+    """Per-request cache of entities keyed by (model, id, owner)."""
+    
+    def __init__(self):
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, model, entity_id, owner_id=None):
+        """
+        Load a row by id, restricted to owner_id (the model's user_id) if given.
+        
+        Rows of models with an is_deleted flag are skipped while it is set.
+        
+        Returns:
+            The instance, or None if it does not exist or is not the owner's
+        """
+        key = (model, _normalize(entity_id), _normalize(owner_id))
+        
+        def load():
+            if owner_id is None:
+                entity = db.session.get(model, key[1])
+                return None if getattr(entity, 'is_deleted', False) else entity
+            query = model.query.filter_by(id=key[1], user_id=key[2])
+            if hasattr(model, 'is_deleted'):
+                query = query.filter(model.is_deleted.is_(False))
+            return query.first()
+        
+        return self._fetch(key, load)
+    
+    def membership(self, group_id, user_id):
+        """The user's GroupMember row in a group, or None"""
+        from app.models.group import GroupMember
+        
+        key = (GroupMember, _normalize(group_id), _normalize(user_id))
+        
+        return self._fetch(key, lambda: GroupMember.query.filter_by(group_id=key[1], user_id=key[2]).first())
+    
+    def put(self, model, entity_id, owner_id, entity):
+        """Prime the cache with an instance the caller already holds"""
+        self._entries[(model, _normalize(entity_id), _normalize(owner_id))] = entity
+    
+    def forget(self, model, entity_id, owner_id=None):
+        """Drop cached lookups of one row (of one owner's, if given), e.g. after deleting it"""
+        entity_id, owner_id = _normalize(entity_id), _normalize(owner_id)
+        for key in [key for key in self._entries if key[0] is model and key[1] == entity_id]:
+            if owner_id is None or key[2] == owner_id:
+                del self._entries[key]
+    
+    def clear(self):
+        self._entries.clear()
+    
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+    
+    def _fetch(self, key, load):
+        if key in self._entries:
+            self.hits += 1
+            return self._entries[key]
+        
+        self.misses += 1
+        entity = self._entries[key] = load()
+        return entity
+
+def request_loader():
+    """
+    The current request's loader.
+    
+    Outside a request (CLI commands, worker processes) each call gets a
+    fresh loader, so nothing is cached across units of work.
+    """
+    if not has_request_context():
+        return RequestLoader()
+    
+    if 'request_loader' not in g:
+        g.request_loader = RequestLoader()
+    return g.request_loader
+
+def reset_request_loader():
+    """Forget everything loaded so far in this request, e.g. after a rollback"""
+    if has_request_context() and 'request_loader' in g:
+        g.request_loader.clear()
+
+def add_stats_header(response):
+    """after_request hook reporting the request's loader hits and misses"""
+    if 'request_loader' in g:
+        response.headers['X-Entity-Cache'] = 'hits={hits}; misses={misses}'.format(**g.request_loader.stats())
+    return response
+
+def _normalize(value):
+    """Ids arrive as ints from routes and as strings from JWT identities"""
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return value
@@ -0,0 +1,68 @@
+"""
+Per-model serializers for the savings app's list responses.
+
+A serializer takes ORM instances or the read-only rows of app.models.rows.
+It reads an instance's loaded columns straight from its __dict__ in one
+itemgetter call (going through the ORM's attribute instrumentation only
+when a column is expired or deferred) and leaves Decimal/datetime values
+as they are for app.json (see utils.encoder) to encode, instead of calling
+float() and isoformat() per value in Python. The encoded output is the
+same as the model's to_dict().
+
+Create one per response: anything time-dependent (a goal's expiry) is
+computed against the single `now` taken when the serializer is created.
+
+Usage:
+    return jsonify(GoalSerializer().dump_many(goals))
+"""
+from datetime import datetime
+from operator import attrgetter, itemgetter
+
+class Serializer:
+    """Base serializer copying `fields` from each row."""
+    
+    fields = ()
+    
+    def __init__(self, now=None):
+        self.now = now or datetime.utcnow()
+        self._loaded = itemgetter(*self.fields)
+        self._values = attrgetter(*self.fields)
+    
+    def dump(self, obj):
+        state = getattr(obj, '__dict__', None)
+        if state is None:
+            # A __slots__ row
+            return dict(zip(self.fields, self._values(obj)))
+        
+        try:
+            values = self._loaded(state)
+        except KeyError:
+            # Expired or not loaded yet; let the ORM load it
+            values = self._values(obj)
+        return dict(zip(self.fields, values))
+    
+    def dump_many(self, rows):
+        dump = self.dump
+        return [dump(row) for row in rows]
+
+class WalletSerializer(Serializer):
+    fields = ('id', 'user_id', 'amount', 'name', 'created_at', 'updated_at', 'version_id')
+
+class SavingsUpdateSerializer(Serializer):
+    fields = ('id', 'user_id', 'wallet_id', 'goal_id', 'amount', 'description', 'type', 'transfer_id',
+              'created_at', 'updated_at')
+
+class GoalSerializer(Serializer):
+    fields = ('id', 'user_id', 'target_amount', 'current_amount', 'start_date', 'end_date', 'description',
+              'name', 'achieved', 'created_at', 'updated_at', 'version_id')
+    
+    def dump(self, goal):
+        data = super().dump(goal)
+        data['progress_percentage'] = float(goal.progress_percentage)
+        data['time_period_days'] = goal.time_period.days if goal.time_period else None
+        data['days_remaining'] = goal.days_remaining_at(self.now)
+        data['is_expired'] = goal.is_expired_at(self.now)
+        return data
+
+class GroupSerializer(Serializer):
+    fields = ('id', 'name', 'description', 'created_by', 'created_at', 'updated_at', 'member_count')
@@ -0,0 +1,112 @@
+"""
+Single-flight request coalescing for the savings app.
+
+Concurrent identical calls within one worker process share one
+computation: the first caller (the leader) runs it and every caller that
+arrives while it is in flight waits for, and gets, the same result or
+exception. Nothing is kept once the computation finishes; caching is
+CacheService's job.
+
+Results are shared between threads, so only use this for methods that
+return plain data (dicts, lists, numbers), never ORM instances.
+"""
+from flask import current_app
+from functools import wraps
+import json
+import threading
+
+class SingleFlightTimeout(TimeoutError):
+    """Raised to a caller that waited too long for an in-flight computation."""
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key.
+    
+    Usage:
+        flights = SingleFlight()
+        value = flights.do(('summary', user_id), lambda: compute(user_id), timeout=30)
+    """
+    
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+    
+    def do(self, key, fn, timeout=None):
+        """
+        Run fn, or wait for the in-flight call with the same key.
+        
+        Args:
+            key: Hashable identity of the computation
+            fn: Zero-argument callable
+            timeout: Seconds a follower waits before giving up (None waits forever)
+        
+        Raises:
+            SingleFlightTimeout: When a follower's wait times out; the leader carries on
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.followers += 1
+        
+        if not leader:
+            if not call.done.wait(timeout):
+                raise SingleFlightTimeout(f"Timed out after {timeout}s waiting for an identical request")
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+    
+    def stats(self):
+        return {"leaders": self.leaders, "followers": self.followers}
+
+flights = SingleFlight()
+
+def flight_key(name, *args, **kwargs):
+    """Hashable key for a call of `name` with the given arguments"""
+    return (name, json.dumps([args, kwargs], sort_keys=True, default=str))
+
+def single_flight(version=None, timeout=None):
+    """
+    Decorator coalescing concurrent identical calls of a service method.
+    
+    The key is the method plus its arguments (self excluded). Give version,
+    a callable taking the method's arguments, to add e.g. the user's data
+    version to the key, so a call made after a committed write never joins
+    a computation that started before it.
+    
+    Args:
+        version: Optional callable(self, *args, **kwargs) added to the key
+        timeout: Seconds a follower waits (default SINGLE_FLIGHT_TIMEOUT)
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            extra = version(self, *args, **kwargs) if version else None
+            key = flight_key(fn.__qualname__, extra, *args, **kwargs)
+            wait = timeout if timeout is not None else current_app.config.get('SINGLE_FLIGHT_TIMEOUT', 30)
+            
+            return flights.do(key, lambda: fn(self, *args, **kwargs), timeout=wait)
+        return wrapper
+    return decorator
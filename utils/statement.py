@@ -0,0 +1,118 @@
+"""
+Bank statement (CSV) parsing for wallet imports.
+
+A statement has a header row naming at least `date` and `amount` columns
+(any order, any case), and optionally `description` and `type`:
+
+    date,amount,description
+    2024-01-31,2500.00,Salary
+    2024-02-01,-42.10,Groceries
+
+Without a `type` column the sign of the amount decides: positive amounts
+are deposits and negative ones withdrawals. With one, it must say
+deposit or withdrawal and the amount must be positive.
+
+Each entry gets a content hash of its date, type, amount and description,
+so importing an overlapping statement again skips the entries already
+there. Identical lines on the same day (two equal card payments) are told
+apart by their position among that day's lines, so a statement must list
+each day's lines together, as bank exports do.
+"""
+from app.utils.validators import validate_amount, validate_timestamp
+from datetime import datetime
+import csv
+import hashlib
+
+REQUIRED_COLUMNS = ('date', 'amount')
+
+def content_hash(created_at, savings_type, amount, description, occurrence):
+    """Hex digest identifying an imported entry within its wallet"""
+    key = f"{created_at.isoformat()}|{savings_type}|{amount}|{description or ''}|{occurrence}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+def parse_statement(lines):
+    """
+    Parse a statement lazily, one entry at a time.
+    
+    Args:
+        lines: Iterable of text lines, e.g. the decoded upload stream
+    
+    Yields:
+        tuple: (line number, entry, error) - entry is a dict with
+        created_at, type, amount, description and content_hash, or None
+        when the line is invalid and error says why
+    
+    Raises:
+        ValueError: If the header row lacks a required column
+    """
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        raise ValueError("The statement is empty")
+    
+    columns = {name.strip().lower(): index for index, name in enumerate(header)}
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise ValueError(f"The statement's header row must name the columns: {', '.join(missing)}")
+    
+    date_at, amount_at = columns['date'], columns['amount']
+    description_at, type_at = columns.get('description'), columns.get('type')
+    now = datetime.utcnow()
+    occurrences = {}
+    current_day = None
+    
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        
+        line = reader.line_num
+        if len(row) < len(header):
+            yield line, None, f"Expected {len(header)} columns, got {len(row)}"
+            continue
+        
+        is_valid, message, created_at = validate_timestamp(row[date_at].strip(), end_of_day=False)
+        if not is_valid:
+            yield line, None, message
+            continue
+        if created_at > now:
+            yield line, None, "Date cannot be in the future"
+            continue
+        
+        raw_amount = row[amount_at].strip()
+        negative = raw_amount.startswith('-')
+        if type_at is not None:
+            savings_type = row[type_at].strip().lower()
+            if savings_type not in ('deposit', 'withdrawal'):
+                yield line, None, "Type must be one of: deposit, withdrawal"
+                continue
+            if negative:
+                yield line, None, "Amount must be positive when a type is given"
+                continue
+        else:
+            savings_type = 'withdrawal' if negative else 'deposit'
+        
+        is_valid, message, amount = validate_amount(raw_amount[1:] if negative else raw_amount)
+        if not is_valid:
+            yield line, None, message
+            continue
+        
+        description = row[description_at].strip() if description_at is not None else ''
+        description = description or None
+        if description is not None and len(description) > 500:
+            yield line, None, "Description cannot exceed 500 characters"
+            continue
+        
+        # Count identical lines within the day they belong to
+        if created_at.date() != current_day:
+            occurrences.clear()
+            current_day = created_at.date()
+        key = (created_at, savings_type, amount, description)
+        occurrences[key] = occurrence = occurrences.get(key, 0) + 1
+        
+        yield line, {
+            'created_at': created_at,
+            'type': savings_type,
+            'amount': amount,
+            'description': description,
+            'content_hash': content_hash(created_at, savings_type, amount, description, occurrence)
+        }, None
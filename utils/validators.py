@@ -3,7 +3,7 @@ Input validation utilities for the savings app.
 """
 import re
 from decimal import Decimal, InvalidOperation
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import uuid
 
 def validate_email(email):
@@ -98,6 +98,35 @@ def validate_date_format(date_str, format="%Y-%m-%d"):
     except ValueError:
         return False, f"Invalid date format. Expected format: {format}", None
 
+def validate_timestamp(timestamp_str, end_of_day=True):
+    """
+    Validate an ISO 8601 date or timestamp and convert it to naive UTC.
+    A bare date means the end of that day (or its start, for the lower
+    bound of a range).
+    
+    Args:
+        timestamp_str: Date or timestamp string to validate
+        end_of_day: Whether a bare date means the end rather than the start of the day
+        
+    Returns:
+        tuple: (is_valid, message, datetime_obj)
+    """
+    if not timestamp_str:
+        return False, "Timestamp is required", None
+    
+    try:
+        timestamp = datetime.fromisoformat(timestamp_str)
+    except ValueError:
+        return False, "Invalid timestamp. Expected an ISO 8601 date or timestamp", None
+    
+    if len(timestamp_str) == 10 and end_of_day:
+        timestamp += timedelta(days=1, microseconds=-1)
+    
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    
+    return True, "Valid timestamp", timestamp
+
 def validate_date_range(start_date, end_date):
     """
     Validate that end_date is after start_date.